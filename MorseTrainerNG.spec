@@ -16,7 +16,7 @@ a = Analysis(['main.py'],
              pathex=[],
              binaries=[],
              datas=datas, # <-- Используем наш список данных
-             hiddenimports=['Pillow', 'pyglet', 'scipy'], # <-- Явно перечисляем важные библиотеки
+             hiddenimports=['Pillow', 'pyglet'], # <-- Явно перечисляем важные библиотеки
              hookspath=[],
              runtime_hooks=[],
              excludes=[],
@@ -0,0 +1,255 @@
+"""
+Замеры производительности синтеза и воспроизведения (без звуковой карты).
+
+Что измеряется:
+    - скорость синтеза (сэмплов в секунду) для _generate_wave и render_text;
+    - скорость generate_exercise_text (групп в секунду);
+    - скорость кодирования текста в длительности (символов в секунду);
+    - задержка от start_playback до записи первого сэмпла в приемник;
+    - скорость (WPM) по длине отрендеренной дорожки на 5-60 WPM для обоих
+      типов звука (по стандарту PARIS) - это проверка рендеринга, а не
+      дрейфа вывода: длина дорожки задается самой скоростью.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_audio.py --output bench.json
+    python benchmarks/bench_audio.py --compare bench.json
+
+Дрейф тайминга вывода проверяет только флаг --realtime: PARIS проигрывается
+через приемник, имитирующий устройство, и скорость меряется по настенным
+часам (медленно, около двух минут).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from morse_trainer.audio_player import AudioPlayer
+from morse_trainer.audio_sinks import NullSink
+from morse_trainer.morse_logic import MorseLogic
+from morse_trainer.utils import load_json, resource_path
+
+SOUND_TYPES = ["analog", "discrete"]
+WPM_RANGE = [5, 10, 15, 20, 25, 30, 40, 50, 60]
+# PARIS кириллицей (П, А, Р, И, С имеют те же коды): ровно 50 точек с паузой слова
+PARIS_WORD = "ПАРИС"
+# Допустимое ухудшение метрики при сравнении (доля)
+REGRESSION_THRESHOLD = 0.10
+
+
+def _make_logic(sample_rate=44100, realtime=False):
+    characters_data = load_json(resource_path("config/characters.json"))
+    lessons_data = load_json(resource_path("config/lessons.json"))
+    player = AudioPlayer(sample_rate=sample_rate, sink=NullSink(sample_rate, realtime=realtime))
+    return MorseLogic(characters_data, lessons_data, player)
+
+
+def _best_of(func, repeats: int):
+    """Возвращает минимальное время выполнения func из repeats попыток."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_generate_wave(logic, repeats=5):
+    """Сэмплов в секунду для _generate_wave (точка и тире вперемешку)."""
+    results = {}
+    player = logic.audio_player
+    for sound_type in SOUND_TYPES:
+        player.set_sound_type(sound_type)
+        durations = [player.dot_duration, player.dash_duration] * 50
+        total = sum(int(player.sample_rate * d) for d in durations)
+        elapsed = _best_of(lambda: [player._generate_wave(d) for d in durations], repeats)
+        results[f"generate_wave.{sound_type}.samples_per_sec"] = total / elapsed
+    player.set_sound_type("analog")
+    return results
+
+
+def bench_render_text(logic, repeats=3):
+    """Сэмплов в секунду при рендеринге целого упражнения в одну дорожку."""
+    results = {}
+    player = logic.audio_player
+    chars = logic.get_all_letters()
+    text = logic.generate_exercise_text(chars, 50, 5)
+    for sound_type in SOUND_TYPES:
+        player.set_sound_type(sound_type)
+        total = len(logic.render_text(text)[0])
+        elapsed = _best_of(lambda: logic.render_text(text), repeats)
+        results[f"render_text.{sound_type}.samples_per_sec"] = total / elapsed
+    player.set_sound_type("analog")
+    return results
+
+
+def bench_generate_text(logic, repeats=5):
+    """Групп в секунду для generate_exercise_text."""
+    chars = logic.get_all_letters()
+    num_groups = 20000
+    elapsed = _best_of(lambda: logic.generate_exercise_text(chars, num_groups, 5), repeats)
+    return {"generate_exercise_text.groups_per_sec": num_groups / elapsed}
+
+
+def bench_encode_text(logic, repeats=5):
+    """Символов в секунду при кодировании текста в длительности "звук/пауза"."""
+    text = logic.generate_exercise_text(logic.get_all_letters(), 20000, 5)
+    elapsed = _best_of(lambda: logic.encode_text(text), repeats)
+    return {"encode_text.chars_per_sec": len(text) / elapsed}
+
+
+def bench_start_latency(logic, trials=20):
+    """Задержка (мс) от start_playback до записи первого сэмпла в приемник."""
+    player = logic.audio_player
+    latencies = []
+    for _ in range(trials):
+        sink = NullSink(player.sample_rate)
+        player.set_sink(sink)
+        started = time.perf_counter()
+        logic.start_playback("Е")
+        logic.playback.wait_idle()
+        latencies.append((sink.first_write_time - started) * 1000)
+    return {
+        "start_latency.median_ms": statistics.median(latencies),
+        "start_latency.max_ms": max(latencies),
+    }
+
+
+def _paris_text(words: int):
+    return " ".join([PARIS_WORD] * words)
+
+
+def bench_rendered_wpm(logic, words=5):
+    """
+    Скорость по длине отрендеренной дорожки.
+
+    Слово PARIS по стандарту занимает 50 точек вместе с паузой 7 точек
+    после него, поэтому к длине дорожки добавляется одна межсловная пауза.
+    Метрика ловит ошибки рендеринга (лишние или потерянные сэмплы в элементах
+    и паузах), но не дрейф вывода - для него есть bench_realtime_wpm.
+    """
+    results = {}
+    player = logic.audio_player
+    text = _paris_text(words)
+    for sound_type in SOUND_TYPES:
+        player.set_sound_type(sound_type)
+        for wpm in WPM_RANGE:
+            player.set_wpm(wpm)
+            samples, _ = logic.render_text(text)
+            seconds = (len(samples) + 7 * player.get_unit_samples()) / player.sample_rate
+            effective = words * 60 / seconds
+            results[f"rendered_wpm.{sound_type}.{wpm}"] = effective
+            results[f"rendered_wpm_error_pct.{sound_type}.{wpm}"] = (effective - wpm) / wpm * 100
+    player.set_sound_type("analog")
+    player.set_wpm(20)
+    return results
+
+
+def bench_realtime_wpm(words=2):
+    """Фактическая скорость по настенным часам через приемник в темпе устройства."""
+    results = {}
+    logic = _make_logic(realtime=True)
+    player = logic.audio_player
+    text = _paris_text(words)
+    for sound_type in SOUND_TYPES:
+        player.set_sound_type(sound_type)
+        for wpm in WPM_RANGE:
+            player.set_wpm(wpm)
+            started = time.perf_counter()
+            logic.start_playback(text)
+            logic.playback.wait_idle()
+            elapsed = time.perf_counter() - started + 7 * player.dot_duration
+            effective = words * 60 / elapsed
+            results[f"realtime_wpm.{sound_type}.{wpm}"] = effective
+            results[f"realtime_wpm_error_pct.{sound_type}.{wpm}"] = (effective - wpm) / wpm * 100
+    return results
+
+
+def _is_regression(name: str, old: float, value: float):
+    """Решает, стала ли метрика заметно хуже."""
+    if name.startswith(("rendered_wpm_error_pct", "realtime_wpm_error_pct")):
+        # Для точности скорости важно абсолютное отклонение (в процентных пунктах)
+        return abs(value) > abs(old) + 0.5
+    if name.startswith(("rendered_wpm", "realtime_wpm")):
+        return False # Отражено в *_wpm_error_pct
+    if name.startswith("start_latency"):
+        # Доли миллисекунды - это шум планировщика, а не регрессия
+        return value > old * (1 + REGRESSION_THRESHOLD) and value - old > 1.0
+    return value < old * (1 - REGRESSION_THRESHOLD)
+
+
+def compare(current: dict, baseline: dict):
+    """Печатает сравнение с сохраненным прогоном. Возвращает число регрессий."""
+    regressions = 0
+    print(f"{'Метрика':<45}{'Было':>14}{'Стало':>14}{'Изм., %':>10}")
+    for name, value in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = (value - old) / abs(old) * 100 if old else 0.0
+        worse = _is_regression(name, old, value)
+        regressions += worse
+        mark = "  <-- РЕГРЕССИЯ" if worse else ""
+        print(f"{name:<45}{old:14.2f}{value:14.2f}{change:10.1f}{mark}")
+    return regressions
+
+
+def run(realtime=False):
+    logic = _make_logic()
+    results = {}
+    results.update(bench_generate_wave(logic))
+    results.update(bench_render_text(logic))
+    results.update(bench_generate_text(logic))
+    results.update(bench_encode_text(logic))
+    results.update(bench_start_latency(logic))
+    results.update(bench_rendered_wpm(logic))
+    if realtime:
+        results.update(bench_realtime_wpm())
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры синтеза и воспроизведения Морзе.")
+    parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+    parser.add_argument("--compare", help="Сравнить с ранее сохраненным JSON-файлом")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Также замерить скорость по настенным часам (долго)")
+    args = parser.parse_args(argv)
+
+    results = run(realtime=args.realtime)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    for name, value in results.items():
+        print(f"{name:<45}{value:14.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"Результаты сохранены в {args.output}")
+
+    if args.compare:
+        baseline = load_json(args.compare)
+        if baseline:
+            regressions = compare(results, baseline.get("results", {}))
+            if regressions:
+                print(f"Обнаружено регрессий: {regressions}")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,19 @@
-from morse_trainer.app import MorseTrainerApp
+import sys
+from morse_trainer.startup_profile import profiler
 
 if __name__ == "__main__":
+    # --profile-startup: печатает время импортов и фаз запуска
+    if "--profile-startup" in sys.argv[1:]:
+        profiler.enable()
+
+    # Тяжелые библиотеки импортируются по отдельности, чтобы профиль показал стоимость каждой
+    with profiler.phase("Импорт customtkinter"):
+        import customtkinter
+    with profiler.phase("Импорт numpy"):
+        import numpy
+    with profiler.phase("Импорт morse_trainer.app"):
+        from morse_trainer.app import MorseTrainerApp
+
     app = MorseTrainerApp()
     # Привязываем нашу функцию к событию закрытия окна
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
@@ -0,0 +1,153 @@
+import numpy as np
+
+class FenwickTree:
+    """
+    Дерево Фенвика (двоичное индексированное дерево) над массивом весов.
+
+    Изменение одного веса и выбор элемента по накопленной сумме - O(log n),
+    поэтому веса можно обновлять после каждого ответа, не перестраивая таблицу.
+    """
+    def __init__(self, weights):
+        self.size = len(weights)
+        self._weights = np.array(weights, dtype=np.float64)
+        self._tree = np.zeros(self.size + 1, dtype=np.float64)
+        # Построение за O(n): каждый узел передает свою сумму родителю
+        self._tree[1:] = self._weights
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+        self._step = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    @property
+    def total(self):
+        return self.prefix_sum(self.size)
+
+    def get(self, index: int):
+        return self._weights[index]
+
+    def set(self, index: int, weight: float):
+        """Устанавливает вес элемента index."""
+        delta = weight - self._weights[index]
+        self._weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int):
+        """Сумма весов первых count элементов."""
+        result = 0.0
+        i = count
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, value: float):
+        """Возвращает индекс элемента, в чей отрезок накопленной суммы попадает value."""
+        position = 0
+        step = self._step
+        while step:
+            next_position = position + step
+            if next_position <= self.size and self._tree[next_position] <= value:
+                position = next_position
+                value -= self._tree[next_position]
+            step >>= 1
+        return min(position, self.size - 1)
+
+
+class CharStats:
+    """Сглаженная статистика ответов по одному знаку."""
+    __slots__ = ("attempts", "error_rate", "reaction_time")
+
+    def __init__(self, error_rate: float):
+        self.attempts = 0
+        self.error_rate = error_rate
+        self.reaction_time = None # Секунды, экспоненциальное среднее
+
+
+class AdaptiveSelector:
+    """
+    Выбирает знаки с вероятностью, пропорциональной "трудности".
+
+    Вес знака растет с долей ошибок и временем реакции, поэтому знаки,
+    в которых пользователь ошибается или на которые долго отвечает,
+    звучат чаще. Статистика хранится по знаку и переживает смену пула,
+    а веса текущего пула лежат в дереве Фенвика.
+    """
+    # Начальная доля ошибок для еще не звучавших знаков (чтобы их проверить)
+    PRIOR_ERROR_RATE = 0.5
+    # Коэффициент сглаживания: насколько сильно последний ответ меняет статистику
+    SMOOTHING = 0.2
+    # Вклад доли ошибок (0..1) в вес
+    ERROR_WEIGHT = 4.0
+    # Время реакции, после которого знак считается "медленным" (сек)
+    TARGET_REACTION = 1.0
+    # Максимальный вклад медленной реакции в вес
+    MAX_REACTION_BONUS = 3.0
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.stats = {}
+        self.pool = []
+        self._index = {}
+        self._tree = FenwickTree([])
+
+    def _get_stats(self, char: str):
+        stats = self.stats.get(char)
+        if stats is None:
+            stats = self.stats[char] = CharStats(self.PRIOR_ERROR_RATE)
+        return stats
+
+    def get_weight(self, char: str):
+        """Вес знака по текущей статистике (не меньше 1)."""
+        stats = self._get_stats(char)
+        weight = 1.0 + self.ERROR_WEIGHT * stats.error_rate
+        if stats.reaction_time is not None:
+            slowness = stats.reaction_time / self.TARGET_REACTION - 1.0
+            weight += min(max(slowness, 0.0), self.MAX_REACTION_BONUS)
+        return weight
+
+    def get_weights(self, chars: list):
+        """Веса для списка знаков (например, для генерации групп)."""
+        return [self.get_weight(char) for char in chars]
+
+    def set_pool(self, chars: list):
+        """
+        Задает пул, из которого выбираются знаки (перестройка за O(n)).
+
+        Вызывается только при смене пула: сам выбор (choice) пул не сравнивает.
+        """
+        self.pool = list(chars)
+        self._index = {char: i for i, char in enumerate(self.pool)}
+        self._tree = FenwickTree(self.get_weights(self.pool))
+
+    def choice(self):
+        """Выбирает один знак из пула с учетом весов (или None для пустого пула)."""
+        if not self.pool:
+            return None
+        return self.pool[self._tree.find(self.rng.random() * self._tree.total)]
+
+    def record_answer(self, char: str, correct: bool, reaction_time=None):
+        """
+        Учитывает ответ и обновляет вес знака за O(log n).
+
+        Args:
+            char (str): Знак, который звучал.
+            correct (bool): Правильно ли ответил пользователь.
+            reaction_time (float): Время реакции в секундах (необязательно).
+        """
+        stats = self._get_stats(char)
+        alpha = self.SMOOTHING
+        stats.attempts += 1
+        stats.error_rate += alpha * ((0.0 if correct else 1.0) - stats.error_rate)
+        if reaction_time is not None:
+            if stats.reaction_time is None:
+                stats.reaction_time = reaction_time
+            else:
+                stats.reaction_time += alpha * (reaction_time - stats.reaction_time)
+
+        index = self._index.get(char)
+        if index is not None:
+            self._tree.set(index, self.get_weight(char))
@@ -1,31 +1,88 @@
 from customtkinter.windows.widgets.font import CTkFont
 import customtkinter as ctk
-import random
-from .utils import load_json
-from .audio_player import AudioPlayer
+import os
+import threading
+import time
+from tkinter import filedialog
+from .config_cache import load_compiled_config
+from .event_bus import CharSounding, EventBus, PlaybackError, PlaybackFinished, PlaybackStarted
+from .image_cache import ImageCache
+from .keyboard_pool import RecognitionKeyboard, StudyButtonBar
+from .theme_engine import ThemeEngine
+from .keyer import KEYER_TYPES
+from .audio_player import LazyAudioPlayer
 from .morse_logic import MorseLogic
+from .session_store import SessionStore
 from .utils import resource_path
-from PIL import Image
+from .startup_profile import profiler
 
 class MorseTrainerApp(ctk.CTk):
+    # Период кадра главного цикла (мс): разбор шины событий и опрос ключа при передаче
+    FRAME_MS = 16
+    # Задержка перерисовки фона после изменения размера окна (мс)
+    RESIZE_DEBOUNCE_MS = 150
+    # Повтор правильного знака после ошибки: сколько раз и пауза между повторами (сек)
+    ERROR_REPLAY_COUNT = 3
+    ERROR_REPLAY_PAUSE = 0.3
+    # Клавиши ключа: прямой ключ и лепестки манипулятора (точка/тире)
+    STRAIGHT_KEY_KEYSYMS = ("space", "Control_L", "Control_R")
+    DIT_KEYSYMS = ("Control_L", "bracketleft")
+    DAH_KEYSYMS = ("Control_R", "bracketright")
+    # Названия типов ключа в переключателе
+    KEYER_TYPE_NAMES = {"straight": "Прямой ключ", "iambic": "Манипулятор"}
+
     def __init__(self):
-        """Конструктор приложения."""
-        super().__init__()
+        """
+        Конструктор приложения.
+
+        Здесь создается только "скелет" окна, чтобы оно появилось сразу.
+        Шрифты, тема, фоновое изображение и рабочая область строятся
+        в _finish_startup после первой отрисовки, а аудиоустройство
+        открывается при первом обращении к плееру.
+        """
+        with profiler.phase("Создание корневого окна"):
+            super().__init__()
         # --- БЛОК 1: ЗАГРУЗКА КОНФИГУРАЦИЙ ---
-        self.themes = load_json(resource_path("config/themes.json"))
-        self.characters_data = load_json(resource_path("config/characters.json"))
-        self.lessons_data = load_json(resource_path("config/lessons.json"))
+        # Разобранные JSON и индексы берутся из кэша, пока файлы не изменятся
+        with profiler.phase("Загрузка конфигураций"):
+            self.compiled_config = load_compiled_config()
+            self.themes = self.compiled_config["theme_tables"]
+            self.characters_data = self.compiled_config["characters"]
+            self.lessons_data = self.compiled_config["lessons"]
         
         # --- БЛОК 2: АТРИБУТЫ СОСТОЯНИЯ ---
         self.current_theme = "Deep Space"
+        # Шрифты создаются один раз (см. _load_fonts) и общие для всех тем
         self.fonts = {}
+        self.theme_engine = ThemeEngine(self.fonts)
         self.current_char_pool = []
         self.current_correct_char = None
         self.rounds_left = 0
+        # Задание воспроизведения текущего раунда (в нем - момент окончания звука)
+        self.round_playback = None
+        # Текст приема групп, который сейчас звучит (для вывода прогресса)
+        self.reception_text = None
+        # Передача ключом: нажатые клавиши и отложенные отпускания (фильтр автоповтора)
+        self.keyer_keys_down = set()
+        self.pending_key_releases = {}
+        # Фоны, уже приведенные к размеру окна; ключ текущего фона и отложенная перерисовка
+        self.background_cache = ImageCache()
+        self.background_key = None
+        self.resize_job = None
         
         # --- БЛОК 3: ИНИЦИАЛИЗАЦИЯ БЭКЕНДА ---
-        self.audio_player = AudioPlayer()
-        self.logic = MorseLogic(self.characters_data, self.lessons_data, self.audio_player)
+        # Плеер создается лениво: устройство откроется при первом использовании
+        self.audio_player = LazyAudioPlayer()
+        with profiler.phase("Инициализация логики"):
+            self.logic = MorseLogic(self.characters_data, self.lessons_data, self.audio_player,
+                                    compiled=self.compiled_config)
+        # События воспроизведения разбираются в главном потоке раз в кадр (см. _on_frame)
+        self.event_bus = EventBus()
+        self.logic.playback.set_event_bus(self.event_bus)
+        self.event_bus.subscribe(PlaybackStarted, self._on_playback_started)
+        self.event_bus.subscribe(CharSounding, self._on_char_sounding)
+        self.event_bus.subscribe(PlaybackFinished, self._on_playback_finished)
+        self.event_bus.subscribe(PlaybackError, self._on_playback_error)
         
         # --- БЛОК 4: ИНИЦИАЛИЗАЦИЯ ССЫЛОК НА ВИДЖЕТЫ ---
         self._initialize_widget_references()
@@ -34,16 +91,83 @@ class MorseTrainerApp(ctk.CTk):
         self.title("Morse Trainer NG")
         self.geometry("900x650")
         
-        self._create_widgets()
-        self._populate_lesson_menu()
-        self.after(100, self._apply_theme)
+        with profiler.phase("Создание виджетов"):
+            self._create_widgets()
 
         self.bind("<KeyPress>", self._on_key_press)
+        self.bind("<KeyRelease>", self._on_key_release)
+        self.bind("<Configure>", self._on_window_configure)
         self.exercise_types_for_modes = {}
 
+        # Остальное - после того, как окно будет отрисовано
+        self.after_idle(self.after, 1, self._finish_startup)
+        self.after(self.FRAME_MS, self._on_frame)
+
+    def _on_frame(self):
+        """
+        Кадр главного цикла: события фоновых потоков и опрос ключа.
+
+        Фоновые потоки не трогают Tk: они публикуют события в шину, а здесь
+        все накопившееся за кадр обрабатывается разом (частые обновления
+        схлопываются до последнего).
+        """
+        self.after(self.FRAME_MS, self._on_frame)
+        self.event_bus.dispatch()
+        if self.logic.sending is not None:
+            self._poll_sending()
+
+    def _on_playback_started(self, event: PlaybackStarted):
+        if event.text == self.reception_text and self.output_textbox:
+            self.output_textbox.delete("1.0", "end")
+            self.output_textbox.insert("1.0", "Прием...")
+
+    def _on_char_sounding(self, event: CharSounding):
+        """Показывает, сколько знаков группы уже прозвучало (сами знаки не раскрываются)."""
+        if event.text != self.reception_text or not self.output_textbox:
+            return
+        sounded = len(event.text[:event.index + 1].replace(" ", ""))
+        total = len(event.text.replace(" ", ""))
+        self.output_textbox.delete("1.0", "end")
+        self.output_textbox.insert("1.0", f"Прием... {sounded} из {total}")
+
+    def _on_playback_finished(self, event: PlaybackFinished):
+        if event.on_complete:
+            event.on_complete(event.text)
+
+    def _on_playback_error(self, event: PlaybackError):
+        message = f"Ошибка воспроизведения: {event.message}"
+        if self.info_label and self.info_label.winfo_exists():
+            self.info_label.configure(text=message)
+        elif self.output_textbox and self.output_textbox.winfo_exists():
+            self.output_textbox.delete("1.0", "end")
+            self.output_textbox.insert("1.0", message)
+
+    def _finish_startup(self):
+        """Завершает запуск после первой отрисовки окна."""
+        profiler.mark("Окно отрисовано")
+        # Шрифты нужны уже при построении рабочей области
+        with profiler.phase("Создание шрифтов"):
+            self._load_fonts()
+        with profiler.phase("Заполнение списка уроков"):
+            self._populate_lesson_menu()
+        with profiler.phase("Применение темы"):
+            self._apply_theme()
+        profiler.mark("Приложение готово")
+        profiler.print_report()
+
+        with profiler.phase("Открытие журнала результатов"):
+            try:
+                self.logic.session_store = SessionStore()
+            except Exception as e:
+                print(f"Журнал результатов недоступен, статистика не сохраняется: {e}")
+
+        # Открываем аудиоустройство заранее в фоне, чтобы первое нажатие не ждало
+        threading.Thread(target=self.audio_player.get_player, daemon=True).start()
+
     def _initialize_widget_references(self):
         """Объявляет все переменные для виджетов как None."""
         self.bg_label = None
+        self.error_overlay, self.error_overlay_label = None, None
         self.sidebar_frame, self.main_frame = None, None
         self.theme_label, self.theme_menu = None, None
         self.speed_label = None
@@ -59,6 +183,8 @@ class MorseTrainerApp(ctk.CTk):
         self.output_textbox = None
         self.study_char_label, self.study_code_label, self.study_mnemonic_label = None, None, None
         self.keyboard_buttons = {}
+        # Кнопки знаков создаются один раз и переживают смену упражнения (см. keyboard_pool)
+        self.recognition_keyboard, self.study_button_bar = None, None
         self.wpm_value_label = None
         self.wpm_minus_button = None
         self.wpm_plus_button = None
@@ -66,6 +192,9 @@ class MorseTrainerApp(ctk.CTk):
         self.custom_char_list = [] # Список для кастомных символов
         self.custom_mode_button = None # Кнопка для вызова окна
         self.custom_checkbox_vars = {}
+        self.sending_target_label, self.sending_textbox = None, None
+        self.keyer_type_button, self.key_pad = None, None
+        self.corpus_button = None
 
     def _on_theme_selected(self, theme_name: str):
         if not isinstance(theme_name, str) or theme_name not in self.themes: return
@@ -73,75 +202,98 @@ class MorseTrainerApp(ctk.CTk):
         self._apply_theme()
         
     def _apply_theme(self):
-        """Применяет стили из текущей темы ко ВСЕМ существующим виджетам."""
+        """
+        Применяет текущую тему: фон окна и цвета зарегистрированных виджетов.
+
+        Перенастраиваются только свойства, отличающиеся от прошлой темы
+        (см. ThemeEngine); рабочая область не перестраивается.
+        """
         theme_data = self.themes.get(self.current_theme)
         if not theme_data: return
 
         print(f"Применение стилей из темы '{self.current_theme}'...")
         self._load_fonts()
         self._update_background(theme_data)
+        configured = self.theme_engine.apply(theme_data)
+        print(f"Тема применена: перенастроено виджетов - {configured}.")
 
-        card_bg = theme_data.get("card_bg", "#343638")
-        text_color = theme_data.get("text_color", "#dce4ee")
-        button_bg = theme_data.get("button_bg", "#565b5e")
-        button_hover = theme_data.get("button_hover", "#656b6e")
-        accent_color = theme_data.get("accent_color", "#4a90e2")
-
+    def _register_themed_widgets(self):
+        """Регистрирует постоянные виджеты окна в движке тем (роль и шрифт)."""
+        register = self.theme_engine.register
         # Панели
-        self.sidebar_frame.configure(fg_color=card_bg)
-        self.main_frame.configure(fg_color=card_bg)
-        self.keyboard_frame.configure(fg_color=card_bg)
-        
+        for frame in (self.sidebar_frame, self.main_frame, self.keyboard_frame):
+            register(frame, "card")
+
         # Сайдбар
-        self.theme_label.configure(font=self.fonts["main_bold"], text_color=text_color)
-        self.theme_menu.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, button_color=button_bg, button_hover_color=button_hover, dropdown_font=self.fonts["main_font"])
-        self.speed_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.wpm_value_label.configure(font=self.fonts["main_bold"], text_color=text_color)
-        self.wpm_minus_button.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, hover_color=button_hover)
-        self.wpm_plus_button.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, hover_color=button_hover)
-
-        self.tone_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.tone_slider.configure(button_color=button_bg, progress_color=accent_color, button_hover_color=button_hover)
-        self.volume_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.volume_slider.configure(button_color=button_bg, progress_color=accent_color, button_hover_color=button_hover)
+        register(self.theme_label, "text", "main_bold")
+        register(self.theme_menu, "option_menu", "main_font")
+        register(self.speed_label, "text", "main_font")
+        register(self.wpm_value_label, "text", "main_bold")
+        register(self.wpm_minus_button, "button", "main_font")
+        register(self.wpm_plus_button, "button", "main_font")
+        register(self.tone_label, "text", "main_font")
+        register(self.tone_slider, "slider")
+        register(self.volume_label, "text", "main_font")
+        register(self.volume_slider, "slider")
 
         # Основная панель - управление
-        self.lesson_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.lesson_optionmenu.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, button_color=button_bg, button_hover_color=button_hover, dropdown_font=self.fonts["main_font"])
-        self.exercise_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.exercise_optionmenu.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, button_color=button_bg, button_hover_color=button_hover, dropdown_font=self.fonts["main_font"])
-        self.groups_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.groups_optionmenu.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, button_color=button_bg, button_hover_color=button_hover, dropdown_font=self.fonts["main_font"])
-        self.group_size_label.configure(font=self.fonts["main_font"], text_color=text_color)
-        self.group_size_optionmenu.configure(font=self.fonts["main_font"], text_color=text_color, fg_color=button_bg, button_color=button_bg, button_hover_color=button_hover, dropdown_font=self.fonts["main_font"])
-        
+        for label, menu in ((self.lesson_label, self.lesson_optionmenu),
+                            (self.exercise_label, self.exercise_optionmenu),
+                            (self.groups_label, self.groups_optionmenu),
+                            (self.group_size_label, self.group_size_optionmenu)):
+            register(label, "text", "main_font")
+            register(menu, "option_menu", "main_font")
+
         # Основная панель - подвал
-        self.start_button.configure(font=self.fonts["title_font"], fg_color=accent_color, text_color=text_color)
-        self.stop_button.configure(font=self.fonts["title_font"], text_color=text_color)
-        self.sound_type_switch.configure(font=self.fonts["main_font"], text_color=text_color, progress_color=accent_color)
+        register(self.start_button, "accent_button", "title_font")
+        register(self.stop_button, "text", "title_font")
+        register(self.sound_type_switch, "switch", "main_font")
+
+        # Подсказка об ошибке
+        register(self.error_overlay, "card")
+        register(self.error_overlay_label, "text", "title_font")
+
+    def _on_window_configure(self, event):
+        """
+        Изменение размера окна: фон перерисовывается один раз, когда
+        пользователь перестанет тянуть окно, а не на каждое событие.
+        """
+        if event.widget is not self or self.background_key is None:
+            return
+        if self.background_key[1] == (event.width, event.height):
+            return
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(self.RESIZE_DEBOUNCE_MS, self._on_resize_settled)
+
+    def _on_resize_settled(self):
+        self.resize_job = None
+        theme_data = self.themes.get(self.current_theme)
+        if theme_data:
+            self._update_background(theme_data)
 
-        # Перерисовываем текущий интерфейс упражнения
-        self._on_exercise_selected(self.exercise_optionmenu.get())
-    
     def _update_background(self, theme_data: dict):
         """Обновляет фон главного окна (изображение или сплошной цвет)."""
         bg_image_path = theme_data.get("background_image")
 
         if bg_image_path:
             try:
-
-                 # --- ИСПРАВЛЕНИЕ №1: Сначала получаем полный путь ---
                 full_path = resource_path(bg_image_path)
 
-                # --- ИСПРАВЛЕНИЕ №2: Открываем картинку с помощью Pillow ---
-                pillow_image = Image.open(full_path)
-
                 # Получаем актуальный размер окна. Если 0, используем геометрию по умолчанию.
                 win_width = self.winfo_width() or int(self.geometry().split('x')[0])
                 win_height = self.winfo_height() or int(self.geometry().split('x')[1].split('+')[0])
-
-                # --- ИСПРАВЛЕНИЕ №3: Передаем объект картинки, а не путь ---
-                bg_image = ctk.CTkImage(light_image=pillow_image, size=(win_width, win_height))
+                key = (full_path, (win_width, win_height))
+                if key == self.background_key and self.bg_label is not None:
+                    return
+
+                # Картинка уже нужного размера (в пикселях экрана): CTkImage задается
+                # в логических единицах, поэтому делим на масштаб окна
+                pillow_image = self.background_cache.get(full_path, (win_width, win_height))
+                scaling = ctk.ScalingTracker.get_window_scaling(self)
+                bg_image = ctk.CTkImage(light_image=pillow_image,
+                                        size=(win_width / scaling, win_height / scaling))
+                self.background_key = key
 
                 if self.bg_label is None:
                     self.bg_label = ctk.CTkLabel(self, text="", image=bg_image)
@@ -152,12 +304,14 @@ class MorseTrainerApp(ctk.CTk):
                 self.bg_label.lower() # Всегда держим фон сзади
             except Exception as e:
                 print(f"Ошибка загрузки фонового изображения '{bg_image_path}': {e}")
+                self.background_key = None
                 if self.bg_label:
                     self.bg_label.destroy()
                     self.bg_label = None
                 # В случае ошибки ставим сплошной цвет
-                self.configure(fg_color=theme_data.get("main_bg", "#2B2B2B"))
+                self.configure(fg_color=theme_data.get("main_bg") or "#2B2B2B")
         else:
+            self.background_key = None
             if self.bg_label:
                 self.bg_label.destroy()
                 self.bg_label = None
@@ -214,6 +368,8 @@ class MorseTrainerApp(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
         self._create_sidebar()
         self._create_main_panel()
+        self._create_error_overlay()
+        self._register_themed_widgets()
 
     def _create_sidebar(self):
         """Создает и наполняет левую панель (сайдбар) с настройками."""
@@ -383,12 +539,17 @@ class MorseTrainerApp(ctk.CTk):
     def _load_fonts(self):
         """
         Создает словарь с набором стандартных, надежных системных шрифтов.
+
+        Шрифты создаются один раз: словарь заполняется на месте, потому что
+        на него ссылаются движок тем и уже созданные виджеты.
         """
+        if self.fonts:
+            return
         print("Загрузка стандартного набора шрифтов...")
         try:
             # Используем лучшие системные шрифты, которые точно есть
             # Segoe UI для интерфейса, Consolas для моноширинного текста
-            self.fonts = {
+            self.fonts.update({
                 "main_font": CTkFont(family="Segoe UI", size=14),
                 "main_bold": CTkFont(family="Segoe UI", size=14, weight="bold"),
                 "title_font": CTkFont(family="Segoe UI", size=18, weight="bold"),
@@ -397,12 +558,12 @@ class MorseTrainerApp(ctk.CTk):
                 "mnemonic": CTkFont(family="Segoe UI", size=20, slant="italic"),
                 "keyboard_button": CTkFont(family="Consolas", size=16, weight="bold"),
                 "study_button": CTkFont(family="Consolas", size=24, weight="bold"),
-            }
+            })
             print("Шрифты 'Segoe UI' и 'Consolas' успешно загружены.")
         except Exception as e:
             print(f"Не удалось загрузить стандартные шрифты. Используется Arial. Ошибка: {e}")
             # Аварийный вариант, если даже стандартных шрифтов нет
-            self.fonts = {
+            self.fonts.update({
                 "main_font": CTkFont(family="Arial", size=14),
                 "main_bold": CTkFont(family="Arial", size=14, weight="bold"),
                 "title_font": CTkFont(family="Arial", size=18, weight="bold"),
@@ -411,7 +572,7 @@ class MorseTrainerApp(ctk.CTk):
                 "mnemonic": CTkFont(family="Arial", size=20, slant="italic"),
                 "keyboard_button": CTkFont(family="Arial", size=16, weight="bold"),
                 "study_button": CTkFont(family="Arial", size=24, weight="bold"),
-            }
+            })
     
     def _populate_lesson_menu(self):
         """
@@ -465,9 +626,8 @@ class MorseTrainerApp(ctk.CTk):
         if not exercises_info:
             print(f"Предупреждение: Для урока {lesson_id} не найдено упражнений.")
             self.exercise_optionmenu.configure(values=["-"], state="disabled")
-            # Очищаем рабочую область
-            for widget in self.keyboard_frame.winfo_children():
-                widget.destroy()
+            # Очищаем рабочую область (пулы кнопок только прячутся)
+            self._clear_workspace()
             return
             
         # --- Включаем меню, если оно было выключено ---
@@ -515,6 +675,7 @@ class MorseTrainerApp(ctk.CTk):
             exercise_type=exercise_type,
             custom_list=self.custom_char_list
         )
+        self.logic.set_char_pool(self.current_char_pool)
         
         print(f"Смена интерфейса на: Режим '{mode}', Упр. {exercise_id}")
         print(f"Пул символов ({len(self.current_char_pool)}): {self.current_char_pool[:10]}...")
@@ -572,6 +733,14 @@ class MorseTrainerApp(ctk.CTk):
             return
 
         print(f"СТАРТ для: Режим '{mode}', Тип '{exercise_type}'")
+        if exercise_type != "study":
+            lesson_id = None
+            if mode == "base":
+                try:
+                    lesson_id = int(self.lesson_optionmenu.get().split(':')[0])
+                except (ValueError, IndexError):
+                    pass
+            self.logic.start_session(mode, exercise_type, lesson_id)
 
         # --- БЛОК 2: Запускаем действие в зависимости от ТИПА упражнения ---
         # Эта логика теперь едина для ВСЕХ режимов.
@@ -594,23 +763,39 @@ class MorseTrainerApp(ctk.CTk):
                 self.output_textbox.delete("1.0", "end")
                 self.output_textbox.insert("1.0", "Прием...")
 
-            exercise_text = self.logic.generate_exercise_text(self.current_char_pool, num_groups, group_size)
-            self.logic.start_playback(
-                exercise_text, 
-                on_complete=lambda text: self.after(10, self._on_playback_complete, text)
-            )
+            exercise_text = ""
+            if self.logic.corpus is not None:
+                # Реальный текст: столько слов, сколько выбрано групп
+                exercise_text = self.logic.generate_corpus_text(self.current_char_pool, num_groups)
+                if not exercise_text:
+                    print("В файле нет текста из знаков урока, используются случайные группы.")
+            if not exercise_text:
+                exercise_text = self.logic.generate_exercise_text(self.current_char_pool, num_groups, group_size,
+                                                                  adaptive=True)
+            print(f"Зерно упражнения (для повтора): {self.logic.last_text_seed}")
+            self.reception_text = exercise_text
+            self.logic.start_playback(exercise_text, on_complete=self._on_playback_complete)
+
+        elif exercise_type == "sending":
+            # Текст для передачи - такие же группы, как при приеме
+            exercise_text = self.logic.generate_exercise_text(self.current_char_pool, num_groups, group_size,
+                                                              adaptive=True)
+            self._start_sending(exercise_text)
 
     def _on_playback_complete(self, text: str):
         """
         Обрабатывает завершение воспроизведения для упражнений на прием групп.
         
-        Вызывается безопасно из главного потока через `self.after`.
+        Вызывается в главном потоке из очереди завершений воспроизведения.
         Форматирует и выводит принятый текст в текстовое поле.
         
         Args:
             text (str): Текст, который был воспроизведен.
         """
         print(f"Воспроизведение завершено. Выводим текст: {text}")
+        if text == self.reception_text:
+            self.reception_text = None
+        self.logic.record_group_reception(text)
         
         # Безопасно проверяем, существует ли еще виджет текстового поля
         if not self.output_textbox or not self.output_textbox.winfo_exists():
@@ -652,13 +837,22 @@ class MorseTrainerApp(ctk.CTk):
             self._build_recognition_ui()
         elif exercise_type == "group_reception":
             self._build_group_reception_ui()
+        elif exercise_type == "sending":
+            self._build_sending_ui()
         else:
             print(f"Предупреждение: Неизвестный тип упражнения '{exercise_type}'. Интерфейс не будет построен.")
 
     def _clear_workspace(self):
         """Очищает рабочую область и сбрасывает все связанные атрибуты состояния."""
+        self._finish_sending()
+        # Кнопки знаков только прячутся: они понадобятся в следующем упражнении
+        pools = [pool for pool in (self.recognition_keyboard, self.study_button_bar) if pool]
+        pooled_frames = [pool.frame for pool in pools]
+        for pool in pools:
+            pool.hide()
         for widget in self.keyboard_frame.winfo_children():
-            widget.destroy()
+            if widget not in pooled_frames:
+                widget.destroy()
         
         self.output_textbox = None
         self.study_char_label = None
@@ -668,6 +862,12 @@ class MorseTrainerApp(ctk.CTk):
         self.keyboard_buttons = {}
         self.info_label = None
         self.rounds_left = 0
+        self.sending_target_label = None
+        self.sending_textbox = None
+        self.keyer_type_button = None
+        self.key_pad = None
+        self.corpus_button = None
+        self.reception_text = None
 
     def _build_study_ui(self):
         """Строит интерфейс для режима 'Изучение' (Упр. 1)."""
@@ -690,43 +890,32 @@ class MorseTrainerApp(ctk.CTk):
         self.study_mnemonic_label = ctk.CTkLabel(display_frame, text="", font=self.fonts.get("mnemonic"), fg_color="transparent")
         self.study_mnemonic_label.place(relx=0.5, rely=0.85, anchor="center")
 
-        # Создаем фрейм для кнопок
-        buttons_frame = ctk.CTkFrame(self.keyboard_frame, fg_color="transparent")
-        buttons_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-
-        # Создаем кнопки
-        for i, char in enumerate(self.current_char_pool):
-            buttons_frame.grid_columnconfigure(i, weight=1)
-            button = ctk.CTkButton(buttons_frame, text=char, font=self.fonts.get("study_button"),
-                                   command=lambda c=char: self._on_study_button_click(c))
-            button.grid(row=0, column=i, padx=5, pady=5, sticky="nsew")
-            button.bind("<Enter>", lambda event, c=char: self._on_study_button_enter(event, c))
-            button.bind("<Leave>", self._on_study_button_leave)
+        # Кнопки знаков: ряд создается один раз, дальше меняется только набор видимых
+        if self.study_button_bar is None:
+            self.study_button_bar = StudyButtonBar(self.keyboard_frame, self.fonts.get("study_button"),
+                                                   self._on_study_button_click,
+                                                   self._on_study_button_enter, self._on_study_button_leave)
+        self.study_button_bar.set_chars(self.current_char_pool)
+        self.study_button_bar.show(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
     def _build_recognition_ui(self):
         """Строит интерфейс для режима 'Распознавание' (Упр. 2 и 3)."""
         self.info_label = ctk.CTkLabel(self.keyboard_frame, text="Нажмите 'СТАРТ', чтобы начать", font=self.fonts.get("title_font"))
         self.info_label.pack(pady=10)
 
-        kb_frame = ctk.CTkFrame(self.keyboard_frame, fg_color="transparent")
-        kb_frame.pack(expand=True, fill="both", padx=5, pady=5)
-
         layout = self.logic.get_keyboard_layout() # <-- Получаем раскладку из логики
 
-        for row_idx, row_chars in enumerate(layout):
-            kb_frame.rowconfigure(row_idx, weight=1)
-            for col_idx, char in enumerate(row_chars):
-                kb_frame.columnconfigure(col_idx, weight=1)
-                
-                is_active = char in self.current_char_pool
-                button = ctk.CTkButton(kb_frame, text=char, font=self.fonts.get("keyboard_button"),
-                                       command=lambda c=char: self._on_recognition_button_click(c))
-                
-                if not is_active:
-                    button.configure(fg_color="gray20", text_color="gray50", hover=False)
-                
-                button.grid(row=row_idx, column=col_idx, padx=2, pady=2, sticky="nsew")
-                self.keyboard_buttons[char] = button
+        # Кнопки создаются один раз на раскладку; при смене упражнения меняется только их состояние
+        keyboard = self.recognition_keyboard
+        if keyboard is None or keyboard.layout is not layout:
+            if keyboard is not None:
+                keyboard.frame.destroy()
+            keyboard = RecognitionKeyboard(self.keyboard_frame, layout, self.fonts.get("keyboard_button"),
+                                           self._on_recognition_button_click)
+            self.recognition_keyboard = keyboard
+        keyboard.set_active(self.current_char_pool)
+        keyboard.show()
+        self.keyboard_buttons = keyboard.buttons
 
     def _build_group_reception_ui(self):
         """Строит интерфейс для режима 'Прием групп' (Упр. 4)."""
@@ -735,15 +924,199 @@ class MorseTrainerApp(ctk.CTk):
         self.output_textbox.pack(expand=True, fill="both", padx=5, pady=5)
         self.output_textbox.insert("1.0", "Готов к приему групп...\nНажмите 'СТАРТ'")
 
+        # Вместо случайных групп можно принимать реальный текст из файла
+        self.corpus_button = ctk.CTkButton(self.keyboard_frame, font=self.fonts.get("main_font"),
+                                           command=self._on_corpus_button_click)
+        self.corpus_button.pack(pady=5)
+        self._update_corpus_button()
+
+    def _update_corpus_button(self):
+        """Показывает на кнопке, откуда берется текст для приема."""
+        if not self.corpus_button:
+            return
+        if self.logic.corpus is None:
+            self.corpus_button.configure(text="Текст: случайные группы (выбрать файл...)")
+        else:
+            self.corpus_button.configure(text=f"Текст: {os.path.basename(self.logic.corpus.path)} (сбросить)")
+
+    def _on_corpus_button_click(self):
+        """Подключает файл с текстом для приема или отключает уже подключенный."""
+        if self.logic.corpus is not None:
+            self.logic.close_corpus()
+        else:
+            path = filedialog.askopenfilename(parent=self, title="Текст для приема (UTF-8)",
+                                              filetypes=[("Текст", "*.txt"), ("Все файлы", "*.*")])
+            if not path:
+                return
+            try:
+                self.logic.open_corpus(path)
+            except (OSError, ValueError) as e:
+                print(f"Не удалось открыть файл с текстом: {e}")
+        self._update_corpus_button()
+
+    def _build_sending_ui(self):
+        """Строит интерфейс для режима 'Передача ключом' (Упр. 5)."""
+        self.info_label = ctk.CTkLabel(self.keyboard_frame, text="Нажмите 'СТАРТ' и передайте текст ключом",
+                                       font=self.fonts.get("title_font"))
+        self.info_label.pack(pady=10)
+
+        self.keyer_type_button = ctk.CTkSegmentedButton(self.keyboard_frame,
+                                                        values=list(self.KEYER_TYPE_NAMES.values()),
+                                                        font=self.fonts.get("main_font"))
+        self.keyer_type_button.set(self.KEYER_TYPE_NAMES[KEYER_TYPES[0]])
+        self.keyer_type_button.pack(pady=5)
+
+        self.sending_target_label = ctk.CTkLabel(self.keyboard_frame, text="", font=self.fonts.get("keyboard_button"),
+                                                 wraplength=600)
+        self.sending_target_label.pack(pady=5)
+
+        self.sending_textbox = ctk.CTkTextbox(self.keyboard_frame, font=self.fonts.get("main_bold"),
+                                              corner_radius=10, wrap="word", height=120)
+        self.sending_textbox.pack(expand=True, fill="both", padx=5, pady=5)
+
+        # Площадка ключа для мыши: левая кнопка - ключ (или точка), правая - тире
+        self.key_pad = ctk.CTkLabel(self.keyboard_frame, corner_radius=10, fg_color="gray25", height=80,
+                                    text="Ключ: пробел или Ctrl / мышь\nМанипулятор: левый Ctrl - точка, правый Ctrl - тире",
+                                    font=self.fonts.get("main_font"))
+        self.key_pad.pack(fill="x", padx=5, pady=5)
+        for button, is_dah in (("1", False), ("3", True)):
+            self.key_pad.bind(f"<ButtonPress-{button}>", lambda event, d=is_dah: self._on_key_contact(d, True))
+            self.key_pad.bind(f"<ButtonRelease-{button}>", lambda event, d=is_dah: self._on_key_contact(d, False))
+
+    def _get_keyer_type(self):
+        """Тип ключа, выбранный в переключателе."""
+        selected = self.keyer_type_button.get() if self.keyer_type_button else None
+        for keyer_type, name in self.KEYER_TYPE_NAMES.items():
+            if name == selected:
+                return keyer_type
+        return KEYER_TYPES[0]
+
+    def _start_sending(self, text: str):
+        """Начинает упражнение на передачу: показывает текст и включает ключ."""
+        keyer_type = self._get_keyer_type()
+        self.logic.start_sending(text, keyer_type)
+        self.keyer_keys_down.clear()
+        if self.sending_target_label:
+            self.sending_target_label.configure(text=text)
+        if self.sending_textbox:
+            self.sending_textbox.delete("1.0", "end")
+        if self.info_label:
+            self.info_label.configure(text=f"Передавайте ({self.KEYER_TYPE_NAMES[keyer_type].lower()})...")
+
+    def _poll_sending(self):
+        """
+        Выводит распознанный с прошлого опроса текст; завершает упражнение, когда все передано.
+        Вызывается каждый кадр, пока идет передача (см. _on_frame).
+        """
+        session = self.logic.sending
+        if session is None:
+            return
+        text = session.poll(time.perf_counter_ns())
+        if text and self.sending_textbox:
+            self.sending_textbox.insert("end", text)
+        if session.is_complete():
+            self._finish_sending()
+
+    def _finish_sending(self):
+        """Завершает передачу (если она идет) и показывает оценку."""
+        session = self.logic.stop_sending()
+        if session is None:
+            return
+        for after_id, _, _ in self.pending_key_releases.values():
+            self.after_cancel(after_id)
+        self.pending_key_releases.clear()
+        self.keyer_keys_down.clear()
+        print(session.report())
+        result = session.get_result()
+        if self.info_label and self.info_label.winfo_exists():
+            self.info_label.configure(text=f"Совпадение: {result['accuracy'] * 100:.0f}%, "
+                                           f"скорость: {result['wpm']:.0f} WPM. Нажмите 'СТАРТ' для повтора.")
+
+    def _on_key_contact(self, is_dah: bool, pressed: bool, time_ns: int = None):
+        """Передает нажатие/отпускание ключа (или лепестка) в текущую сессию передачи."""
+        if time_ns is None:
+            time_ns = time.perf_counter_ns()
+        session = self.logic.sending
+        if session is None:
+            return
+        session.keyer.contact(is_dah, pressed, time_ns)
+        if self.key_pad:
+            self.key_pad.configure(fg_color=self.themes[self.current_theme]["accent_color"] if pressed else "gray25")
+
+    def _get_keyer_contact(self, keysym: str):
+        """Контакт ключа для клавиши: False/True (точка/тире) или None, если клавиша не ключ."""
+        if self._get_keyer_type() == "straight":
+            return False if keysym in self.STRAIGHT_KEY_KEYSYMS else None
+        if keysym in self.DIT_KEYSYMS:
+            return False
+        if keysym in self.DAH_KEYSYMS:
+            return True
+        return None
+
+    def _on_keyer_key_press(self, event, time_ns: int):
+        """
+        Нажатие клавиши ключа. Автоповтор отбрасывается: в Windows это
+        повторные нажатия, в X11 - пары "отпускание + нажатие" с одним
+        временем события (см. _on_key_release).
+
+        Returns:
+            bool: Обработано ли событие как ключ.
+        """
+        is_dah = self._get_keyer_contact(event.keysym)
+        if is_dah is None:
+            return False
+        pending = self.pending_key_releases.pop(event.keysym, None)
+        if pending:
+            after_id, release_time, release_ns = pending
+            self.after_cancel(after_id)
+            if release_time == event.time:
+                return True
+            # Настоящее отпускание, просто еще не примененное
+            self.keyer_keys_down.discard(event.keysym)
+            self._on_key_contact(is_dah, False, release_ns)
+        if event.keysym not in self.keyer_keys_down:
+            self.keyer_keys_down.add(event.keysym)
+            self._on_key_contact(is_dah, True, time_ns)
+        return True
+
+    def _on_key_release(self, event):
+        """
+        Отпускание клавиши ключа. Момент фиксируется сразу, а само отпускание
+        применяется, когда очередь событий Tk опустеет: если следом идет
+        нажатие автоповтора, оно его отменит.
+        """
+        release_ns = time.perf_counter_ns()
+        if self.logic.sending is None or event.keysym not in self.keyer_keys_down:
+            return
+        if event.keysym in self.pending_key_releases:
+            return
+        after_id = self.after_idle(self._release_keyer_key, event.keysym)
+        self.pending_key_releases[event.keysym] = (after_id, event.time, release_ns)
+
+    def _release_keyer_key(self, keysym: str):
+        """Применяет отложенное отпускание клавиши ключа."""
+        pending = self.pending_key_releases.pop(keysym, None)
+        if pending is None or keysym not in self.keyer_keys_down:
+            return
+        self.keyer_keys_down.discard(keysym)
+        is_dah = self._get_keyer_contact(keysym)
+        if is_dah is not None:
+            self._on_key_contact(is_dah, False, pending[2])
+
     def _on_stop_click(self):
         """Обрабатывает нажатие на кнопку СТОП."""
         print("Нажата кнопка СТОП.")
         self.logic.stop_playback()
+        self._finish_sending()
     
     def on_closing(self):
         print("Закрытие приложения...")
+        self.logic.stop_sending()
         self.logic.stop_playback()
+        self.logic.close_corpus()
         self.audio_player.stop()
+        if self.logic.session_store is not None:
+            self.logic.session_store.close()
         self.destroy()
 
     def _on_study_button_enter(self, event, char: str):
@@ -796,23 +1169,47 @@ class MorseTrainerApp(ctk.CTk):
             self.info_label.configure(text=f"Прием... Осталось: {self.rounds_left}")
         
         # --- Логика раунда ---
-        # Выбираем случайный символ из уже сохраненного пула
-        self.current_correct_char = random.choice(self.current_char_pool)
+        # Чаще выбираются знаки, в которых пользователь ошибается или медленно отвечает
+        self.current_correct_char = self.logic.choose_char()
         
         print(f"Новый раунд. Загадан знак: '{self.current_correct_char}'")
-        self.logic.start_playback(self.current_correct_char)
+        # В очередь: если предыдущий знак еще звучит, новый начнется сразу после него
+        self.round_playback = self.logic.enqueue_playback(self.current_correct_char)
+
+    def _get_reaction_ns(self, answer_ns: int):
+        """
+        Время от окончания звука (по часам устройства, с точностью до сэмпла)
+        до ответа в наносекундах.
+
+        Returns:
+            int: Задержка или None, если конец звука еще неизвестен (ответ дан
+                во время звука или пока знак ждет в очереди) - тогда время
+                реакции не учитывается, только правильность.
+        """
+        tone_end_ns = self.round_playback.tone_end_ns if self.round_playback else None
+        if tone_end_ns is None:
+            return None
+        return max(0, answer_ns - tone_end_ns)
     
-    def _on_recognition_button_click(self, char: str):
+    def _on_recognition_button_click(self, char: str, answer_ns: int = None):
         """
         Обрабатывает нажатие на кнопку в режиме распознавания.
         Эта функция теперь быстрая, чистая и занимается только своим делом.
+
+        Args:
+            char (str): Выбранный знак.
+            answer_ns (int): Момент ответа (time.perf_counter_ns); по умолчанию - сейчас.
         """
+        if answer_ns is None:
+            answer_ns = time.perf_counter_ns()
         # 1. Проверяем, активна ли кнопка (не делаем лишних вычислений)
         if char not in self.current_char_pool:
             print(f"Нажата неактивная кнопка: {char}")
             return
         
-        # 2. Проверяем, идет ли сейчас раунд
+        # 2. Проверяем, идет ли сейчас раунд (и не показывается ли подсказка об ошибке)
+        if self._is_error_overlay_shown():
+            return
         if not self.current_correct_char:
             print("Нет активного знака для угадывания. Нажмите СТАРТ.")
             return
@@ -823,8 +1220,12 @@ class MorseTrainerApp(ctk.CTk):
 
         original_color = button.cget("fg_color")
 
-        # 4. Сравниваем ответ и даем обратную связь
-        if char == self.current_correct_char:
+        # 4. Учитываем ответ в адаптивном выборе знаков
+        is_correct = char == self.current_correct_char
+        self.logic.record_answer(self.current_correct_char, is_correct, self._get_reaction_ns(answer_ns), answer=char)
+
+        # 5. Сравниваем ответ и даем обратную связь
+        if is_correct:
             # --- ВЕТКА ПРАВИЛЬНОГО ОТВЕТА ---
             print(f"Правильно! Это была '{char}'")
             self.rounds_left -= 1
@@ -837,6 +1238,7 @@ class MorseTrainerApp(ctk.CTk):
                 self.after(300, self._start_recognition_round)
             else:
                 print("Упражнение завершено!")
+                print(self.logic.reaction_stats.report())
                 self.current_correct_char = None
                 if self.info_label:
                     self.info_label.configure(text="Упражнение завершено! Нажмите 'СТАРТ' для начала.")
@@ -846,46 +1248,37 @@ class MorseTrainerApp(ctk.CTk):
             self.show_error_and_replay(self.current_correct_char, start_new_round=True)
     
     def show_error_and_replay(self, correct_char: str, start_new_round: bool = False):
-        """Показывает модальное окно с правильным ответом и проигрывает его 3 раза."""
-        # --- Размеры для нового окна ---
-        window_width = 300
-        window_height = 150
-
-        # --- Создаем окно, но пока не показываем его ---
-        error_window = ctk.CTkToplevel(self)
-        error_window.title("Ошибка")
-        error_window.transient(self)
-        error_window.grab_set()
-        error_window.resizable(False, False)
-
-        # --- РАСЧЕТ КООРДИНАТ ДЛЯ ЦЕНТРИРОВАНИЯ ---
-        # 1. Получаем размеры и положение главного окна
-        main_window_x = self.winfo_x()
-        main_window_y = self.winfo_y()
-        main_window_width = self.winfo_width()
-        main_window_height = self.winfo_height()
-
-        # 2. Вычисляем координаты для нового окна по формуле
-        pos_x = main_window_x + (main_window_width // 2) - (window_width // 2)
-        pos_y = main_window_y + (main_window_height // 2) - (window_height // 2)
-
-        # 3. Устанавливаем геометрию окна с вычисленными координатами
-        error_window.geometry(f"{window_width}x{window_height}+{pos_x}+{pos_y}")
-        # -----------------------------------------------
-
-        label = ctk.CTkLabel(error_window, text=f"Ошибка!\nПравильный знак: {correct_char}", font=self.fonts.get("title_font"))
-        label.pack(expand=True, pady=20)
-
-        def replay_and_close(count=3):
-            if count > 0:
-                self.logic.start_playback(correct_char, on_complete=lambda text: error_window.after(300, replay_and_close, count - 1))
-            else:
-                error_window.grab_release()
-                error_window.destroy()
-                if start_new_round and self.rounds_left > 0:
-                    self.after(100, self._start_recognition_round)
+        """
+        Показывает поверх окна правильный ответ и проигрывает его 3 раза.
 
-        replay_and_close()
+        Повторы - одна дорожка в очереди воспроизведения, а следующий раунд
+        ставится в очередь сразу за ней, поэтому начинается ровно после
+        повтора. Пока подсказка видна, ответы не принимаются.
+        """
+        self._show_error_overlay(f"Ошибка!\nПравильный знак: {correct_char}")
+        self.logic.start_playback(correct_char, on_complete=lambda text: self._hide_error_overlay(),
+                                  pause_after=self.ERROR_REPLAY_PAUSE, repeats=self.ERROR_REPLAY_COUNT,
+                                  repeat_pause=self.ERROR_REPLAY_PAUSE)
+        if start_new_round and self.rounds_left > 0:
+            self._start_recognition_round()
+
+    def _create_error_overlay(self):
+        """Создает (один раз) скрытую подсказку об ошибке поверх главного окна."""
+        self.error_overlay = ctk.CTkFrame(self, corner_radius=15, border_width=2, width=300, height=150)
+        self.error_overlay.pack_propagate(False)
+        self.error_overlay_label = ctk.CTkLabel(self.error_overlay, text="")
+        self.error_overlay_label.pack(expand=True, padx=20, pady=20)
+
+    def _show_error_overlay(self, text: str):
+        self.error_overlay_label.configure(text=text)
+        self.error_overlay.place(relx=0.5, rely=0.5, anchor="center")
+        self.error_overlay.lift()
+
+    def _hide_error_overlay(self):
+        self.error_overlay.place_forget()
+
+    def _is_error_overlay_shown(self):
+        return self.error_overlay is not None and self.error_overlay.winfo_manager() == "place"
 
     def _increase_wpm(self):
         """+ скорость на 1."""
@@ -913,6 +1306,13 @@ class MorseTrainerApp(ctk.CTk):
         Args:
             event: Объект события tkinter, содержит информацию о нажатой клавише.
         """
+        # Момент ответа фиксируем сразу, до любых других вычислений
+        answer_ns = time.perf_counter_ns()
+
+        # Во время передачи клавиши ключа работают как ключ
+        if self.logic.sending is not None and self._on_keyer_key_press(event, answer_ns):
+            return
+
         # --- Проверяем, находимся ли мы в режиме распознавания ---
         # Сначала получаем текущий тип упражнения
         try:
@@ -938,7 +1338,7 @@ class MorseTrainerApp(ctk.CTk):
         if char_pressed in self.keyboard_buttons:
             print(f"Клавиша нажата: '{char_pressed}'")
             # Вызываем тот же самый метод, который используется при клике мышью!
-            self._on_recognition_button_click(char_pressed)
+            self._on_recognition_button_click(char_pressed, answer_ns)
 
     def _on_training_mode_changed(self):
         """Обрабатывает смену режима тренировки."""
@@ -997,6 +1397,7 @@ class MorseTrainerApp(ctk.CTk):
             mode=mode, lesson_id=lesson_id, exercise_type=exercise_type,
             custom_list=self.custom_char_list
         )
+        self.logic.set_char_pool(self.current_char_pool)
         
         self._reconfigure_ui_for_exercise(exercise_type)
 
@@ -0,0 +1,282 @@
+import time
+import numpy as np
+import pyaudio
+from .audio_sinks import AudioSink
+
+# Запас задержки самоконтроля сверх одного блока (нс) на неравномерность вызова колбэка
+SIDETONE_MARGIN_NS = 2_000_000
+
+class RingBuffer:
+    """
+    Кольцевой буфер float32 для одного писателя и одного читателя (SPSC).
+
+    Работает без блокировок: позицию записи меняет только писатель,
+    позицию чтения - только читатель (колбэк PyAudio). Позиции растут
+    монотонно, индекс в массиве берется по модулю емкости.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self._write_pos = 0
+        self._read_pos = 0
+
+    def available(self):
+        """Сколько сэмплов готово к чтению."""
+        return self._write_pos - self._read_pos
+
+    def free_space(self):
+        """Сколько сэмплов можно записать без перезаписи непрочитанных."""
+        return self.capacity - (self._write_pos - self._read_pos)
+
+    def write(self, data):
+        """
+        Записывает столько сэмплов из data, сколько помещается.
+
+        Returns:
+            int: Количество записанных сэмплов (может быть меньше len(data)).
+        """
+        count = min(len(data), self.free_space())
+        if count <= 0:
+            return 0
+        start = self._write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = data[:first]
+        if count > first:
+            self._buffer[:count - first] = data[first:count]
+        self._write_pos += count
+        return count
+
+    def write_silence(self, count: int):
+        """Записывает до count нулевых сэмплов. Возвращает записанное количество."""
+        count = min(count, self.free_space())
+        if count <= 0:
+            return 0
+        start = self._write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = 0.0
+        if count > first:
+            self._buffer[:count - first] = 0.0
+        self._write_pos += count
+        return count
+
+    def read_into(self, out):
+        """
+        Читает до len(out) сэмплов в заранее выделенный массив out.
+
+        Returns:
+            int: Количество прочитанных сэмплов.
+        """
+        count = min(len(out), self.available())
+        if count <= 0:
+            return 0
+        start = self._read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        if count > first:
+            out[first:count] = self._buffer[:count - first]
+        self._read_pos += count
+        return count
+
+    def write_position(self):
+        """Монотонная позиция записи (сколько сэмплов записано всего)."""
+        return self._write_pos
+
+    def read_position(self):
+        """Монотонная позиция чтения (сколько сэмплов прочитано или отброшено)."""
+        return self._read_pos
+
+    def discard_until(self, position: int):
+        """
+        Отбрасывает непрочитанные данные до позиции position.
+        Вызывается только читателем.
+        """
+        if position > self._read_pos:
+            self._read_pos = min(position, self._write_pos)
+
+
+class CallbackAudioOutput(AudioSink):
+    """
+    Приемник звука PyAudio с неблокирующим выводом через колбэк.
+
+    Производитель (поток воспроизведения) заполняет кольцевой буфер,
+    колбэк PyAudio забирает из него по одному блоку. Остановка, пауза
+    и сброс выполняются колбэком, поэтому срабатывают в пределах одного блока.
+    Тон самоконтроля ключа (set_sidetone) синтезируется в самом колбэке,
+    мимо кольцевого буфера, поэтому его задержка - около одного блока
+    (256 сэмплов - 6 мс при 44.1 кГц).
+    """
+    def __init__(self, sample_rate=44100, block_frames=256, buffer_seconds=1.0):
+        super().__init__(sample_rate)
+        self.block_frames = block_frames
+        self.ring = RingBuffer(int(sample_rate * buffer_seconds))
+        self._block = np.zeros(block_frames, dtype=np.float32)
+
+        self.paused = False
+        # Позиция записи, до которой колбэк должен отбросить данные при сбросе
+        self._flush_until = 0
+        self._producing = False # Идет ли сейчас запись дорожки (для подсчета опустошений)
+
+        # --- Счетчики для мониторинга ---
+        self.underruns = 0 # Колбэку не хватило данных во время воспроизведения
+        self.overruns = 0  # Производителю пришлось ждать из-за заполненного буфера
+        self.frames_played = 0
+        # Привязка позиции к часам: (позиция чтения, perf_counter_ns выхода на ЦАП)
+        self._clock_anchor = None
+        self._sidetone = None # Самоконтроль ключа (synth.Sidetone) или None
+
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(format=pyaudio.paFloat32,
+                                  channels=1,
+                                  rate=self.sample_rate,
+                                  output=True,
+                                  frames_per_buffer=self.block_frames,
+                                  stream_callback=self._callback)
+        self.stream.start_stream()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """Колбэк PyAudio: отдает один блок из кольцевого буфера."""
+        if len(self._block) < frame_count:
+            self._block = np.zeros(frame_count, dtype=np.float32)
+        block = self._block[:frame_count]
+
+        self.ring.discard_until(self._flush_until)
+
+        if self.paused:
+            block[:] = 0.0
+        else:
+            read_position = self.ring.read_position()
+            count = self.ring.read_into(block)
+            if count > 0:
+                self._clock_anchor = (read_position, self._dac_time_ns(time_info))
+            if count < frame_count:
+                block[count:] = 0.0
+                if self._producing:
+                    self.underruns += 1
+            self.frames_played += count
+
+        sidetone = self._sidetone
+        if sidetone is not None:
+            sidetone.mix(block, time.perf_counter_ns())
+        return (block.tobytes(), pyaudio.paContinue)
+
+    def _dac_time_ns(self, time_info):
+        """Момент (perf_counter_ns), когда первый сэмпл блока дойдет до ЦАП."""
+        now = time.perf_counter_ns()
+        try:
+            latency = time_info['output_buffer_dac_time'] - time_info['current_time']
+        except (TypeError, KeyError):
+            latency = 0.0
+        if latency <= 0:
+            latency = self.stream.get_output_latency() if hasattr(self, 'stream') else 0.0
+        return now + int(latency * 1_000_000_000)
+
+    def frame_time_ns(self, position: int):
+        """Оценивает момент звучания сэмпла по последнему прочитанному колбэком блоку."""
+        anchor = self._clock_anchor
+        if anchor is None:
+            return None
+        anchor_position, anchor_ns = anchor
+        return anchor_ns + (position - anchor_position) * 1_000_000_000 // self.sample_rate
+
+    def play_position(self):
+        """
+        Сколько сэмплов уже дошло до ЦАП: по привязке последнего блока к часам,
+        но не дальше позиции чтения колбэка.
+        """
+        anchor = self._clock_anchor
+        read_position = self.ring.read_position()
+        if anchor is None:
+            return read_position
+        anchor_position, anchor_ns = anchor
+        position = anchor_position + (time.perf_counter_ns() - anchor_ns) * self.sample_rate // 1_000_000_000
+        return max(0, min(position, read_position))
+
+    def set_sidetone(self, sidetone):
+        if sidetone is not None:
+            sidetone.delay_ns = self.block_frames * 1_000_000_000 // self.sample_rate + SIDETONE_MARGIN_NS
+        self._sidetone = sidetone
+        return True
+
+    def _block_duration(self):
+        return self.block_frames / self.sample_rate
+
+    def begin(self):
+        """Отмечает начало записи дорожки производителем."""
+        self._producing = True
+
+    def end(self):
+        """Отмечает конец записи дорожки производителем."""
+        self._producing = False
+
+    def write(self, samples, should_continue=None):
+        """
+        Записывает сэмплы в кольцевой буфер, ожидая свободного места.
+
+        Returns:
+            int: Количество записанных сэмплов (меньше len(samples) при прерывании).
+        """
+        written = 0
+        total = len(samples)
+        while written < total:
+            if should_continue is not None and not should_continue():
+                break
+            count = self.ring.write(samples[written:])
+            self._mark_written(count)
+            written += count
+            if written < total:
+                if count == 0:
+                    self.overruns += 1
+                time.sleep(self._block_duration())
+        return written
+
+    def write_silence(self, count: int, should_continue=None):
+        """Записывает count нулевых сэмплов, ожидая свободного места."""
+        written = 0
+        while written < count:
+            if should_continue is not None and not should_continue():
+                break
+            step = self.ring.write_silence(count - written)
+            self._mark_written(step)
+            written += step
+            if written < count:
+                if step == 0:
+                    self.overruns += 1
+                time.sleep(self._block_duration())
+        return written
+
+    def drain(self, should_continue=None):
+        """Ждет, пока колбэк не проиграет все данные из буфера."""
+        while self.ring.available() > 0 and self._flush_until < self.ring.write_position():
+            if should_continue is not None and not should_continue():
+                return False
+            time.sleep(self._block_duration())
+        return True
+
+    def flush(self):
+        """
+        Сбрасывает все еще не проигранные данные (в пределах одного блока).
+        Данные, записанные после вызова, не затрагиваются.
+        """
+        self._flush_until = self.ring.write_position()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def get_stats(self):
+        """Возвращает счетчики для мониторинга."""
+        return {
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "frames_written": self.frames_written,
+            "frames_played": self.frames_played,
+            "buffered": self.ring.available(),
+        }
+
+    def close(self):
+        """Останавливает и закрывает аудиопоток."""
+        self.stream.stop_stream()
+        self.stream.close()
+        self.p.terminate()
@@ -1,111 +1,339 @@
-import pyaudio
+import threading
 import numpy as np
-import time
-from scipy import signal
+from collections import OrderedDict
+from .audio_sinks import AudioSink, create_sink
+from .synth import Oscillator, EnvelopeShaper, Sidetone
+from .startup_profile import profiler
 
 class AudioPlayer:
-    """Генерирует и воспроизводит звуки Морзе."""
-    def __init__(self, wpm=20, tone=700, sample_rate=44100):
+    """
+    Генерирует и воспроизводит звуки Морзе.
+
+    Звук пишется в приемник (AudioSink): реальное устройство PyAudio,
+    "пустой" приемник или WAV-файл. Приемник передается в конструктор
+    объектом или строкой (см. audio_sinks.create_sink), а по умолчанию
+    выбирается переменной окружения MORSE_AUDIO_SINK.
+    """
+    # Максимальное число готовых огибающих в кэше (LRU)
+    WAVE_CACHE_SIZE = 32
+    # Размер блока (в сэмплах) при потоковой записи готового буфера
+    CHUNK_FRAMES = 4096
+
+    def __init__(self, wpm=20, tone=700, sample_rate=44100, sink=None):
         self.sample_rate = sample_rate
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(format=pyaudio.paFloat32,
-                                  channels=1,
-                                  rate=self.sample_rate,
-                                  output=True)
+        # Кэш огибающих элементов: ключ -> массив float32 (только чтение)
+        self._wave_cache = OrderedDict()
+        # Огибающие элементов (по длине в точках) для текущих настроек (сбрасываются сеттерами)
+        self._current_elements = {}
+        # Единый движок синтеза: генератор тона с непрерывной фазой и фронты
+        self.oscillator = Oscillator(self.sample_rate)
+        self.envelope_shaper = EnvelopeShaper(self.sample_rate)
+        self._element_buffer = np.empty(0, dtype=np.float32)
+        # Позиция записи приемника, с которой началась последняя дорожка play_samples
+        self.track_start_position = 0
+        # Приемник звука (по умолчанию - неблокирующий вывод через PyAudio)
+        if isinstance(sink, AudioSink):
+            self.sink = sink
+        else:
+            self.sink = create_sink(sink, self.sample_rate)
         self.volume = 0.3 # Громкость по умолчанию 30%
         
         self.sound_type = "analog"
 
+        self.attack_decay_ms = 5 # "Фронт" в мс для мягкости звука
         self.set_wpm(wpm)
         self.set_tone(tone)
-        self.attack_decay_ms = 5 # "Фронт" в мс для мягкости звука
+
+    def set_sink(self, sink: AudioSink):
+        """Подменяет приемник звука. Возвращает предыдущий приемник."""
+        previous = self.sink
+        self.sink = sink
+        return previous
 
     def set_wpm(self, wpm: int):
         """Устанавливает скорость и пересчитывает длительности."""
         # Стандарт PARIS: слово "PARIS" содержит 50 "точек"
+        self.wpm = wpm
         self.dot_duration = 1.2 / wpm
         self.dash_duration = 3 * self.dot_duration
         self.inter_element_pause = self.dot_duration
         self.inter_char_pause = 3 * self.dot_duration
         self.inter_word_pause = 7 * self.dot_duration
+        self._invalidate_elements()
         print(f"Скорость установлена на {wpm} WPM. Длительность точки: {self.dot_duration:.2f} сек.")
 
     def set_tone(self, tone: int):
         """Устанавливает тон (частоту) звука."""
         self.tone = tone
+        self._invalidate_elements()
         print(f"Тон установлен на {self.tone} Гц.")
 
     def set_volume(self, volume_percent: int):
         """Устанавливает громкость от 0 до 100."""
         # Преобразуем проценты в коэффициент от 0.0 до 1.0
         self.volume = max(0.0, min(1.0, volume_percent / 100.0))
+        self._invalidate_elements()
         print(f"Громкость установлена на {volume_percent}%")
 
     def set_sound_type(self, sound_type: str):
         """Устанавливает тип звука: 'analog' или 'discrete'."""
         if sound_type in ["analog", "discrete"]:
             self.sound_type = sound_type
+            self._invalidate_elements()
             print(f"Тип звука установлен на: {self.sound_type}")
         else:
             print(f"Ошибка: неизвестный тип звука '{sound_type}'")
 
-    def _generate_wave(self, duration: float):
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
-        wave = np.sin(self.tone * t * 2 * np.pi)
-
-        # --- ИЗМЕНЕНИЕ: Применяем громкость ---
-        wave *= self.volume
-        # ------------------------------------
-
-        # Применяем огибающую (envelope)
-        attack_decay_samples = int(self.sample_rate * (self.attack_decay_ms / 1000.0))
-        if len(wave) > 2 * attack_decay_samples:
-            attack = np.linspace(0, 1, attack_decay_samples)
-            decay = np.linspace(1, 0, attack_decay_samples)
-            wave[:attack_decay_samples] *= attack
-            wave[-attack_decay_samples:] *= decay
-        
-        return wave.astype(np.float32)
+    def _generate_envelope(self, duration: float):
+        """Генерирует огибающую элемента: громкость и, для 'analog', плавные фронты."""
+        return self.envelope_shaper.build(int(self.sample_rate * duration),
+                                          self.volume, self.attack_decay_ms,
+                                          smooth=(self.sound_type == "analog"))
 
     def _generate_wave(self, duration: float):
-        """Генерирует волну синусоиды с плавной атакой/затуханием."""
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
-        
-        if self.sound_type == "discrete":
-            # Генерируем прямоугольную волну (меандр)
-            wave = signal.square(2 * np.pi * self.tone * t)
-        else: # По умолчанию 'analog'
-            # Генерируем синусоиду
-            wave = np.sin(self.tone * t * 2 * np.pi)
-        
-        wave *= self.volume
-
-        # Применяем огибающую (envelope) для сглаживания "щелчков"
-        if self.sound_type == "analog":
-            attack_decay_samples = int(self.sample_rate * (self.attack_decay_ms / 1000.0))
-            if len(wave) > 2 * attack_decay_samples:
-                attack = np.linspace(0, 1, attack_decay_samples)
-                decay = np.linspace(1, 0, attack_decay_samples)
-                wave[:attack_decay_samples] *= attack
-                wave[-attack_decay_samples:] *= decay
-        
-        return wave.astype(np.float32)
+        """Генерирует готовую волну элемента (огибающая * тон с непрерывной фазой)."""
+        return self.modulate(self._generate_envelope(duration))
+
+    def modulate(self, samples):
+        """
+        Накладывает тон на огибающую samples (на месте) с непрерывной фазой.
+
+        Args:
+            samples (np.ndarray): Огибающая/манипуляция float32 (нули - пауза).
+
+        Returns:
+            np.ndarray: Тот же массив samples, уже со звуком.
+        """
+        return self.oscillator.modulate(samples, self.tone, self.sound_type)
+
+    def _invalidate_elements(self):
+        """Сбрасывает огибающие точки/тире после изменения настроек звука."""
+        self._current_elements = {}
+
+    def _cache_key(self, units: int):
+        """Ключ кэша: все параметры, от которых зависит огибающая элемента."""
+        # Тон в ключ не входит: он накладывается генератором при воспроизведении
+        return (units, self.wpm, self.volume, self.sound_type,
+                self.sample_rate, self.attack_decay_ms)
+
+    def get_element_envelope(self, kind: str):
+        """
+        Возвращает огибающую элемента ('dot' или 'dash') как массив float32 (только чтение).
+        """
+        return self.get_mark_envelope(1 if kind == "dot" else 3)
+
+    def get_mark_envelope(self, units: int):
+        """
+        Возвращает огибающую звучащего элемента длиной units точек (только чтение).
+
+        Длина огибающей - ровно units * get_unit_samples() сэмплов, поэтому
+        дорожка, собранная из длительностей в точках, точна до сэмпла.
+        Сначала ищет в огибающих текущих настроек, затем в LRU-кэше,
+        и только при промахе строит огибающую заново.
+        """
+        envelope = self._current_elements.get(units)
+        if envelope is not None:
+            return envelope
+
+        key = self._cache_key(units)
+        envelope = self._wave_cache.get(key)
+        if envelope is not None:
+            self._wave_cache.move_to_end(key)
+        else:
+            envelope = self.envelope_shaper.build(units * self.get_unit_samples(),
+                                                  self.volume, self.attack_decay_ms,
+                                                  smooth=(self.sound_type == "analog"))
+            envelope.setflags(write=False) # Буфер разделяется между вызовами
+            self._wave_cache[key] = envelope
+            if len(self._wave_cache) > self.WAVE_CACHE_SIZE:
+                self._wave_cache.popitem(last=False)
+
+        self._current_elements[units] = envelope
+        return envelope
+
+    def render_runs(self, runs):
+        """
+        Рендерит дорожку из длительностей "звук/пауза" (см. morse_table.EncodedText).
+
+        Args:
+            runs (np.ndarray): Длительности в точках; четные элементы - звук,
+                нечетные - пауза.
+
+        Returns:
+            np.ndarray: Дорожка float32 длиной sum(runs) * get_unit_samples().
+        """
+        unit = self.get_unit_samples()
+        run_starts = np.zeros(len(runs) + 1, dtype=np.int64)
+        np.cumsum(runs, out=run_starts[1:])
+        samples = np.zeros(int(run_starts[-1]) * unit, dtype=np.float32)
+        # Тишина - это просто нули; заполняем только звучащие элементы
+        for units, start in zip(runs[0::2].tolist(), (run_starts[0:-1:2] * unit).tolist()):
+            envelope = self.get_mark_envelope(units)
+            samples[start:start + len(envelope)] = envelope
+        # Тон накладывается одной непрерывной волной
+        return self.modulate(samples)
+
+    def get_unit_samples(self):
+        """Длительность одной точки (единицы PARIS) в сэмплах."""
+        return int(self.sample_rate * self.dot_duration)
+
+    def clear_wave_cache(self):
+        """Полностью очищает кэш огибающих элементов."""
+        self._wave_cache.clear()
+        self._invalidate_elements()
+
+    def _play_element(self, kind: str):
+        envelope = self.get_element_envelope(kind)
+        if len(self._element_buffer) < len(envelope):
+            self._element_buffer = np.empty(len(envelope), dtype=np.float32)
+        wave = self._element_buffer[:len(envelope)]
+        wave[:] = envelope
+        self.sink.write(self.modulate(wave))
+        self.sink.write_silence(self.get_unit_samples())
 
     def play_dot(self):
-        wave = self._generate_wave(self.dot_duration)
-        self.stream.write(wave.tobytes())
-        time.sleep(self.inter_element_pause)
+        self._play_element("dot")
 
     def play_dash(self):
-        wave = self._generate_wave(self.dash_duration)
-        self.stream.write(wave.tobytes())
-        time.sleep(self.inter_element_pause)
+        self._play_element("dash")
 
     def play_char_pause(self):
-        time.sleep(self.inter_char_pause - self.inter_element_pause)
+        self.sink.write_silence(2 * self.get_unit_samples())
+
+    def play_samples(self, samples, should_continue=None, on_progress=None):
+        """
+        Потоково передает готовый буфер float32 в кольцевой буфер вывода.
+
+        Возвращает управление, когда дорожка полностью проиграна или
+        should_continue вернул False (тогда остаток сбрасывается сразу).
+
+        Args:
+            samples (np.ndarray): Непрерывная звуковая дорожка (float32).
+            should_continue (callable): Проверяется между блоками записи
+                и во время ожидания; если вернет False, вывод прерывается.
+            on_progress (callable): Вызывается с числом уже ПРОИГРАННЫХ
+                устройством сэмплов дорожки (см. AudioSink.play_position),
+                а не записанных: запись опережает звук на объем буфера вывода.
+                Вызывается и во время записи, и пока дорожка доигрывается.
+
+        Returns:
+            int: Количество записанных в буфер сэмплов.
+        """
+        written = 0
+        total = len(samples)
+        start = self.track_start_position = self.sink.write_position()
+
+        def report_progress():
+            played = min(max(self.sink.play_position() - start, 0), written)
+            on_progress(played)
+
+        def keep_going():
+            # Ожидания приемника проверяют should_continue каждый блок - заодно сообщаем прогресс
+            if on_progress:
+                report_progress()
+            return should_continue is None or should_continue()
+
+        self.sink.begin()
+        try:
+            while written < total:
+                block = samples[written:written + self.CHUNK_FRAMES]
+                count = self.sink.write(block, keep_going)
+                written += count
+                if count < len(block):
+                    break
+        finally:
+            self.sink.end()
+
+        if written < total or not self.sink.drain(keep_going):
+            self.sink.flush()
+        elif on_progress:
+            on_progress(written)
+        return written
+
+    def start_sidetone(self, keyer):
+        """
+        Включает тон самоконтроля для ключа (с текущими тоном, громкостью и типом звука).
+
+        Returns:
+            Sidetone: Подключенный самоконтроль или None, если приемник
+                его не поддерживает (тогда передача идет без звука).
+        """
+        sidetone = Sidetone(keyer, self.sample_rate, self.tone, self.volume,
+                            self.sound_type, self.attack_decay_ms)
+        if not self.sink.set_sidetone(sidetone):
+            print("Приемник звука не поддерживает самоконтроль: передача без звука.")
+            return None
+        return sidetone
+
+    def stop_sidetone(self):
+        """Отключает тон самоконтроля."""
+        self.sink.set_sidetone(None)
+
+    def get_track_time_ns(self, offset: int):
+        """
+        Оценивает момент (time.perf_counter_ns), когда прозвучит сэмпл offset
+        последней дорожки play_samples. Точность - до сэмпла относительно
+        часов устройства; None, если приемник не сообщает время вывода.
+        """
+        return self.sink.frame_time_ns(self.track_start_position + offset)
+
+    def flush(self):
+        """Мгновенно (в пределах одного блока) сбрасывает все, что еще не проиграно."""
+        self.sink.flush()
+
+    def pause(self):
+        """Приостанавливает вывод звука (в пределах одного блока)."""
+        self.sink.pause()
+
+    def resume(self):
+        """Возобновляет вывод звука после паузы."""
+        self.sink.resume()
+
+    def get_output_stats(self):
+        """Возвращает счетчики опустошений/переполнений буфера вывода."""
+        return self.sink.get_stats()
 
     def stop(self):
         """Останавливает аудиопоток."""
-        self.stream.stop_stream()
-        self.stream.close()
-        self.p.terminate()
\ No newline at end of file
+        self.sink.close()
+
+
+class LazyAudioPlayer:
+    """
+    Заместитель AudioPlayer, который создает настоящий плеер при первом обращении.
+
+    Позволяет не открывать аудиоустройство (и не импортировать PyAudio)
+    до первого воспроизведения или изменения настроек звука.
+    """
+    def __init__(self, **player_kwargs):
+        self._player_kwargs = player_kwargs
+        self._player = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_created(self):
+        return self._player is not None
+
+    def get_player(self):
+        """Возвращает настоящий AudioPlayer, создавая его при необходимости."""
+        if self._player is None:
+            with self._lock:
+                if self._player is None:
+                    with profiler.phase("Открытие аудиоустройства"):
+                        self._player = AudioPlayer(**self._player_kwargs)
+                    if profiler.enabled:
+                        print(f"Аудиоустройство открыто: {profiler.records[-1][2] * 1000:.1f} мс")
+        return self._player
+
+    def flush(self):
+        # Сбрасывать нечего, если плеер так и не был создан
+        if self._player is not None:
+            self._player.flush()
+
+    def stop(self):
+        # Закрывать нечего, если плеер так и не был создан
+        if self._player is not None:
+            self._player.stop()
+
+    def __getattr__(self, name):
+        return getattr(self.get_player(), name)
@@ -0,0 +1,226 @@
+import os
+import time
+import wave
+import numpy as np
+
+# Переменная окружения для выбора бэкенда: "pyaudio", "null", "null:realtime", "wav:путь.wav"
+SINK_ENV_VAR = "MORSE_AUDIO_SINK"
+DEFAULT_WAV_PATH = "morse_output.wav"
+
+
+class AudioSink:
+    """
+    Интерфейс приемника звука, в который AudioPlayer пишет дорожку float32.
+
+    Бэкенды реализуют write/write_silence; остальные методы по умолчанию
+    ничего не делают, чтобы простым приемникам не нужно было их повторять.
+    """
+    def __init__(self, sample_rate=44100):
+        self.sample_rate = sample_rate
+        self.frames_written = 0
+        self.first_write_time = None # time.perf_counter() первой записи (для замеров)
+
+    def _mark_written(self, count: int):
+        if count > 0 and self.first_write_time is None:
+            self.first_write_time = time.perf_counter()
+        self.frames_written += count
+
+    def write_position(self):
+        """Монотонная позиция записи: сколько сэмплов записано за все время."""
+        return self.frames_written
+
+    def play_position(self):
+        """
+        Позиция воспроизведения в тех же единицах, что write_position: сколько
+        сэмплов устройство уже проиграло. Без устройства сэмпл "звучит" в момент записи.
+        """
+        return self.write_position()
+
+    def frame_time_ns(self, position: int):
+        """
+        Оценивает момент (по time.perf_counter_ns), когда сэмпл с позицией
+        записи position прозвучит. None - если приемник этого не знает.
+        """
+        return None
+
+    def set_sidetone(self, sidetone):
+        """
+        Подключает тон самоконтроля (synth.Sidetone), который синтезируется
+        при выводе каждого блока; None - отключает.
+
+        Returns:
+            bool: Поддерживает ли приемник самоконтроль с малой задержкой.
+        """
+        return False
+
+    def begin(self):
+        """Отмечает начало записи дорожки."""
+
+    def end(self):
+        """Отмечает конец записи дорожки."""
+
+    def write(self, samples, should_continue=None):
+        """Записывает сэмплы. Возвращает количество записанных."""
+        raise NotImplementedError
+
+    def write_silence(self, count: int, should_continue=None):
+        """Записывает count нулевых сэмплов. Возвращает количество записанных."""
+        return self.write(np.zeros(count, dtype=np.float32), should_continue)
+
+    def drain(self, should_continue=None):
+        """Ждет окончания вывода записанного. False - если ожидание прервано."""
+        return True
+
+    def flush(self):
+        """Сбрасывает еще не выведенные данные."""
+
+    def pause(self):
+        """Приостанавливает вывод."""
+
+    def resume(self):
+        """Возобновляет вывод."""
+
+    def get_stats(self):
+        """Возвращает счетчики для мониторинга."""
+        return {"frames_written": self.frames_written}
+
+    def close(self):
+        """Освобождает ресурсы приемника."""
+
+
+class NullSink(AudioSink):
+    """
+    Приемник, который отбрасывает весь звук.
+
+    По умолчанию работает быстрее реального времени (для тестов, замеров
+    и машин без звуковой карты). С realtime=True имитирует устройство,
+    выдерживая темп вывода, равный частоте дискретизации.
+    """
+    def __init__(self, sample_rate=44100, realtime=False):
+        super().__init__(sample_rate)
+        self.realtime = realtime
+        self._start_time = None
+        self._start_ns = 0
+        self._start_position = 0 # Позиция записи, соответствующая _start_time
+        self._clock_frames = 0 # Сэмплы, "проигранные" с момента _start_time
+
+    def _pace(self, should_continue=None):
+        """В режиме realtime ждет, пока 'устройство' не проиграет записанное."""
+        if not self.realtime or self._start_time is None:
+            return True
+        while True:
+            due = self._start_time + self._clock_frames / self.sample_rate
+            delay = due - time.perf_counter()
+            if delay <= 0:
+                return True
+            if should_continue is not None and not should_continue():
+                return False
+            time.sleep(min(delay, 0.01))
+
+    def _reset_clock(self):
+        self._start_time = None
+        self._clock_frames = 0
+
+    def begin(self):
+        # Если "устройство" уже доиграло записанное и простаивает, часы начинаются
+        # заново: иначе срок новой дорожки окажется в прошлом и темп не выдержится
+        if self._start_time is not None:
+            due = self._start_time + self._clock_frames / self.sample_rate
+            if due <= time.perf_counter():
+                self._reset_clock()
+
+    def _accept(self, count: int, should_continue=None):
+        if should_continue is not None and not should_continue():
+            return 0
+        if self._start_time is None:
+            self._start_time = time.perf_counter()
+            self._start_ns = time.perf_counter_ns()
+            self._start_position = self.frames_written
+        self._clock_frames += count
+        self._mark_written(count)
+        return count
+
+    def write(self, samples, should_continue=None):
+        return self._accept(len(samples), should_continue)
+
+    def write_silence(self, count: int, should_continue=None):
+        return self._accept(count, should_continue)
+
+    def drain(self, should_continue=None):
+        return self._pace(should_continue)
+
+    def play_position(self):
+        if not self.realtime or self._start_time is None:
+            return self.frames_written
+        elapsed = (time.perf_counter_ns() - self._start_ns) * self.sample_rate // 1_000_000_000
+        return min(self.frames_written, self._start_position + elapsed)
+
+    def frame_time_ns(self, position: int):
+        if not self.realtime or self._start_time is None:
+            # Без темпа устройства сэмпл "звучит" в момент записи
+            return time.perf_counter_ns()
+        return self._start_ns + (position - self._start_position) * 1_000_000_000 // self.sample_rate
+
+    def flush(self):
+        # Сбрасываем "часы", чтобы после остановки не ждать ненужную паузу
+        self._reset_clock()
+
+
+class WavFileSink(AudioSink):
+    """Потоково пишет дорожку в WAV-файл (16 бит PCM, моно)."""
+    def __init__(self, path=DEFAULT_WAV_PATH, sample_rate=44100):
+        super().__init__(sample_rate)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._wav = wave.open(path, 'wb')
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, samples, should_continue=None):
+        if should_continue is not None and not should_continue():
+            return 0
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+        self._wav.writeframes(pcm.tobytes())
+        self._mark_written(len(samples))
+        return len(samples)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+def create_sink(spec=None, sample_rate=44100):
+    """
+    Создает приемник звука по строковому описанию.
+
+    Args:
+        spec (str): "pyaudio", "null", "null:realtime" или "wav[:путь]".
+            Если не задано, берется из переменной окружения MORSE_AUDIO_SINK,
+            а при ее отсутствии используется "pyaudio".
+        sample_rate (int): Частота дискретизации.
+
+    Returns:
+        AudioSink: Готовый к записи приемник.
+    """
+    if spec is None:
+        spec = os.environ.get(SINK_ENV_VAR) or "pyaudio"
+    name, _, arg = spec.partition(":")
+    name = name.strip().lower()
+
+    if name == "null":
+        return NullSink(sample_rate, realtime=(arg == "realtime"))
+    if name == "wav":
+        return WavFileSink(arg or DEFAULT_WAV_PATH, sample_rate)
+    if name == "pyaudio":
+        try:
+            from .audio_engine import CallbackAudioOutput
+            return CallbackAudioOutput(sample_rate)
+        except Exception as e:
+            print(f"Не удалось открыть аудиоустройство: {e}. Звук будет отключен.")
+            return NullSink(sample_rate, realtime=True)
+
+    raise ValueError(f"Неизвестный приемник звука '{spec}'")
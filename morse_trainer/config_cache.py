@@ -0,0 +1,182 @@
+import hashlib
+import marshal
+import os
+import pickle
+import sys
+from . import course, morse_table, morse_trie
+from .course import Course
+from .morse_table import MorseTable
+from .morse_trie import build_indexes
+from .utils import load_json, resource_path, user_data_dir
+
+# Версия формата самого файла кэша. Изменения классов, чьи объекты лежат
+# в кэше, отслеживаются автоматически по хэшу их кода (см. _code_digest)
+CACHE_VERSION = 4
+CACHE_FILE_NAME = f"config_v{CACHE_VERSION}.pickle"
+
+# Исходные файлы конфигурации: имя в кэше -> относительный путь
+CONFIG_SOURCES = {
+    "themes": "config/themes.json",
+    "characters": "config/characters.json",
+    "lessons": "config/lessons.json",
+    "charsets": "config/charsets.json",
+}
+
+# Значения по умолчанию для цветов темы (те же, что использует интерфейс)
+THEME_DEFAULTS = {
+    "background_image": None,
+    "main_bg": None,
+    "card_bg": "#343638",
+    "text_color": "#dce4ee",
+    "button_bg": "#565b5e",
+    "button_hover": "#656b6e",
+    "accent_color": "#4a90e2",
+}
+
+
+def flatten_char_map(characters_data: dict):
+    """Собирает "плоский" словарь символ -> {code, mnemonic} из всех разделов."""
+    flat = {}
+    for section in ("alphabet", "digits", "signs"):
+        flat.update(characters_data.get(section, {}))
+    return flat
+
+
+def build_theme_tables(themes: dict):
+    """Дополняет каждую тему значениями по умолчанию для всех цветов."""
+    return {name: {**THEME_DEFAULTS, **theme} for name, theme in themes.items()}
+
+
+def compile_config(themes: dict, characters: dict, lessons: dict, charsets: dict = None):
+    """Строит скомпилированную конфигурацию: исходные данные плюс все индексы."""
+    flat_char_map = flatten_char_map(characters)
+    return {
+        "version": CACHE_VERSION,
+        "themes": themes,
+        "characters": characters,
+        "lessons": lessons,
+        "flat_char_map": flat_char_map,
+        "morse_table": MorseTable(flat_char_map),
+        "morse_indexes": build_indexes(characters, charsets),
+        "course": Course(lessons.get("course", [])),
+        "theme_tables": build_theme_tables(themes),
+    }
+
+
+def _code_digest():
+    """
+    Хэш исходного кода модулей, объекты которых сохраняются в кэше.
+
+    Если модуль изменился (например, у MorseTable появилось новое поле),
+    кэш со старыми объектами не подходит и собирается заново. В сборке
+    PyInstaller исходников нет - тогда хэшируется байт-код.
+    """
+    digest = hashlib.sha256()
+    for module in (course, morse_table, morse_trie, sys.modules[__name__]):
+        loader = module.__loader__
+        source = loader.get_source(module.__name__)
+        if source is not None:
+            digest.update(source.encode('utf-8'))
+        else:
+            digest.update(marshal.dumps(loader.get_code(module.__name__)))
+    return digest.hexdigest()
+
+
+def _file_digest(path: str):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source_stamp(path: str):
+    """Возвращает (mtime_ns, size) файла."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _sources_are_fresh(cached_sources: dict, paths: dict):
+    """
+    Проверяет, что исходные JSON не менялись с момента сборки кэша.
+
+    Сначала сравнивает время изменения и размер; если они отличаются,
+    сверяет хэш содержимого (файл могли просто "потрогать" или
+    распаковать заново, как это делает PyInstaller).
+
+    Returns:
+        tuple: (актуален ли кэш, обновились ли отметки времени).
+    """
+    stamps_updated = False
+    for name, path in paths.items():
+        cached = cached_sources.get(name)
+        if not cached:
+            return False, False
+        stamp = _source_stamp(path)
+        if stamp == cached["stamp"]:
+            continue
+        if _file_digest(path) != cached["sha256"]:
+            return False, False
+        cached["stamp"] = stamp
+        stamps_updated = True
+    return True, stamps_updated
+
+
+def _write_cache(cache_path: str, compiled: dict):
+    """Атомарно записывает кэш на диск."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def get_cache_path():
+    return os.path.join(user_data_dir(), "cache", CACHE_FILE_NAME)
+
+
+def load_compiled_config(cache_path: str = None):
+    """
+    Загружает скомпилированную конфигурацию из кэша или собирает ее из JSON.
+
+    Кэш хранится в папке пользовательских данных и автоматически
+    пересобирается, если изменился любой из JSON-файлов или код классов,
+    объекты которых в нем лежат.
+
+    Returns:
+        dict: Скомпилированная конфигурация (см. compile_config) или None,
+            если исходные файлы не удалось прочитать.
+    """
+    cache_path = cache_path or get_cache_path()
+    paths = {name: resource_path(rel) for name, rel in CONFIG_SOURCES.items()}
+    code_digest = _code_digest()
+
+    # --- Попытка загрузить готовый кэш ---
+    try:
+        with open(cache_path, 'rb') as f:
+            compiled = pickle.load(f)
+        if compiled.get("version") == CACHE_VERSION and compiled.get("code_digest") == code_digest:
+            fresh, stamps_updated = _sources_are_fresh(compiled["sources"], paths)
+            if fresh:
+                if stamps_updated:
+                    _write_cache(cache_path, compiled)
+                return compiled
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Кэш конфигурации поврежден и будет пересобран: {e}")
+
+    # --- Сборка из исходных JSON ---
+    data = {}
+    sources = {}
+    for name, path in paths.items():
+        data[name] = load_json(path)
+        if data[name] is None:
+            return None
+        sources[name] = {"stamp": _source_stamp(path), "sha256": _file_digest(path)}
+
+    compiled = compile_config(data["themes"], data["characters"], data["lessons"], data["charsets"])
+    compiled["sources"] = sources
+    compiled["code_digest"] = code_digest
+    try:
+        _write_cache(cache_path, compiled)
+    except Exception as e:
+        print(f"Не удалось сохранить кэш конфигурации {cache_path}: {e}")
+    return compiled
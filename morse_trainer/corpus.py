@@ -0,0 +1,161 @@
+import codecs
+import mmap
+import numpy as np
+
+# Размер порции чтения из отображенного файла (байт)
+CHUNK_BYTES = 256 * 1024
+# Коды, которые знаки получают после фильтрации
+SEPARATOR_CODE = 0x20   # Пробел: разделитель слов
+FOREIGN_CODE = 0x01     # Буква или цифра не из пула: "портит" слово
+# До какого кода символы проверяются на "буква/цифра"; дальше все считается разделителем
+CLASSIFIED_CODE_POINTS = 0x3100
+# Сколько байт файла просматривать в поисках слов для одного упражнения
+MAX_SCAN_BYTES = 32 * 1024 * 1024
+
+
+class CorpusTextSource:
+    """
+    Текст для приема из большого файла (книги, журналы QSO, списки позывных).
+
+    Файл отображается в память (mmap) и читается потоково порциями, поэтому
+    даже файлы в сотни мегабайт не загружаются целиком. Начало чтения - любая
+    позиция в файле за O(1): смещение выбирается случайно и выравнивается
+    на границу символа UTF-8, так что каждая сессия начинается в новом месте.
+    Текст фильтруется под пул знаков урока векторно: одна таблица по коду
+    символа переводит строчные в прописные, а остальное - в разделители.
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Текстовый файл в UTF-8.
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Файл пуст: {path}")
+        self.size = len(self._mmap)
+        self._tables = {} # frozenset пула -> таблица фильтрации
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_table(self, chars):
+        """
+        Таблица фильтрации: код символа -> код в тексте упражнения.
+
+        Знаки пула (в любом регистре) становятся прописными, прочие буквы
+        и цифры - FOREIGN_CODE, все остальное - разделителем слов.
+        """
+        key = frozenset(chars)
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+        single = [char for char in key if len(char) == 1]
+        # Последняя ячейка - разделитель для всех кодов за пределами таблицы
+        size = max([CLASSIFIED_CODE_POINTS] + [ord(c) + 1 for char in single for c in (char, char.lower())]) + 1
+        table = np.full(size, SEPARATOR_CODE, dtype=np.uint32)
+        alphanumeric = np.fromiter((chr(code).isalnum() for code in range(CLASSIFIED_CODE_POINTS)),
+                                   dtype=bool, count=CLASSIFIED_CODE_POINTS)
+        table[:CLASSIFIED_CODE_POINTS][alphanumeric] = FOREIGN_CODE
+        for char in single:
+            upper = ord(char.upper()) if len(char.upper()) == 1 else ord(char)
+            for variant in (char, char.lower()):
+                if len(variant) == 1:
+                    table[ord(variant)] = upper
+        self._tables[key] = table
+        return table
+
+    def random_offset(self, rng):
+        """Случайное смещение в файле, выровненное на начало символа UTF-8 (O(1))."""
+        offset = int(rng.integers(0, self.size))
+        # Продолжения многобайтовых символов имеют вид 10xxxxxx: не больше трех подряд
+        while offset < self.size and 0x80 <= self._mmap[offset] < 0xC0:
+            offset += 1
+        return offset if offset < self.size else 0
+
+    def _iter_chunks(self, offset: int, max_bytes=None):
+        """
+        Порции текста от offset до конца файла, затем с начала до offset
+        (не больше одного круга и не больше max_bytes байт).
+        """
+        remaining = self.size if max_bytes is None else min(max_bytes, self.size)
+        for start, stop in ((offset, self.size), (0, offset)):
+            stop = min(stop, start + remaining)
+            remaining -= stop - start
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            for position in range(start, stop, CHUNK_BYTES):
+                end = min(position + CHUNK_BYTES, stop)
+                yield decoder.decode(self._mmap[position:end], final=(end == stop))
+            # Граница круга разделяет слова
+            yield " "
+
+    def iter_words(self, chars, offset=0, whole_words=True, max_bytes=None):
+        """
+        Потоково выдает слова файла, отфильтрованные под пул знаков.
+
+        Args:
+            chars (list): Пул знаков урока.
+            offset (int): Смещение начала чтения (см. random_offset). Слово,
+                на которое попало смещение, пропускается.
+            whole_words (bool): True - только слова целиком из знаков пула;
+                False - слова режутся на части из знаков пула.
+            max_bytes (int): Предел просмотра файла в байтах (None - весь файл).
+        """
+        table = self._get_table(chars)
+        tail = np.zeros(0, dtype=np.uint32)
+        skip_first = offset > 0
+        for text in self._iter_chunks(offset, max_bytes):
+            codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+            # Коды вне таблицы попадают в ее последнюю ячейку - разделитель
+            mapped = np.concatenate((tail, np.take(table, codes, mode='clip')))
+            separators = mapped == SEPARATOR_CODE
+            if not separators.any():
+                tail = mapped
+                continue
+            # Последнее слово порции может продолжиться в следующей
+            end = len(mapped) - int(np.argmax(separators[::-1]))
+            mapped, tail, separators = mapped[:end], mapped[end:], separators[:end]
+            if skip_first:
+                start = int(np.argmax(separators))
+                mapped, separators = mapped[start:], separators[start:]
+                skip_first = False
+
+            foreign = mapped == FOREIGN_CODE
+            if foreign.any():
+                if whole_words:
+                    # Слово с чужим знаком целиком превращается в разделители
+                    word_ids = np.cumsum(separators)
+                    tainted = np.bincount(word_ids, weights=foreign) > 0
+                    mapped[tainted[word_ids]] = SEPARATOR_CODE
+                else:
+                    mapped[foreign] = SEPARATOR_CODE
+            yield from mapped.tobytes().decode('utf-32-le').split()
+
+    def generate(self, chars, num_words: int, rng=None, whole_words=True, max_bytes=MAX_SCAN_BYTES):
+        """
+        Текст упражнения: num_words подряд идущих слов со случайного места файла.
+
+        Returns:
+            str: Слова через пробел (как generate_exercise_text); может быть
+                короче, если в просмотренной части файла меньше подходящих слов.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        words = []
+        if chars and num_words > 0:
+            for word in self.iter_words(chars, self.random_offset(rng), whole_words, max_bytes):
+                words.append(word)
+                if len(words) >= num_words:
+                    break
+        return " ".join(words)
@@ -0,0 +1,90 @@
+import bisect
+
+class Course:
+    """
+    Индексированная модель учебного курса.
+
+    Хранит уроки со словарем lesson_id -> урок и накопленные пулы знаков
+    в виде префиксов одного общего списка: пул урока - это все знаки,
+    впервые появившиеся в уроках с ID не больше данного. Поиск урока и
+    пула - O(1) по словарю, поэтому модель выдерживает импортированные
+    курсы и пользовательские наборы из тысяч уроков.
+    """
+    def __init__(self, lessons=None):
+        self._lessons = []            # Уроки в порядке курса
+        self._by_id = {}              # lesson_id -> урок (первый с таким ID)
+        self._sorted_ids = []         # Все ID по возрастанию (для уроков вне курса)
+        self._chars_in_order = []     # Знаки в порядке первого появления (по возрастанию ID)
+        self._seen_chars = set()
+        self._prefix_len = {}         # lesson_id -> длина накопленного префикса
+        for lesson in lessons or []:
+            self._lessons.append(lesson)
+            self._by_id.setdefault(lesson['lesson_id'], lesson)
+        self._rebuild_pools()
+
+    def __len__(self):
+        return len(self._lessons)
+
+    def __iter__(self):
+        return iter(self._lessons)
+
+    def append_lesson(self, lesson: dict):
+        """
+        Добавляет урок в конец курса.
+
+        Если ID не меньше уже известных (обычный случай для курса и импорта),
+        накопленные пулы обновляются инкрементально; иначе индекс пересобирается.
+        """
+        lesson_id = lesson['lesson_id']
+        self._lessons.append(lesson)
+        self._by_id.setdefault(lesson_id, lesson)
+
+        if self._sorted_ids and lesson_id < self._sorted_ids[-1]:
+            self._rebuild_pools()
+            return
+
+        self._sorted_ids.append(lesson_id)
+        self._add_chars(lesson.get('new_chars', []))
+        self._prefix_len[lesson_id] = len(self._chars_in_order)
+
+    def _add_chars(self, chars):
+        for char in chars:
+            if char not in self._seen_chars:
+                self._seen_chars.add(char)
+                self._chars_in_order.append(char)
+
+    def _rebuild_pools(self):
+        """Пересобирает накопленные пулы, упорядочив уроки по ID."""
+        self._chars_in_order = []
+        self._seen_chars = set()
+        self._prefix_len = {}
+        ordered = sorted(self._lessons, key=lambda lesson: lesson['lesson_id'])
+        self._sorted_ids = [lesson['lesson_id'] for lesson in ordered]
+        for lesson in ordered:
+            self._add_chars(lesson.get('new_chars', []))
+            self._prefix_len[lesson['lesson_id']] = len(self._chars_in_order)
+
+    def get_lesson(self, lesson_id: int):
+        """Возвращает урок по ID или None."""
+        return self._by_id.get(lesson_id)
+
+    def get_lessons_info(self):
+        """Возвращает список (ID, имя) всех уроков в порядке курса."""
+        return [(lesson['lesson_id'], lesson['name']) for lesson in self._lessons]
+
+    def get_new_chars(self, lesson_id: int):
+        """Возвращает новые знаки урока (копию списка)."""
+        lesson = self._by_id.get(lesson_id)
+        return list(lesson.get('new_chars', [])) if lesson else []
+
+    def get_cumulative_chars(self, lesson_id: int):
+        """
+        Возвращает все знаки уроков с ID не больше lesson_id.
+
+        Для ID, которого нет в курсе, берется ближайший меньший ID.
+        """
+        length = self._prefix_len.get(lesson_id)
+        if length is None:
+            position = bisect.bisect_right(self._sorted_ids, lesson_id)
+            length = self._prefix_len[self._sorted_ids[position - 1]] if position else 0
+        return self._chars_in_order[:length]
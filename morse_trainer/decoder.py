@@ -0,0 +1,458 @@
+"""
+Декодер Морзе из звука: WAV-файл или живой вход (микрофон/линия).
+
+Звук обрабатывается потоково, блоками по несколько миллисекунд: детектор
+Гёрцеля измеряет амплитуду на частоте тона, адаптивный порог делит блоки
+на "звук" и "тишину", а длительности сравниваются с оценкой длины точки,
+которая подстраивается под скорость передачи. Каждый элемент сразу
+продвигает ключ в обратном индексе MorseIndex (кириллица из
+config/characters.json, латиница и вабун из config/charsets.json), так что
+символ находится одним обращением к массиву без сборки строки кода.
+
+Примеры:
+    python -m morse_trainer.decoder export/lesson_01/*.wav      # сверит с .txt рядом
+    python -m morse_trainer.decoder record.wav --tone 600 --wpm 18
+    python -m morse_trainer.decoder --live --charset latin
+"""
+import argparse
+import difflib
+import glob
+import math
+import os
+import time
+import wave
+import numpy as np
+
+from .morse_trie import DEFAULT_CHARSET, START_KEY, build_indexes
+from .utils import load_json, resource_path
+
+# Длина блока анализа (сек): ~4 мс дают 5 блоков на точку даже при 60 WPM
+BLOCK_SECONDS = 0.004
+# Постоянная времени спада пиковой амплитуды (сек)
+LEVEL_DECAY_SECONDS = 2.0
+# Порог "звук/тишина" относительно пиковой амплитуды
+THRESHOLD_RATIO = 0.5
+# Минимальная амплитуда тона, которая считается сигналом (доля полной шкалы)
+MIN_SIGNAL_LEVEL = 0.005
+# Коэффициент подстройки длины точки после каждого элемента
+SPEED_SMOOTHING = 0.2
+# Сколько звуков накопить перед первой оценкой скорости
+CALIBRATION_MARKS = 8
+# Длительности в точках: звуки (точка, тире) и паузы (в знаке, между знаками, между словами)
+MARK_UNITS = (1, 3)
+SPACE_UNITS = (1, 3, 7)
+# Отношение соседних длительностей, с которого они относятся к разным кластерам
+CLUSTER_RATIO = 1.8
+# Разница ошибок подгонки, меньше которой гипотезы о длине точки равноценны
+FIT_TOLERANCE = 0.02
+# Символ для кода, которого нет в таблице
+UNKNOWN_CHAR = "*"
+# Размер порции чтения WAV (сэмплов)
+READ_FRAMES = 65536
+
+
+def split_clusters(values):
+    """
+    Делит длительности на короткие и длинные по наибольшему отношению
+    соседних значений в отсортированном ряду.
+
+    Returns:
+        tuple: (короткие, длинные); длинные пусты, если наибольшее
+        отношение меньше CLUSTER_RATIO и все значения - один кластер.
+    """
+    values = sorted(values)
+    if len(values) < 2:
+        return values, []
+    ratios = [longer / shorter for shorter, longer in zip(values, values[1:])]
+    split = max(range(len(ratios)), key=ratios.__getitem__)
+    if ratios[split] < CLUSTER_RATIO:
+        return values, []
+    return values[:split + 1], values[split + 1:]
+
+
+def _nearest_units(is_mark: bool, units: float):
+    """Ближайшая допустимая длительность (в точках) для звука или паузы."""
+    return min(MARK_UNITS if is_mark else SPACE_UNITS, key=lambda unit: abs(math.log(units / unit)))
+
+
+def _refine(runs, dot_seconds: float):
+    """
+    Уточняет длину точки: среднее отрезков, деленных на свои длительности
+    в точках. Звуки и паузы внутри слова входят вместе, поэтому сдвиг
+    порога (звуки короче, паузы длиннее) взаимно компенсируется.
+    """
+    values = []
+    for is_mark, seconds in runs:
+        unit = _nearest_units(is_mark, seconds / dot_seconds)
+        if unit < SPACE_UNITS[-1]:
+            values.append(seconds / unit)
+    return sum(values) / len(values)
+
+
+def _fit_error(runs, dot_seconds: float):
+    """Сумма квадратов логарифмических отклонений отрезков от ближайших длительностей в точках."""
+    error = 0.0
+    for is_mark, seconds in runs:
+        units = seconds / dot_seconds
+        error += math.log(units / _nearest_units(is_mark, units)) ** 2
+    return error
+
+
+def estimate_dot_seconds(runs, prior_dot_seconds: float):
+    """
+    Оценивает длину точки по отрезкам (звук?, сек).
+
+    Звуки делятся на точки и тире по наибольшему разрыву длительностей.
+    Если все звуки одного вида (например, "ТТТ"), точки это или тире,
+    решает подгонка пауз к 1/3/7 точкам, а при равноценных гипотезах -
+    ближайшая к prior_dot_seconds (заданной скорости).
+    """
+    runs = [(is_mark, seconds) for is_mark, seconds in runs if seconds > 0]
+    marks = [seconds for is_mark, seconds in runs if is_mark]
+    if not marks:
+        return prior_dot_seconds
+    dots, dashes = split_clusters(marks)
+    if dashes:
+        return _refine(runs, (sum(dots) + sum(dashes) / MARK_UNITS[1]) / len(marks))
+    mark = sum(marks) / len(marks)
+    hypotheses = sorted((_fit_error(runs, dot), dot)
+                        for dot in (_refine(runs, mark), _refine(runs, mark / MARK_UNITS[1])))
+    (best_error, best), (other_error, other) = hypotheses
+    if other_error - best_error >= FIT_TOLERANCE:
+        return best
+    return min(best, other, key=lambda dot: abs(math.log(dot / prior_dot_seconds)))
+
+
+class GoertzelDetector:
+    """
+    Детектор амплитуды одной частоты по блокам (алгоритм Гёрцеля).
+
+    Для блока фиксированной длины результат Гёрцеля равен одному бину ДПФ
+    на частоте тона, поэтому все блоки порции считаются одним умножением
+    матрицы блоков на заранее посчитанные cos/sin. Остаток, не заполнивший
+    блок, переносится в следующую порцию.
+    """
+    def __init__(self, tone: float, sample_rate: int, block_size: int):
+        self.block_size = block_size
+        phase = 2 * np.pi * tone / sample_rate * np.arange(block_size)
+        # Нормировка: для синуса амплитуды A на частоте тона результат равен A
+        self._basis = np.stack((np.cos(phase), np.sin(phase)), axis=1) * (2.0 / block_size)
+        self._remainder = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        """Возвращает амплитуды тона для всех полных блоков (с учетом остатка прошлой порции)."""
+        data = np.concatenate((self._remainder, np.asarray(samples, dtype=np.float32)))
+        count = len(data) // self.block_size
+        self._remainder = data[count * self.block_size:]
+        if count == 0:
+            return np.zeros(0)
+        blocks = data[:count * self.block_size].reshape(count, self.block_size)
+        projection = blocks @ self._basis
+        return np.hypot(projection[:, 0], projection[:, 1])
+
+
+class ElementClassifier:
+    """
+    Переводит длительности "звук/тишина" в символы.
+
+    Звук короче двух точек - точка, длиннее - тире; тишина короче двух
+    точек - пауза внутри знака, от двух - конец знака, от пяти - конец
+    слова. Каждый элемент сразу продвигает ключ в индексе MorseIndex.
+    Длина точки подстраивается под фактическую скорость передачи.
+    Используется и декодером звука, и ключом (см. keyer.py).
+    """
+    def __init__(self, index, wpm=20):
+        """
+        Args:
+            index (MorseIndex): Обратный индекс "код -> символ" нужного набора.
+            wpm (float): Начальная оценка скорости.
+        """
+        self.index = index
+        self.dot_seconds = 1.2 / wpm
+        self._key = START_KEY       # Ключ текущего символа в индексе
+        self._char_pending = False  # Был ли символ, после которого еще не было паузы слова
+        self._started = False       # Встретился ли уже первый звук
+
+    @property
+    def wpm(self):
+        """Текущая оценка скорости передачи."""
+        return 1.2 / self.dot_seconds
+
+    def classify(self, is_mark: bool, seconds: float, output: list):
+        """Классифицирует отрезок звука или тишины; распознанный текст добавляется в output."""
+        if is_mark:
+            self._started = True
+            if seconds < 2 * self.dot_seconds:
+                self._key = self.index.advance(self._key, False)
+                estimate = seconds
+            else:
+                self._key = self.index.advance(self._key, True)
+                estimate = seconds / 3
+            self.dot_seconds += SPEED_SMOOTHING * (estimate - self.dot_seconds)
+        elif self._started:
+            if seconds < 2 * self.dot_seconds:
+                # Пауза между элементами тоже длится одну точку
+                self.dot_seconds += SPEED_SMOOTHING * (seconds - self.dot_seconds)
+                return
+            self.close_by_silence(seconds, output)
+
+    def close_by_silence(self, seconds: float, output: list):
+        """
+        Закрывает символ и слово по еще не закончившейся тишине длиной seconds,
+        не дожидаясь следующего звука.
+        """
+        if seconds >= 2 * self.dot_seconds:
+            self.emit_symbol(output)
+        if seconds >= 5 * self.dot_seconds and self._char_pending:
+            output.append(" ")
+            self._char_pending = False
+
+    def emit_symbol(self, output: list):
+        """Выдает накопленный символ (UNKNOWN_CHAR, если такого кода нет)."""
+        if self._key == START_KEY:
+            return
+        output.append(self.index.lookup(self._key) or UNKNOWN_CHAR)
+        self._key = START_KEY
+        self._char_pending = True
+
+
+class MorseDecoder:
+    """
+    Потоковый декодер: feed(samples) -> уже распознанный текст.
+
+    Память ограничена одной порцией и текущим символом, поэтому длина
+    записи не важна. Скорость оценивается на лету: первые звуки копятся,
+    пока по самым коротким отрезкам (точки и паузы внутри знака длятся
+    одну точку) не будет оценена длина точки; дальше ее подстраивает
+    ElementClassifier.
+    """
+    def __init__(self, index, tone=700, sample_rate=44100, wpm=20):
+        """
+        Args:
+            index (MorseIndex): Обратный индекс "код -> символ" нужного набора.
+        """
+        self.classifier = ElementClassifier(index, wpm)
+        self.sample_rate = sample_rate
+        self.block_size = max(1, int(sample_rate * BLOCK_SECONDS))
+        self.block_seconds = self.block_size / sample_rate
+        self.detector = GoertzelDetector(tone, sample_rate, self.block_size)
+
+        self._decay_per_block = np.log(0.5) * self.block_seconds / LEVEL_DECAY_SECONDS
+        self._level = 0.0           # Пиковая амплитуда со спадом
+        self._state = False         # Текущее состояние: звук или тишина
+        self._run_blocks = 0        # Длина текущего отрезка в блоках
+        self._calibration = []      # Отрезки (звук?, сек) до первой оценки скорости
+
+    @property
+    def wpm(self):
+        """Текущая оценка скорости передачи."""
+        return self.classifier.wpm
+
+    def _levels(self, amplitudes):
+        """Пиковая амплитуда со спадом для каждого блока (векторно, через логарифмы)."""
+        log_amp = np.log(np.maximum(amplitudes, 1e-12))
+        steps = np.arange(len(amplitudes)) * self._decay_per_block
+        # level[i] = max(amp[i], level[i-1] * decay) в логарифмах: накопленный максимум со сдвигом
+        start = np.log(max(self._level, 1e-12)) + self._decay_per_block
+        peaks = np.maximum(np.maximum.accumulate(log_amp - steps), start)
+        levels = np.exp(peaks + steps)
+        self._level = levels[-1]
+        return levels
+
+    def feed(self, samples):
+        """Обрабатывает порцию сэмплов. Возвращает текст, распознанный в этой порции."""
+        amplitudes = self.detector.process(samples)
+        if not len(amplitudes):
+            return ""
+        threshold = np.maximum(self._levels(amplitudes) * THRESHOLD_RATIO, MIN_SIGNAL_LEVEL)
+        on = amplitudes > threshold
+
+        # Переходы "звук/тишина" внутри порции - цикл только по отрезкам, а не по блокам
+        changes = np.flatnonzero(on[1:] != on[:-1]) + 1
+        bounds = np.concatenate(([0], changes, [len(on)]))
+        output = []
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            state = bool(on[start])
+            if state == self._state:
+                self._run_blocks += end - start
+                continue
+            self._push_run(output)
+            self._state = state
+            self._run_blocks = end - start
+        # Долгая тишина: символ и слово можно закрыть, не дожидаясь следующего звука
+        if not self._state:
+            self._close_by_silence(output)
+        return "".join(output)
+
+    def _push_run(self, output: list):
+        """Передает завершившийся отрезок классификатору (или копит его для калибровки)."""
+        seconds = self._run_blocks * self.block_seconds
+        if self._calibration is None:
+            self.classifier.classify(self._state, seconds, output)
+            return
+        if self._state or self._calibration:
+            self._calibration.append((self._state, seconds))
+        if sum(state for state, _ in self._calibration) >= CALIBRATION_MARKS:
+            self._calibrate(output)
+
+    def _calibrate(self, output: list):
+        """Оценивает длину точки по накопленным отрезкам и декодирует их."""
+        runs, self._calibration = self._calibration, None
+        if not runs:
+            return
+        self.classifier.dot_seconds = estimate_dot_seconds(runs, self.classifier.dot_seconds)
+        for state, seconds in runs:
+            self.classifier.classify(state, seconds, output)
+
+    def _close_by_silence(self, output: list):
+        if self._calibration is None:
+            self.classifier.close_by_silence(self._run_blocks * self.block_seconds, output)
+
+    def finish(self):
+        """Завершает поток: выдает последний незакрытый символ."""
+        output = []
+        if self._state:
+            self._push_run(output)
+            self._state = False
+            self._run_blocks = 0
+        if self._calibration is not None:
+            self._calibrate(output)
+        self.classifier.emit_symbol(output)
+        return "".join(output)
+
+
+def load_indexes():
+    """Строит обратные индексы всех наборов символов из файлов конфигурации."""
+    characters_data = load_json(resource_path("config/characters.json")) or {}
+    charsets_data = load_json(resource_path("config/charsets.json")) or {}
+    return build_indexes(characters_data, charsets_data)
+
+
+def create_decoder(tone=700, sample_rate=44100, wpm=20, charset=DEFAULT_CHARSET):
+    """Создает декодер для набора символов charset ("cyrillic", "latin", "wabun")."""
+    indexes = load_indexes()
+    if charset not in indexes:
+        raise ValueError(f"Неизвестный набор символов: {charset}")
+    return MorseDecoder(indexes[charset], tone=tone, sample_rate=sample_rate, wpm=wpm)
+
+
+def iter_wav_blocks(path: str, frames=READ_FRAMES):
+    """
+    Читает WAV порциями float32 (моно). Первым значением отдает частоту дискретизации.
+
+    Поддерживаются 8/16/32-битные PCM-файлы; многоканальный звук сводится в моно.
+    """
+    with wave.open(path, 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        yield wav.getframerate()
+        dtype = {1: np.uint8, 2: '<i2', 4: '<i4'}.get(width)
+        if dtype is None:
+            raise ValueError(f"Неподдерживаемая разрядность WAV: {width * 8} бит")
+        scale = float(2 ** (8 * width - 1))
+        while True:
+            raw = wav.readframes(frames)
+            if not raw:
+                return
+            data = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+            if width == 1:
+                data -= 128.0
+            data /= scale
+            if channels > 1:
+                data = data.reshape(-1, channels).mean(axis=1)
+            yield data
+
+
+def decode_wav(path: str, tone=700, wpm=20, charset=DEFAULT_CHARSET):
+    """
+    Декодирует WAV-файл за один потоковый проход.
+
+    Returns:
+        tuple: (текст, оценка скорости в WPM, длительность звука в секундах).
+    """
+    blocks = iter_wav_blocks(path)
+    sample_rate = next(blocks)
+    decoder = create_decoder(tone, sample_rate, wpm, charset)
+    parts = []
+    total = 0
+    for block in blocks:
+        total += len(block)
+        parts.append(decoder.feed(block))
+    parts.append(decoder.finish())
+    return "".join(parts).strip(), decoder.wpm, total / sample_rate
+
+
+def compare_text(expected: str, decoded: str):
+    """Доля совпадения текстов (0..1) без учета переводов строк и лишних пробелов."""
+    expected = " ".join(expected.split())
+    decoded = " ".join(decoded.split())
+    return difflib.SequenceMatcher(None, expected, decoded, autojunk=False).ratio()
+
+
+def decode_live(tone=700, wpm=20, sample_rate=44100, block_frames=1024, charset=DEFAULT_CHARSET):
+    """Декодирует звук с устройства ввода по умолчанию, печатая текст по мере приема."""
+    import pyaudio # Импорт только здесь: для файлов звуковая карта не нужна
+
+    p = pyaudio.PyAudio()
+    stream = p.open(format=pyaudio.paFloat32, channels=1, rate=sample_rate,
+                    input=True, frames_per_buffer=block_frames)
+    decoder = create_decoder(tone, sample_rate, wpm, charset)
+    print("Прием с микрофона... (Ctrl+C - выход)")
+    try:
+        while True:
+            data = np.frombuffer(stream.read(block_frames, exception_on_overflow=False), dtype=np.float32)
+            text = decoder.feed(data)
+            if text:
+                print(text, end="", flush=True)
+    except KeyboardInterrupt:
+        print(decoder.finish())
+    finally:
+        stream.stop_stream()
+        stream.close()
+        p.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Декодирование Морзе из WAV-файлов или с микрофона.")
+    parser.add_argument("paths", nargs="*", help="WAV-файлы или маски (например, export/*/*.wav)")
+    parser.add_argument("--tone", type=float, default=700, help="Частота тона (Гц)")
+    parser.add_argument("--wpm", type=float, default=20, help="Начальная оценка скорости (WPM)")
+    parser.add_argument("--live", action="store_true", help="Принимать с устройства ввода")
+    parser.add_argument("--charset", default=DEFAULT_CHARSET, choices=sorted(load_indexes()),
+                        help="Набор символов")
+    args = parser.parse_args(argv)
+
+    if args.live:
+        decode_live(args.tone, args.wpm, charset=args.charset)
+        return 0
+
+    paths = [path for pattern in args.paths for path in sorted(glob.glob(pattern))]
+    if not paths:
+        parser.error("не указаны WAV-файлы (или используйте --live)")
+
+    started = time.perf_counter()
+    audio_seconds = 0.0
+    scores = []
+    for path in paths:
+        text, wpm, seconds = decode_wav(path, args.tone, args.wpm, args.charset)
+        audio_seconds += seconds
+        line = f"{path}: {text} [{wpm:.1f} WPM]"
+        # Рядом с файлами экспорта лежит .txt с ответами - сверяем с ним
+        key_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(key_path):
+            with open(key_path, 'r', encoding='utf-8') as f:
+                score = compare_text(f.read(), text)
+            scores.append(score)
+            line += f" совпадение {score * 100:.1f}%"
+        print(line)
+
+    elapsed = time.perf_counter() - started
+    print(f"Декодировано {len(paths)} файлов, {audio_seconds / 60:.1f} мин звука за {elapsed:.1f} с "
+          f"(x{audio_seconds / max(elapsed, 1e-9):.0f} быстрее реального времени).")
+    if scores:
+        print(f"Среднее совпадение с ответами: {np.mean(scores) * 100:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+import queue
+
+
+class UIEvent:
+    """
+    Событие для интерфейса.
+
+    Если у типа coalesce = True, из нескольких событий этого типа,
+    накопившихся за кадр, обработчики получат только последнее.
+    """
+    __slots__ = ()
+    coalesce = False
+
+
+class PlaybackStarted(UIEvent):
+    """Задание начало звучать."""
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CharSounding(UIEvent):
+    """Сейчас звучит знак text[index]."""
+    __slots__ = ("text", "index")
+    coalesce = True
+
+    def __init__(self, text: str, index: int):
+        self.text = text
+        self.index = index
+
+
+class PlaybackFinished(UIEvent):
+    """
+    Задание завершено: доиграно (completed=True), прервано или снято с очереди.
+    on_complete - колбэк задания, его вызывает главный поток.
+    """
+    __slots__ = ("text", "completed", "on_complete")
+
+    def __init__(self, text: str, completed: bool, on_complete=None):
+        self.text = text
+        self.completed = completed
+        self.on_complete = on_complete
+
+
+class PlaybackError(UIEvent):
+    """Ошибка в потоке воспроизведения."""
+    __slots__ = ("text", "message")
+
+    def __init__(self, text: str, message: str):
+        self.text = text
+        self.message = message
+
+
+class EventBus:
+    """
+    Потокобезопасная шина событий от фоновых потоков к главному циклу Tk.
+
+    Публиковать события можно из любого потока: publish только кладет их
+    в очередь. Обработчики вызываются в dispatch, который главный цикл
+    вызывает раз в кадр, поэтому фоновые потоки никогда не обращаются
+    к Tk напрямую. События с coalesce схлопываются до последнего за кадр.
+    """
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._handlers = {} # тип события -> [обработчики]
+
+    def subscribe(self, event_type, handler):
+        """Подписывает handler(event) на события типа event_type."""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event: UIEvent):
+        """Отправляет событие (из любого потока)."""
+        self._queue.put(event)
+
+    def dispatch(self):
+        """
+        Доставляет накопившиеся события обработчикам (только из главного потока).
+
+        Returns:
+            int: Сколько событий доставлено после схлопывания.
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Для схлопываемых типов остается только последнее событие, на своем месте
+        latest = {type(event): i for i, event in enumerate(events) if event.coalesce}
+        delivered = 0
+        for i, event in enumerate(events):
+            if event.coalesce and latest[type(event)] != i:
+                continue
+            delivered += 1
+            for handler in self._handlers.get(type(event), ()):
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"Ошибка обработчика события {type(event).__name__}: {e}")
+        return delivered
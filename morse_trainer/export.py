@@ -0,0 +1,177 @@
+"""
+Пакетный экспорт уроков в аудиофайлы.
+
+Для каждого урока из config/lessons.json генерирует несколько случайных
+упражнений "Прием групп" при разных скоростях/тонах/типах звука и
+записывает их в WAV-файлы, а рядом - текстовый файл с ответами.
+Рендеринг распределяется по пулу процессов, каждое упражнение пишется
+в файл потоково, по словам, поэтому память не растет с длиной упражнения.
+
+Пример:
+    python -m morse_trainer.export --out export --wpm 15 20 --tone 600 700 --variants 50
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .audio_player import AudioPlayer
+from .audio_sinks import NullSink, WavFileSink
+from .morse_logic import MorseLogic
+from .utils import load_json, resource_path
+
+# --- Состояние процесса-исполнителя (создается один раз на процесс) ---
+_worker_logic = None
+_worker_players = {}
+_worker_pools = {}
+_worker_sample_rate = 44100
+
+
+def _init_worker(sample_rate: int):
+    """Загружает конфигурацию один раз на процесс пула."""
+    global _worker_logic, _worker_sample_rate
+    _worker_sample_rate = sample_rate
+    characters_data = load_json(resource_path("config/characters.json"))
+    lessons_data = load_json(resource_path("config/lessons.json"))
+    _worker_logic = MorseLogic(characters_data, lessons_data, None)
+    _worker_players.clear()
+    _worker_pools.clear()
+
+
+def _get_player(wpm: int, tone: int, sound_type: str):
+    """Возвращает плеер процесса с нужными настройками (создается один раз)."""
+    key = (wpm, tone, sound_type)
+    player = _worker_players.get(key)
+    if player is None:
+        player = AudioPlayer(wpm=wpm, tone=tone, sample_rate=_worker_sample_rate,
+                             sink=NullSink(_worker_sample_rate))
+        player.set_sound_type(sound_type)
+        _worker_players[key] = player
+    return player
+
+
+def _get_lesson_pool(lesson_id: int):
+    """
+    Пул знаков урока, у которых есть код Морзе (кэшируется на процесс).
+
+    Знаки без кода не звучат, поэтому в ключ ответов должно попасть ровно
+    то, что записано в WAV: такие знаки исключаются из пула заранее.
+    """
+    chars = _worker_pools.get(lesson_id)
+    if chars is None:
+        chars = _worker_logic.get_character_pool("base", lesson_id, "group_reception", [])
+        table = _worker_logic.morse_table
+        missing = [char for char in chars if not table.can_encode(char)]
+        if missing:
+            print(f"Урок {lesson_id}: нет кода Морзе для знаков {', '.join(repr(c) for c in missing)}, они пропущены.")
+            chars = [char for char in chars if char not in missing]
+        if not chars:
+            raise ValueError(f"Урок {lesson_id}: в пуле нет знаков с кодом Морзе")
+        _worker_pools[lesson_id] = chars
+    return chars
+
+
+def format_answer_key(text: str, groups_per_line=5):
+    """Форматирует текст упражнения по groups_per_line групп в строке."""
+    words = text.split()
+    lines = [" ".join(words[i:i + groups_per_line]) for i in range(0, len(words), groups_per_line)]
+    return "\n".join(lines) + "\n"
+
+
+def _export_job(job: dict):
+    """
+    Рендерит одно упражнение в WAV и пишет файл ответов. Выполняется в пуле.
+
+    Returns:
+        tuple: (путь к WAV, количество сэмплов).
+    """
+    player = _get_player(job["wpm"], job["tone"], job["sound_type"])
+    _worker_logic.audio_player = player
+    # Фаза тона в каждом файле начинается с нуля - файлы не зависят от порядка заданий
+    player.oscillator.reset_phase()
+
+    chars = _get_lesson_pool(job["lesson_id"])
+    text = _worker_logic.generate_exercise_text(chars, job["num_groups"], job["group_size"],
+                                                seed=job["seed"])
+
+    wav_path = job["path"]
+    sink = WavFileSink(wav_path, player.sample_rate)
+    try:
+        for block in _worker_logic.iter_render_blocks(text):
+            sink.write(block)
+    finally:
+        sink.close()
+
+    with open(os.path.splitext(wav_path)[0] + ".txt", 'w', encoding='utf-8') as f:
+        f.write(format_answer_key(text))
+    return wav_path, sink.frames_written
+
+
+def build_jobs(lesson_ids, wpms, tones, sound_types, variants, num_groups, group_size, out_dir, base_seed):
+    """Строит список заданий на экспорт (по одному на файл)."""
+    jobs = []
+    index = 0
+    for lesson_id in lesson_ids:
+        lesson_dir = os.path.join(out_dir, f"lesson_{lesson_id:02d}")
+        for wpm in wpms:
+            for tone in tones:
+                for sound_type in sound_types:
+                    for variant in range(1, variants + 1):
+                        name = f"l{lesson_id:02d}_{wpm}wpm_{tone}hz_{sound_type}_{variant:03d}.wav"
+                        jobs.append({
+                            "lesson_id": lesson_id,
+                            "wpm": wpm,
+                            "tone": tone,
+                            "sound_type": sound_type,
+                            "num_groups": num_groups,
+                            "group_size": group_size,
+                            "seed": base_seed + index,
+                            "path": os.path.join(lesson_dir, name),
+                        })
+                        index += 1
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный экспорт уроков Морзе в WAV-файлы.")
+    parser.add_argument("--out", default="export", help="Папка для результатов")
+    parser.add_argument("--lessons", type=int, nargs="*", help="ID уроков (по умолчанию - все)")
+    parser.add_argument("--wpm", type=int, nargs="+", default=[20], help="Скорости (WPM)")
+    parser.add_argument("--tone", type=int, nargs="+", default=[700], help="Тоны (Гц)")
+    parser.add_argument("--sound-type", nargs="+", default=["analog"], choices=["analog", "discrete"])
+    parser.add_argument("--variants", type=int, default=10, help="Случайных упражнений на комбинацию")
+    parser.add_argument("--groups", type=int, default=10, help="Групп в упражнении")
+    parser.add_argument("--group-size", type=int, default=5, help="Знаков в группе")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--seed", type=int, default=0, help="Начальное зерно генератора")
+    parser.add_argument("--workers", type=int, default=None, help="Размер пула (по умолчанию - число ядер)")
+    args = parser.parse_args(argv)
+
+    lessons_data = load_json(resource_path("config/lessons.json"))
+    if not lessons_data:
+        return 1
+    all_ids = [lesson['lesson_id'] for lesson in lessons_data.get("course", [])]
+    lesson_ids = args.lessons or all_ids
+
+    jobs = build_jobs(lesson_ids, args.wpm, args.tone, args.sound_type, args.variants,
+                      args.groups, args.group_size, args.out, args.seed)
+    print(f"Экспорт: {len(jobs)} файлов в '{args.out}'...")
+
+    started = time.perf_counter()
+    total_samples = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.sample_rate,)) as pool:
+        for done, (path, samples) in enumerate(pool.map(_export_job, jobs, chunksize=8), 1):
+            total_samples += samples
+            if done % 100 == 0 or done == len(jobs):
+                print(f"  {done}/{len(jobs)}: {path}")
+
+    elapsed = time.perf_counter() - started
+    audio_seconds = total_samples / args.sample_rate
+    print(f"Готово за {elapsed:.1f} с: {audio_seconds / 60:.1f} мин звука "
+          f"(x{audio_seconds / max(elapsed, 1e-9):.0f} быстрее реального времени).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
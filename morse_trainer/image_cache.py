@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+# Сколько готовых (уже отмасштабированных) фонов держать в памяти
+MAX_CACHED_IMAGES = 4
+
+
+class ImageCache:
+    """
+    LRU-кэш фоновых изображений, уже приведенных к размеру окна.
+
+    Ключ - (путь, ширина, высота) в пикселях экрана. JPEG декодируется
+    в режиме draft: декодер сразу уменьшает картинку в 2/4/8 раз до
+    ближайшего размера не меньше нужного, так что полноразмерное
+    изображение в памяти не появляется. Хранятся только готовые картинки
+    нужного размера, поэтому повторная смена темы или возврат к прежнему
+    размеру окна обходятся без чтения файла.
+    """
+    def __init__(self, max_items=MAX_CACHED_IMAGES):
+        self.max_items = max_items
+        self._images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, path: str, size: tuple):
+        # Pillow импортируется только когда действительно нужен фон
+        from PIL import Image
+
+        resample = getattr(Image, "Resampling", Image).BILINEAR
+        with Image.open(path) as image:
+            image.draft("RGB", size)
+            image = image.convert("RGB")
+            if image.size != size:
+                image = image.resize(size, resample)
+        return image
+
+    def get(self, path: str, size: tuple):
+        """
+        Возвращает PIL.Image файла path размером size (ширина, высота в пикселях).
+        """
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        key = (path, size)
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        image = self._load(path, size)
+        self._images[key] = image
+        if len(self._images) > self.max_items:
+            self._images.popitem(last=False)
+        return image
+
+    def clear(self):
+        self._images.clear()
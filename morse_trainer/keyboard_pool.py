@@ -0,0 +1,127 @@
+import customtkinter as ctk
+
+# Цвета кнопки знака, которого нет в текущем пуле
+INACTIVE_FG_COLOR = "gray20"
+INACTIVE_TEXT_COLOR = "gray50"
+
+
+def hide_widget(widget):
+    """Убирает виджет из раскладки родителя, не уничтожая его."""
+    manager = widget.winfo_manager()
+    if manager == "pack":
+        widget.pack_forget()
+    elif manager == "grid":
+        widget.grid_forget()
+    elif manager == "place":
+        widget.place_forget()
+
+
+class RecognitionKeyboard:
+    """
+    Клавиатура режима распознавания: сетка кнопок по раскладке.
+
+    Кнопки создаются один раз на раскладку. При смене урока, упражнения
+    или режима меняется только состояние кнопок (активна/неактивна), причем
+    перенастраиваются лишь те, у которых оно изменилось.
+    """
+    def __init__(self, master, layout: list, font, command):
+        """
+        Args:
+            master: Родительский виджет (рабочая область).
+            layout (list): Раскладка - список рядов знаков.
+            font (CTkFont): Шрифт кнопок.
+            command: Обработчик нажатия, вызывается со знаком кнопки.
+        """
+        self.layout = layout
+        self.command = command
+        self.frame = ctk.CTkFrame(master, fg_color="transparent")
+        self.buttons = {}
+        self._active = {}
+
+        for row_idx, row_chars in enumerate(layout):
+            self.frame.rowconfigure(row_idx, weight=1)
+            for col_idx, char in enumerate(row_chars):
+                self.frame.columnconfigure(col_idx, weight=1)
+                button = ctk.CTkButton(self.frame, text=char, font=font,
+                                       command=lambda c=char: self.command(c))
+                button.grid(row=row_idx, column=col_idx, padx=2, pady=2, sticky="nsew")
+                self.buttons[char] = button
+                self._active[char] = True
+
+        sample = next(iter(self.buttons.values()), None)
+        self._active_colors = (sample.cget("fg_color"), sample.cget("text_color")) if sample else (None, None)
+
+    def set_active(self, chars):
+        """Делает активными кнопки знаков chars, остальные - неактивными."""
+        chars = set(chars)
+        fg_color, text_color = self._active_colors
+        for char, button in self.buttons.items():
+            is_active = char in chars
+            if self._active[char] == is_active:
+                continue
+            if is_active:
+                button.configure(fg_color=fg_color, text_color=text_color, hover=True)
+            else:
+                button.configure(fg_color=INACTIVE_FG_COLOR, text_color=INACTIVE_TEXT_COLOR, hover=False)
+            self._active[char] = is_active
+
+    def show(self):
+        self.frame.pack(expand=True, fill="both", padx=5, pady=5)
+
+    def hide(self):
+        hide_widget(self.frame)
+
+
+class StudyButtonBar:
+    """
+    Ряд кнопок знаков режима изучения.
+
+    Кнопка знака создается при первом появлении знака в пуле и дальше
+    только показывается или прячется.
+    """
+    def __init__(self, master, font, command, on_enter, on_leave):
+        """
+        Args:
+            master: Родительский виджет (рабочая область).
+            font (CTkFont): Шрифт кнопок.
+            command: Обработчик нажатия, вызывается со знаком кнопки.
+            on_enter: Обработчик наведения мыши (event, знак).
+            on_leave: Обработчик ухода мыши (event).
+        """
+        self.font = font
+        self.command = command
+        self.on_enter = on_enter
+        self.on_leave = on_leave
+        self.frame = ctk.CTkFrame(master, fg_color="transparent")
+        self.buttons = {}
+        self._shown = []
+
+    def _get_button(self, char: str):
+        button = self.buttons.get(char)
+        if button is None:
+            button = ctk.CTkButton(self.frame, text=char, font=self.font,
+                                   command=lambda c=char: self.command(c))
+            button.bind("<Enter>", lambda event, c=char: self.on_enter(event, c))
+            button.bind("<Leave>", lambda event: self.on_leave(event))
+            self.buttons[char] = button
+        return button
+
+    def set_chars(self, chars: list):
+        """Показывает кнопки знаков chars (в этом порядке) и прячет остальные."""
+        chars = list(chars)
+        if chars == self._shown:
+            return
+        for char in self._shown:
+            self.buttons[char].grid_forget()
+        for i in range(len(chars), len(self._shown)):
+            self.frame.grid_columnconfigure(i, weight=0)
+        for i, char in enumerate(chars):
+            self.frame.grid_columnconfigure(i, weight=1)
+            self._get_button(char).grid(row=0, column=i, padx=5, pady=5, sticky="nsew")
+        self._shown = chars
+
+    def show(self, **grid_options):
+        self.frame.grid(**grid_options)
+
+    def hide(self):
+        hide_widget(self.frame)
@@ -0,0 +1,275 @@
+import threading
+from collections import deque
+import numpy as np
+from .decoder import ElementClassifier, compare_text
+
+# Типы ключа для упражнения на передачу
+KEYER_TYPES = ("straight", "iambic")
+# Режим ямбического манипулятора по умолчанию: "B" - после отпускания сжатых лепестков
+# добавляется еще один противоположный элемент, "A" - нет
+DEFAULT_IAMBIC_MODE = "B"
+NS_PER_SECOND = 1_000_000_000
+
+
+class Keyer:
+    """
+    Общая часть ключей: звучащие отрезки и очередь длительностей.
+
+    События (contact) приходят из потока Tk с отметками time.perf_counter_ns(),
+    а читают состояние колбэк вывода звука (Sidetone.mix - через marks_between)
+    и опрос классификатора (take_runs). Поэтому все поля защищены одной
+    короткой блокировкой.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._marks = deque()         # [начало, конец или None] звучащих отрезков (нс)
+        self._runs = deque()          # Завершенные отрезки (звук?, длительность в нс)
+        self._last_mark_end = None    # Конец последнего звука (нс)
+        self._advanced_to = 0         # До какого момента обработан автомат ключа
+
+    def contact(self, is_dah: bool, pressed: bool, time_ns: int):
+        """
+        Нажатие или отпускание контакта.
+
+        Args:
+            is_dah (bool): Лепесток тире (для прямого ключа не важен).
+            pressed (bool): True - нажатие, False - отпускание.
+            time_ns (int): Момент события (time.perf_counter_ns).
+        """
+        raise NotImplementedError
+
+    def _advance_locked(self, until_ns: int):
+        """Доводит автомат ключа до момента until_ns (для прямого ключа нечего делать)."""
+        self._advanced_to = max(self._advanced_to, until_ns)
+
+    def _is_down_locked(self):
+        return False
+
+    def _push_mark(self, start_ns: int, end_ns: int):
+        if self._last_mark_end is not None:
+            self._runs.append((False, start_ns - self._last_mark_end))
+        self._runs.append((True, end_ns - start_ns))
+        self._last_mark_end = end_ns
+
+    def take_runs(self, now_ns: int):
+        """
+        Забирает накопленные отрезки.
+
+        Returns:
+            tuple: (список (звук?, длительность нс), длительность текущей
+                тишины в нс - 0, если сейчас звучит или звуков еще не было).
+        """
+        with self._lock:
+            self._advance_locked(now_ns)
+            runs = list(self._runs)
+            self._runs.clear()
+            if self._is_down_locked() or self._last_mark_end is None:
+                silence = 0
+            else:
+                silence = max(0, now_ns - self._last_mark_end)
+        return runs, silence
+
+    def marks_between(self, start_ns: int, end_ns: int):
+        """
+        Звучащие отрезки, пересекающие интервал [start_ns, end_ns).
+
+        Returns:
+            list: [(начало, конец или None - ключ еще нажат), ...] в нс.
+        """
+        with self._lock:
+            self._advance_locked(end_ns)
+            marks = self._marks
+            # Отрезки идут по порядку: все закончившиеся раньше интервала больше не нужны
+            while marks and marks[0][1] is not None and marks[0][1] <= start_ns:
+                marks.popleft()
+            return [(start, end) for start, end in marks if start < end_ns]
+
+
+class StraightKey(Keyer):
+    """Прямой ключ: звук ровно от нажатия до отпускания."""
+    def __init__(self):
+        super().__init__()
+        self._down_since = None
+
+    def _is_down_locked(self):
+        return self._down_since is not None
+
+    def contact(self, is_dah: bool, pressed: bool, time_ns: int):
+        with self._lock:
+            if pressed:
+                if self._down_since is not None:
+                    return
+                self._down_since = time_ns
+                self._marks.append([time_ns, None])
+            else:
+                if self._down_since is None:
+                    return
+                end_ns = max(time_ns, self._down_since)
+                self._marks[-1][1] = end_ns
+                self._push_mark(self._down_since, end_ns)
+                self._down_since = None
+
+
+class IambicKeyer(Keyer):
+    """
+    Ямбический манипулятор с памятью точки и тире.
+
+    Точки и тире формирует сам автомат с точной длительностью для заданной
+    скорости. Удержание лепестка повторяет элемент, сжатие обоих - чередует.
+    Нажатие во время элемента запоминается и будет передано следующим.
+    Автомат работает по отметкам времени событий, а не по моменту вызова,
+    поэтому его можно продвигать и из колбэка звука, и из опроса Tk.
+    """
+    def __init__(self, wpm=20, mode=DEFAULT_IAMBIC_MODE):
+        super().__init__()
+        self.dot_ns = int(1.2 / wpm * NS_PER_SECOND)
+        self.mode = mode
+        self._down = {False: False, True: False}     # Нажат ли лепесток (по is_dah)
+        self._memory = {False: False, True: False}   # Запомненные нажатия
+        self._element = None    # Текущий элемент (is_dah) или None - ключ свободен
+        self._next_start = 0    # Конец текущего элемента с паузой после него (нс)
+
+    def _is_down_locked(self):
+        return self._element is not None
+
+    def contact(self, is_dah: bool, pressed: bool, time_ns: int):
+        with self._lock:
+            # События не могут попасть в уже обработанное автоматом прошлое
+            time_ns = max(time_ns, self._advanced_to)
+            self._advance_locked(time_ns)
+            self._down[is_dah] = pressed
+            if not pressed:
+                return
+            if self._element is None:
+                self._start_element_locked(is_dah, time_ns)
+            else:
+                self._memory[is_dah] = True
+
+    def _start_element_locked(self, is_dah: bool, start_ns: int):
+        end_ns = start_ns + (3 if is_dah else 1) * self.dot_ns
+        self._marks.append([start_ns, end_ns])
+        self._push_mark(start_ns, end_ns)
+        self._element = is_dah
+        self._next_start = end_ns + self.dot_ns
+        self._memory[is_dah] = False
+        # Режим B: сжатые лепестки, отпущенные во время элемента, дают еще один противоположный
+        if self.mode == "B" and self._down[not is_dah]:
+            self._memory[not is_dah] = True
+
+    def _choose_next_locked(self):
+        """Следующий элемент после текущего: сначала противоположный, затем повтор."""
+        opposite = not self._element
+        if self._memory[opposite] or self._down[opposite]:
+            return opposite
+        if self._memory[self._element] or self._down[self._element]:
+            return self._element
+        return None
+
+    def _advance_locked(self, until_ns: int):
+        super()._advance_locked(until_ns)
+        while self._element is not None and self._next_start <= until_ns:
+            next_element = self._choose_next_locked()
+            if next_element is None:
+                self._element = None
+                break
+            self._start_element_locked(next_element, self._next_start)
+
+
+def create_keyer(keyer_type: str, wpm=20):
+    """Создает ключ по типу: "straight" (прямой) или "iambic" (манипулятор)."""
+    if keyer_type == "iambic":
+        return IambicKeyer(wpm)
+    if keyer_type == "straight":
+        return StraightKey()
+    raise ValueError(f"Неизвестный тип ключа '{keyer_type}'")
+
+
+class SendingSession:
+    """
+    Упражнение на передачу: ключ, распознавание в реальном времени и оценка.
+
+    Опрос (poll) забирает у ключа длительности звука и пауз, переводит их
+    в символы тем же классификатором, что и декодер звука, и сверяет
+    переданный текст с заданным.
+    """
+    def __init__(self, keyer: Keyer, index, target_text: str, wpm=20):
+        """
+        Args:
+            keyer (Keyer): Прямой ключ или манипулятор.
+            index (MorseIndex): Обратный индекс набора символов.
+            target_text (str): Текст, который нужно передать.
+            wpm (float): Заданная скорость (начальная оценка длины точки).
+        """
+        self.keyer = keyer
+        self.classifier = ElementClassifier(index, wpm)
+        self.target_text = target_text
+        self._target_length = len(target_text.replace(" ", ""))
+        self._received = []
+        self._received_length = 0
+        self._marks = [] # (длительность звука в сек, была ли это точка) для оценки ритма
+
+    @property
+    def received_text(self):
+        return "".join(self._received)
+
+    def poll(self, now_ns: int):
+        """Обрабатывает новые события ключа. Возвращает распознанный с прошлого опроса текст."""
+        runs, silence_ns = self.keyer.take_runs(now_ns)
+        output = []
+        for is_mark, duration_ns in runs:
+            seconds = duration_ns / NS_PER_SECOND
+            if is_mark:
+                self._marks.append((seconds, seconds < 2 * self.classifier.dot_seconds))
+            self.classifier.classify(is_mark, seconds, output)
+        if silence_ns:
+            self.classifier.close_by_silence(silence_ns / NS_PER_SECOND, output)
+        return self._append(output)
+
+    def _append(self, output: list):
+        text = "".join(output)
+        if text:
+            self._received.append(text)
+            self._received_length += len(text.replace(" ", ""))
+        return text
+
+    def is_complete(self):
+        """Передано ли столько знаков, сколько в заданном тексте."""
+        return self._received_length >= self._target_length
+
+    def finish(self):
+        """Закрывает последний символ. Возвращает остаток распознанного текста."""
+        output = []
+        self.classifier.emit_symbol(output)
+        return self._append(output)
+
+    def get_result(self):
+        """
+        Итог упражнения.
+
+        Returns:
+            dict: accuracy (0..1, совпадение с заданным текстом), wpm (оценка
+                фактической скорости), dash_dot_ratio (отношение длительности
+                тире к точке, норма 3), dot_jitter (разброс длительности точек
+                относительно средней).
+        """
+        dots = np.array([seconds for seconds, is_dot in self._marks if is_dot])
+        dashes = np.array([seconds for seconds, is_dot in self._marks if not is_dot])
+        return {
+            "accuracy": compare_text(self.target_text, self.received_text.strip()),
+            "wpm": self.classifier.wpm,
+            "dash_dot_ratio": dashes.mean() / dots.mean() if len(dots) and len(dashes) else None,
+            "dot_jitter": dots.std() / dots.mean() if len(dots) > 1 else None,
+        }
+
+    def report(self):
+        """Возвращает текстовый отчет по упражнению."""
+        result = self.get_result()
+        lines = ["--- Передача ---",
+                 f"Задано:   {self.target_text}",
+                 f"Передано: {self.received_text.strip()}",
+                 f"Совпадение: {result['accuracy'] * 100:.1f}%, скорость: {result['wpm']:.1f} WPM"]
+        if result["dash_dot_ratio"] is not None:
+            lines.append(f"Тире/точка: {result['dash_dot_ratio']:.2f} (норма 3.00)")
+        if result["dot_jitter"] is not None:
+            lines.append(f"Разброс точек: {result['dot_jitter'] * 100:.0f}%")
+        return "\n".join(lines)
@@ -1,11 +1,32 @@
-import random
-import threading
-import time
+import numpy as np
+from .adaptive import AdaptiveSelector
+from .config_cache import flatten_char_map
+from .corpus import CorpusTextSource
+from .course import Course
+from .keyer import SendingSession, create_keyer
+from .morse_table import MorseTable, WORD_GAP
+from .morse_trie import DEFAULT_CHARSET, build_indexes
+from .playback_worker import PlaybackWorker
+from .reaction_stats import ReactionStats
+from .text_generator import ExerciseTextGenerator
 
 class MorseLogic:
     """Управляет логикой уроков, генерацией упражнений и воспроизведением."""
-    def __init__(self, characters_data: dict, lessons_data: dict, audio_player):
+    def __init__(self, characters_data: dict, lessons_data: dict, audio_player, compiled=None,
+                 session_store=None):
+        """
+        Args:
+            characters_data (dict): Содержимое characters.json.
+            lessons_data (dict): Содержимое lessons.json.
+            audio_player: Плеер для воспроизведения.
+            compiled (dict): Скомпилированная конфигурация из config_cache;
+                если передана, готовые индексы берутся из нее, а не строятся заново.
+            session_store (SessionStore): Журнал результатов (необязательно).
+        """
         self.audio_player = audio_player
+        self.session_store = session_store
+        # Текущая сессия: ID и параметры, с которыми пишутся результаты
+        self.session = None
         self.course_data = lessons_data.get("course", [])
         self.char_map = {}
 
@@ -18,14 +39,32 @@ class MorseLogic:
             "digits": characters_data.get("digits", {}),
             "signs": characters_data.get("signs", {})
         }
-        # Создаем "плоскую" версию только для быстрого поиска кода/напева
-        self._flat_char_map = {}
-        self._flat_char_map.update(self.char_map["alphabet"])
-        self._flat_char_map.update(self.char_map["digits"])
-        self._flat_char_map.update(self.char_map["signs"])
+        # "Плоская" версия для быстрого поиска кода/напева, таблица кодов и индексы курса
+        if compiled:
+            self._flat_char_map = compiled["flat_char_map"]
+            self.morse_table = compiled["morse_table"]
+            self.morse_indexes = compiled["morse_indexes"]
+            self.course = compiled["course"]
+        else:
+            self._flat_char_map = flatten_char_map(characters_data)
+            self.morse_table = MorseTable(self._flat_char_map)
+            self.morse_indexes = build_indexes(characters_data)
+            self.course = Course(self.course_data)
 
-        self.is_playing = False
-        self.playback_thread = None
+        # Один постоянный поток воспроизведения с очередью команд
+        self.playback = PlaybackWorker(self)
+        # Смещения символов текущей дорожки и число уже выведенных сэмплов
+        self.current_char_offsets = np.zeros(0, dtype=np.int64)
+        self.playback_position = 0
+        # Зерно последнего сгенерированного текста (для повтора сессии)
+        self.last_text_seed = None
+        # Адаптивный выбор знаков по ошибкам и времени реакции
+        self.adaptive = AdaptiveSelector()
+        self.reaction_stats = ReactionStats()
+        # Текущее упражнение на передачу ключом (SendingSession) или None
+        self.sending = None
+        # Файл с реальным текстом для приема (CorpusTextSource) или None - случайные группы
+        self.corpus = None
 
     def get_keyboard_layout(self):
         """
@@ -33,18 +72,28 @@ class MorseLogic:
         """
         return self.keyboard_layout
 
+    def get_decode_index(self, charset: str = DEFAULT_CHARSET):
+        """
+        Возвращает обратный индекс "код -> символ" (MorseIndex) для набора символов.
+
+        Args:
+            charset (str): "cyrillic", "latin" или "wabun". Если набор не
+                загружен, возвращается индекс кириллицы.
+        """
+        return self.morse_indexes.get(charset, self.morse_indexes[DEFAULT_CHARSET])
+
     def get_all_lessons_info(self):
         """Возвращает список ID и имен всех уроков для GUI."""
-        return [(lesson['lesson_id'], lesson['name']) for lesson in self.course_data]
+        return self.course.get_lessons_info()
 
     def get_exercises_for_lesson(self, lesson_id: int):
         """Возвращает список ID и описаний упражнений для урока."""
-        for lesson in self.course_data:
-            if lesson['lesson_id'] == lesson_id:
-                # Новая логика: ищем описания в глобальном списке по ID
-                exercise_ids = lesson.get('exercise_ids', [])
-                return [(eid, self.exercise_types.get(str(eid), {}).get('description', 'Неизвестное упр.')) for eid in exercise_ids]
-        return []
+        lesson = self.course.get_lesson(lesson_id)
+        if lesson is None:
+            return []
+        # Ищем описания в глобальном списке по ID
+        exercise_ids = lesson.get('exercise_ids', [])
+        return [(eid, self.exercise_types.get(str(eid), {}).get('description', 'Неизвестное упр.')) for eid in exercise_ids]
 
     def get_exercise_details(self, lesson_id: int, exercise_id: int):
         """Возвращает полный объект упражнения по его ID."""
@@ -55,59 +104,230 @@ class MorseLogic:
         # Возвращаем копию, чтобы случайно не изменить оригинал
         return exercise_info.copy()
 
-    def generate_exercise_text(self, chars: list, num_groups: int, group_size=5):
-        """Генерирует случайный текст для упражнения."""
-        text = ""
-        for _ in range(num_groups):
-            group = "".join(random.choices(chars, k=group_size))
-            text += group + " "
-        return text.strip()
-
-    def _play_morse_thread_target(self, text: str, on_complete_callback=None):
-        """Целевая функция для потока воспроизведения."""
-        self.is_playing = True
-        print(f"Воспроизведение: {text}")
-        for char in text:
-            if not self.is_playing:
-                print("Воспроизведение прервано.")
-                break
-                
-            if char == ' ':
-                self.audio_player.play_char_pause() # Дополнительная пауза для пробела
-                continue
-
-            morse_code = self._flat_char_map.get(char.upper(), {}).get('code')
-            if morse_code:
-                for symbol in morse_code:
-                    if symbol == '•':
-                        self.audio_player.play_dot()
-                    elif symbol == '–':
-                        self.audio_player.play_dash()
-                self.audio_player.play_char_pause()
-            time.sleep(0.1) # Небольшая задержка, чтобы не нагружать CPU
-        
-        self.is_playing = False
-        print("Воспроизведение завершено.")
+    def create_text_generator(self, chars: list, weights=None, seed=None):
+        """Создает генератор групп (см. ExerciseTextGenerator) и запоминает его зерно."""
+        generator = ExerciseTextGenerator(chars, weights=weights, seed=seed)
+        self.last_text_seed = generator.seed
+        return generator
 
-        if on_complete_callback:
-            on_complete_callback(text)
+    def generate_exercise_text(self, chars: list, num_groups: int, group_size=5, seed=None, weights=None,
+                               adaptive=False):
+        """
+        Генерирует случайный текст для упражнения.
 
-    def start_playback(self, text: str, on_complete=None):
-        """Запускает воспроизведение Морзе в отдельном потоке."""
-        if self.is_playing:
-            print("Уже идет воспроизведение. Сначала остановите.")
-            return
-        
-        self.playback_thread = threading.Thread(
-            target=self._play_morse_thread_target, 
-            args=(text, on_complete) # <-- Передаем callback в поток
-        )
-        self.playback_thread.daemon = True # Поток завершится, если закроется основное приложение
-        self.playback_thread.start()
+        Args:
+            chars (list): Пул знаков.
+            num_groups (int): Количество групп.
+            group_size (int): Размер группы.
+            seed (int): Зерно генератора; с тем же зерном текст повторяется в точности.
+                Если не задано, выбирается случайное (см. self.last_text_seed).
+            weights (list): Веса знаков пула (необязательно).
+            adaptive (bool): Взять веса из адаптивного выбора (чаще - трудные знаки).
+        """
+        if adaptive and weights is None and chars:
+            weights = self.adaptive.get_weights(chars)
+        return self.create_text_generator(chars, weights, seed).generate(num_groups, group_size)
+
+    def open_corpus(self, path: str):
+        """Подключает файл с текстом (книга, журнал QSO, позывные) как источник текста для приема."""
+        self.close_corpus()
+        self.corpus = CorpusTextSource(path)
+        print(f"Текст для приема: {path} ({self.corpus.size / 1_000_000:.1f} МБ)")
+
+    def close_corpus(self):
+        """Отключает файл с текстом: прием снова идет случайными группами."""
+        if self.corpus is not None:
+            self.corpus.close()
+            self.corpus = None
+
+    def generate_corpus_text(self, chars: list, num_words: int, seed=None):
+        """
+        Текст упражнения из подключенного файла: num_words слов подряд
+        со случайного места, только из знаков пула.
+
+        Если целых слов из знаков пула не нашлось (ранние уроки), берутся
+        части слов. Зерно, как и для групп, сохраняется в self.last_text_seed.
+
+        Returns:
+            str: Текст для воспроизведения (пустой, если подходящего текста нет).
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        self.last_text_seed = seed
+        rng = np.random.default_rng(seed)
+        text = self.corpus.generate(chars, num_words, rng)
+        if not text:
+            text = self.corpus.generate(chars, num_words, rng, whole_words=False)
+        return text
+
+    def set_char_pool(self, chars: list):
+        """Задает пул знаков упражнения для адаптивного выбора (при смене упражнения или пула)."""
+        self.adaptive.set_pool(chars)
+
+    def choose_char(self):
+        """Выбирает знак текущего пула для раунда распознавания с учетом ошибок и времени реакции."""
+        return self.adaptive.choice()
+
+    def start_session(self, mode: str, exercise_type: str, lesson_id=None):
+        """Начинает новую сессию тренировки (для журнала результатов)."""
+        wpm = self.audio_player.wpm
+        session_id = None
+        if self.session_store is not None:
+            session_id = self.session_store.start_session(mode, exercise_type, lesson_id, wpm)
+        self.session = {"session_id": session_id, "lesson_id": lesson_id, "wpm": wpm}
+
+    def record_group_reception(self, text: str, copied: str = None):
+        """Записывает в журнал результат приема групп."""
+        if self.session_store is not None and self.session is not None:
+            self.session_store.record_group(text, copied, **self.session)
+
+    def record_answer(self, char: str, correct: bool, reaction_ns=None, answer: str = None):
+        """
+        Учитывает ответ пользователя в адаптивном выборе знаков и статистике реакции.
+
+        Args:
+            char (str): Знак, который звучал.
+            correct (bool): Правильно ли ответил пользователь.
+            reaction_ns (int): Время от конца звука до ответа в наносекундах
+                (в статистику реакции попадают только правильные ответы).
+            answer (str): Знак, который выбрал пользователь (для журнала).
+        """
+        reaction_time = reaction_ns / 1_000_000_000 if reaction_ns is not None else None
+        self.adaptive.record_answer(char, correct, reaction_time)
+        if correct and reaction_ns is not None:
+            self.reaction_stats.record(char, reaction_ns)
+        if self.session_store is not None and self.session is not None:
+            reaction_ms = reaction_ns / 1_000_000 if reaction_ns is not None else None
+            self.session_store.record_answer(char, answer, correct, reaction_ms, **self.session)
+
+    def encode_text(self, text: str):
+        """
+        Кодирует текст в длительности "звук/пауза" в точках (см. MorseTable.encode).
+
+        Это единый вход для воспроизведения, экспорта и анализа тайминга:
+        длительность текста в точках - encode_text(text).total_units.
+        """
+        return self.morse_table.encode(text)
+
+    def render_text(self, text: str):
+        """
+        Рендерит весь текст в одну непрерывную дорожку float32.
+
+        Паузы представлены нулевыми сэмплами, а не вызовами sleep, поэтому
+        тайминг точен до сэмпла: 1 точка между элементами, 3 между знаками,
+        7 между словами (стандарт PARIS).
+
+        Args:
+            text (str): Текст упражнения.
+
+        Returns:
+            tuple: (samples, char_offsets), где samples - массив float32,
+                а char_offsets - массив смещений начала каждого символа
+                текста в сэмплах (len(char_offsets) == len(text)).
+        """
+        encoded = self.encode_text(text)
+        samples = self.audio_player.render_runs(encoded.runs)
+        return samples, encoded.char_offsets * self.audio_player.get_unit_samples()
+
+    def iter_render_blocks(self, text: str):
+        """
+        Рендерит текст по словам и отдает дорожку последовательными блоками.
+
+        Результат совпадает с render_text (паузы между словами те же,
+        фаза тона непрерывна), но в памяти одновременно находится только
+        одно слово - это нужно для потоковой записи длинных упражнений.
+
+        Yields:
+            np.ndarray: Очередной блок дорожки float32.
+        """
+        ap = self.audio_player
+        runs = self.encode_text(text).runs
+        # Делим по межсловным паузам: каждый кусок начинается и заканчивается звуком
+        word_gaps = np.flatnonzero(runs[1::2] >= WORD_GAP) * 2 + 1
+        start = 0
+        for gap in word_gaps.tolist():
+            yield ap.render_runs(runs[start:gap])
+            # Пауза тоже проходит через генератор, чтобы фаза шла как в render_text
+            yield ap.modulate(np.zeros(int(runs[gap]) * ap.get_unit_samples(), dtype=np.float32))
+            start = gap + 1
+        if start < len(runs):
+            yield ap.render_runs(runs[start:])
+
+    def get_sounding_char_index(self):
+        """Возвращает индекс символа текущего текста, который сейчас звучит (или -1)."""
+        if not len(self.current_char_offsets):
+            return -1
+        return int(np.searchsorted(self.current_char_offsets, self.playback_position, side='right')) - 1
+
+    def _on_playback_progress(self, played: int):
+        # Позиция того, что уже прозвучало (не записано в буфер вывода)
+        self.playback_position = played
+
+    @property
+    def is_playing(self):
+        """Идет ли воспроизведение (или ждут задания в очереди)."""
+        return self.playback.is_busy
+
+    def start_playback(self, text: str, on_complete=None, pause_after=0.0, repeats=1, repeat_pause=0.0):
+        """
+        Прерывает текущее воспроизведение и сразу проигрывает text.
+
+        Args:
+            text (str): Текст для воспроизведения.
+            on_complete (callable): Вызывается с text после окончания (или прерывания/отмены).
+            pause_after (float): Тишина после текста в секундах (до следующего задания).
+            repeats (int): Сколько раз проиграть text; все повторы - одна дорожка.
+            repeat_pause (float): Тишина между повторами в секундах.
+
+        Returns:
+            PlaybackItem: Задание; после окончания в нем будет tone_end_ns.
+        """
+        return self.playback.play(text, on_complete, pause_after, repeats, repeat_pause)
+
+    def enqueue_playback(self, text: str, on_complete=None, pause_after=0.0, repeats=1, repeat_pause=0.0):
+        """Ставит text в очередь после уже запланированного воспроизведения. Возвращает задание."""
+        return self.playback.enqueue(text, on_complete, pause_after, repeats, repeat_pause)
 
     def stop_playback(self):
-        """Останавливает текущее воспроизведение."""
-        self.is_playing = False
+        """Останавливает текущее воспроизведение и очищает очередь."""
+        self.playback.stop()
+
+    # --- Передача ключом ---
+    def start_sending(self, text: str, keyer_type="straight", charset: str = DEFAULT_CHARSET):
+        """
+        Начинает упражнение на передачу: создает ключ и включает самоконтроль.
+
+        Args:
+            text (str): Текст, который нужно передать.
+            keyer_type (str): "straight" (прямой ключ) или "iambic" (манипулятор).
+            charset (str): Набор символов для распознавания.
+
+        Returns:
+            SendingSession: Сессия; события ключа передаются в sending.keyer.contact.
+        """
+        self.stop_sending()
+        self.stop_playback()
+        wpm = self.audio_player.wpm
+        keyer = create_keyer(keyer_type, wpm)
+        self.sending = SendingSession(keyer, self.get_decode_index(charset), text, wpm)
+        self.audio_player.start_sidetone(keyer)
+        return self.sending
+
+    def stop_sending(self):
+        """
+        Завершает упражнение на передачу и записывает результат в журнал.
+
+        Returns:
+            SendingSession: Завершенная сессия или None, если передачи не было.
+        """
+        session = self.sending
+        if session is None:
+            return None
+        self.sending = None
+        self.audio_player.stop_sidetone()
+        session.finish()
+        self.record_group_reception(session.target_text, copied=session.received_text.strip())
+        return session
 
     def get_char_details(self, char: str):
         """Возвращает детали для одного символа (код и напев)."""
@@ -136,19 +356,12 @@ class MorseLogic:
             return custom_list
             
         elif mode == "base":
-            # --- Старая логика для режима "База" ---
+            # --- Режим "База": готовые пулы из индекса курса ---
             if exercise_type in ["study", "single_char_recognition_lesson"]:
-                for lesson in self.course_data:
-                    if lesson['lesson_id'] == lesson_id:
-                        return lesson.get('new_chars', [])
-                return []
+                return self.course.get_new_chars(lesson_id)
             
-            elif exercise_type in ["single_char_recognition_cumulative", "group_reception"]:
-                cumulative_chars = []
-                for lesson in self.course_data:
-                    if lesson['lesson_id'] <= lesson_id:
-                        cumulative_chars.extend(lesson.get('new_chars', []))
-                return list(dict.fromkeys(cumulative_chars))
+            elif exercise_type in ["single_char_recognition_cumulative", "group_reception", "sending"]:
+                return self.course.get_cumulative_chars(lesson_id)
             
         return []
 
@@ -0,0 +1,174 @@
+import numpy as np
+
+# Символы, которыми в characters.json записываются точки и тире
+DOT_SYMBOLS = "•."
+DASH_SYMBOLS = "–-—"
+
+# Паузы в точках (единицах PARIS)
+ELEMENT_GAP = 1
+CHAR_GAP = 3
+WORD_GAP = 7
+
+# Скобки слитного знака (просигнала): <SK> передается без межзнаковых пауз
+PROSIGN_OPEN = "<"
+PROSIGN_CLOSE = ">"
+
+
+class EncodedText:
+    """
+    Результат кодирования текста.
+
+    Attributes:
+        runs (np.ndarray): Длительности в точках, поочередно "звук"/"пауза",
+            начиная и заканчивая звуком (int32). Пустой массив, если кодировать нечего.
+        char_offsets (np.ndarray): Для каждого символа текста - смещение в точках:
+            начало звучания для кодируемых символов и конец предыдущего звука
+            для пробелов и неизвестных символов (int64, len == len(text)).
+        total_units (int): Общая длительность в точках.
+    """
+    def __init__(self, runs, char_offsets):
+        self.runs = runs
+        self.char_offsets = char_offsets
+        self.total_units = int(runs.sum()) if len(runs) else 0
+
+    @property
+    def marks(self):
+        """Длительности звучащих элементов (в точках)."""
+        return self.runs[0::2]
+
+    @property
+    def spaces(self):
+        """Длительности пауз между элементами (в точках)."""
+        return self.runs[1::2]
+
+
+class MorseTable:
+    """
+    Компактная таблица кодов Морзе на массивах NumPy.
+
+    Строится один раз из "плоской" карты символов. Каждый символ получает
+    номер, его элементы хранятся подряд в общем массиве длительностей
+    (1 - точка, 3 - тире), а таблица кодовых точек Unicode позволяет
+    закодировать весь текст за один векторизованный проход без цикла по символам.
+    """
+    def __init__(self, flat_char_map: dict):
+        codes = []
+        chars = []
+        for char, details in flat_char_map.items():
+            elements = self._parse_code(details.get('code', ''))
+            if elements:
+                chars.append(char)
+                codes.append(elements)
+
+        self.chars = chars
+        self.lengths = np.array([len(code) for code in codes], dtype=np.int32)
+        self.starts = np.zeros(len(codes), dtype=np.int64)
+        if len(codes):
+            self.starts[1:] = np.cumsum(self.lengths)[:-1]
+        self.elements = np.array([unit for code in codes for unit in code], dtype=np.int32)
+
+        # Таблица "кодовая точка -> номер символа" (-1 - нет в таблице)
+        variants = {}
+        for index, char in enumerate(chars):
+            for variant in {char, char.upper(), char.lower()}:
+                if len(variant) == 1:
+                    variants.setdefault(variant, index)
+        size = max((ord(c) for c in variants), default=0) + 1
+        self.lookup = np.full(size, -1, dtype=np.int32)
+        for char, index in variants.items():
+            self.lookup[ord(char)] = index
+
+    @staticmethod
+    def _parse_code(code: str):
+        """Переводит строку кода в список длительностей элементов (в точках)."""
+        units = []
+        for symbol in code:
+            if symbol in DOT_SYMBOLS:
+                units.append(1)
+            elif symbol in DASH_SYMBOLS:
+                units.append(3)
+        return units
+
+    def get_units(self, char: str):
+        """Возвращает длительности элементов одного символа (или пустой список)."""
+        code_point = ord(char) if len(char) == 1 else -1
+        if not 0 <= code_point < len(self.lookup) or self.lookup[code_point] < 0:
+            return []
+        index = self.lookup[code_point]
+        return self.elements[self.starts[index]:self.starts[index] + self.lengths[index]].tolist()
+
+    def can_encode(self, char: str):
+        """Есть ли у символа (или просигнала вида <SK>) код в таблице."""
+        return len(self.encode(char).runs) > 0
+
+    def encode(self, text: str):
+        """
+        Кодирует весь текст в массив длительностей "звук/пауза" одним проходом.
+
+        Между элементами знака - 1 точка, между знаками - 3, между словами - 7.
+        Знаки внутри угловых скобок (<SK>) передаются слитно, как один просигнал.
+
+        Returns:
+            EncodedText: Длительности и смещения символов в точках.
+        """
+        n = len(text)
+        if n == 0:
+            return EncodedText(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64))
+
+        code_points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        in_table = code_points < len(self.lookup)
+        indices = np.full(n, -1, dtype=np.int32)
+        indices[in_table] = self.lookup[code_points[in_table]]
+        coded = indices >= 0
+        positions = np.flatnonzero(coded)       # Позиции кодируемых символов в тексте
+        char_ids = indices[positions]
+
+        if len(positions) == 0:
+            return EncodedText(np.zeros(0, dtype=np.int32), np.zeros(n, dtype=np.int64))
+
+        # --- Паузы перед каждым кодируемым символом ---
+        spaces_before = np.cumsum(code_points == ord(' '))
+        opened = np.cumsum(code_points == ord(PROSIGN_OPEN))
+        closed = np.cumsum(code_points == ord(PROSIGN_CLOSE))
+        inside_prosign = opened > closed
+
+        gaps = np.full(len(positions), CHAR_GAP, dtype=np.int32)
+        gaps[0] = 0
+        prev, cur = positions[:-1], positions[1:]
+        same_prosign = (inside_prosign[prev] & inside_prosign[cur]
+                        & (opened[prev] == opened[cur]) & (closed[prev] == closed[cur]))
+        gaps[1:][same_prosign] = ELEMENT_GAP
+        gaps[1:][spaces_before[cur] > spaces_before[prev]] = WORD_GAP
+
+        # --- Разворачиваем символы в элементы ---
+        counts = self.lengths[char_ids]
+        total_elements = int(counts.sum())
+        first_element = np.zeros(len(char_ids), dtype=np.int64)
+        first_element[1:] = np.cumsum(counts)[:-1]
+        element_source = (np.repeat(self.starts[char_ids], counts)
+                          + np.arange(total_elements) - np.repeat(first_element, counts))
+        marks = self.elements[element_source]
+
+        spaces = np.full(max(total_elements - 1, 0), ELEMENT_GAP, dtype=np.int32)
+        # Пауза перед первым элементом символа (кроме самого первого) - межзнаковая/межсловная
+        spaces[first_element[1:] - 1] = gaps[1:]
+
+        runs = np.empty(2 * total_elements - 1, dtype=np.int32)
+        runs[0::2] = marks
+        runs[1::2] = spaces
+
+        # --- Смещения символов в точках ---
+        run_starts = np.zeros(len(runs) + 1, dtype=np.int64)
+        np.cumsum(runs, out=run_starts[1:])
+        coded_offsets = run_starts[2 * first_element]
+        last_element = first_element + counts - 1
+        coded_ends = run_starts[2 * last_element] + marks[last_element]
+
+        char_offsets = np.zeros(n, dtype=np.int64)
+        char_offsets[positions] = coded_offsets
+        # Некодируемые символы получают конец предыдущего звука (или 0 в начале)
+        previous_coded = np.cumsum(coded) - 1
+        uncoded = ~coded
+        ends = np.concatenate(([0], coded_ends))
+        char_offsets[uncoded] = ends[previous_coded[uncoded] + 1]
+        return EncodedText(runs, char_offsets)
@@ -0,0 +1,114 @@
+import numpy as np
+from .morse_table import DOT_SYMBOLS, DASH_SYMBOLS
+
+# Название встроенного набора символов из config/characters.json
+DEFAULT_CHARSET = "cyrillic"
+# Ключ пустого кода: единичный бит-маркер, за которым дописываются элементы
+START_KEY = 1
+# Ключ "вне таблицы": код длиннее самого длинного в наборе
+INVALID_KEY = 0
+
+
+class MorseIndex:
+    """
+    Обратный индекс "код -> символ" в виде двоичного дерева на массиве.
+
+    Код упаковывается в целое число: маркерный бит 1, затем по биту на
+    элемент (0 - точка, 1 - тире). Это неявное двоичное дерево: у узла k
+    дети 2k (точка) и 2k+1 (тире), поэтому следующий элемент - это один
+    сдвиг, а поиск символа - одно обращение к массиву. Строки кода при
+    приеме не строятся вовсе, символ можно определять по мере поступления
+    элементов (advance/lookup).
+    """
+    def __init__(self, entries):
+        """
+        Args:
+            entries (list): Пары (символ, строка кода). При совпадении кодов
+                остается первый символ (разделы идут в порядке важности).
+        """
+        codes = []
+        for char, code in entries:
+            key = self.key_from_code(code)
+            if key != START_KEY:
+                codes.append((char, key))
+
+        self.max_length = max((key.bit_length() - 1 for _, key in codes), default=0)
+        size = 1 << (self.max_length + 1)
+        self.chars = []
+        self._table = np.full(size, -1, dtype=np.int32)   # ключ -> номер символа
+        self._has_children = np.zeros(size, dtype=bool)     # есть ли более длинные коды
+        for char, key in codes:
+            if self._table[key] < 0:
+                self._table[key] = len(self.chars)
+                self.chars.append(char)
+            parent = key >> 1
+            while parent >= START_KEY and not self._has_children[parent]:
+                self._has_children[parent] = True
+                parent >>= 1
+
+    @staticmethod
+    def key_from_code(code: str):
+        """Упаковывает строку кода ('•–', '.-') в ключ индекса."""
+        key = START_KEY
+        for symbol in code:
+            if symbol in DOT_SYMBOLS:
+                key <<= 1
+            elif symbol in DASH_SYMBOLS:
+                key = (key << 1) | 1
+        return key
+
+    def advance(self, key: int, is_dash: bool):
+        """Добавляет к ключу следующий элемент. INVALID_KEY - такого кода нет."""
+        if key == INVALID_KEY:
+            return INVALID_KEY
+        key = (key << 1) | is_dash
+        return key if key < len(self._table) else INVALID_KEY
+
+    def lookup(self, key: int):
+        """Возвращает символ для ключа или None."""
+        if key <= INVALID_KEY or key >= len(self._table):
+            return None
+        index = self._table[key]
+        return self.chars[index] if index >= 0 else None
+
+    def has_continuation(self, key: int):
+        """
+        Может ли код с этим префиксом продолжиться.
+
+        Если нет, символ известен сразу после последнего элемента,
+        не дожидаясь межзнаковой паузы (удобно для ключа и манипулятора).
+        """
+        return INVALID_KEY < key < len(self._has_children) and bool(self._has_children[key])
+
+    def decode_units(self, units):
+        """Возвращает символ для последовательности длительностей элементов (1/3) или None."""
+        key = START_KEY
+        for unit in units:
+            key = self.advance(key, unit >= 3)
+        return self.lookup(key)
+
+
+def _section_entries(sections: dict):
+    entries = []
+    for section in ("alphabet", "digits", "signs"):
+        entries.extend((char, details.get('code', '')) for char, details in sections.get(section, {}).items())
+    return entries
+
+
+def build_indexes(characters_data: dict, charsets_data: dict = None):
+    """
+    Строит индексы для всех наборов символов.
+
+    Кириллица берется из characters.json, остальные наборы (латиница,
+    вабун) - из charsets.json. Просигналы добавляются в каждый набор
+    последними, поэтому совпадающие с ними знаки препинания остаются.
+
+    Returns:
+        dict: {название набора: MorseIndex}.
+    """
+    charsets_data = charsets_data or {}
+    prosigns = [(char, details.get('code', '')) for char, details in charsets_data.get("prosigns", {}).items()]
+    indexes = {DEFAULT_CHARSET: MorseIndex(_section_entries(characters_data) + prosigns)}
+    for name, sections in charsets_data.get("charsets", {}).items():
+        indexes[name] = MorseIndex(_section_entries(sections) + prosigns)
+    return indexes
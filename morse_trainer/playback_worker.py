@@ -0,0 +1,217 @@
+import itertools
+import threading
+from collections import deque
+import numpy as np
+from .event_bus import CharSounding, PlaybackError, PlaybackFinished, PlaybackStarted
+
+class PlaybackItem:
+    """Одно задание на воспроизведение в очереди."""
+    __slots__ = ("text", "on_complete", "pause_after", "repeats", "repeat_pause", "epoch", "tone_end_ns")
+
+    def __init__(self, text: str, on_complete=None, pause_after=0.0, epoch=0, repeats=1, repeat_pause=0.0):
+        self.text = text
+        self.on_complete = on_complete
+        self.pause_after = pause_after # Тишина после текста (сек), входит в задание
+        # Повторы текста одной дорожкой: repeats раз с паузой repeat_pause (сек) между ними
+        self.repeats = repeats
+        self.repeat_pause = repeat_pause
+        self.epoch = epoch
+        # Момент (perf_counter_ns) окончания звука по часам устройства; None - еще не доиграно
+        self.tone_end_ns = None
+
+
+class PlaybackWorker:
+    """
+    Постоянный поток воспроизведения с очередью команд.
+
+    Вместо нового потока на каждое воспроизведение один фоновый поток
+    берет задания из очереди и проигрывает их одно за другим. Прерванное
+    задание само сбрасывает уже записанный звук (см. AudioPlayer.play_samples),
+    поэтому команды не трогают приемник. Команды:
+        play    - прервать текущее, очистить очередь и играть сразу;
+        enqueue - добавить в конец очереди;
+        replace - заменить еще не начатые задания (текущее доигрывается);
+        flush   - удалить еще не начатые задания;
+        stop    - прервать текущее и очистить очередь.
+
+    Колбэк завершения вызывается для каждого задания, даже прерванного или
+    снятого с очереди, чтобы цепочки вида "повторить и закрыть окно" не
+    зависали. Если задана шина событий (set_event_bus), поток публикует в нее
+    PlaybackStarted, CharSounding, PlaybackFinished (с колбэком задания)
+    и PlaybackError, а главный цикл Tk обрабатывает их у себя. Без шины
+    колбэки вызываются прямо в потоке воспроизведения.
+    """
+    def __init__(self, logic):
+        """
+        Args:
+            logic (MorseLogic): Источник рендеринга (render_text) и плеера.
+        """
+        self.logic = logic
+        self._pending = deque()
+        self._condition = threading.Condition()
+        # Номер "эпохи": play/stop увеличивают его, и все задания старой эпохи прерываются
+        self._epoch = itertools.count(1)
+        self._current_epoch = 0
+        self._current = None
+        self._event_bus = None
+        self._thread = None
+
+    # --- Управление потоком ---
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="MorsePlayback", daemon=True)
+            self._thread.start()
+
+    def set_event_bus(self, event_bus):
+        """Задает шину событий для интерфейса (None - колбэки вызываются сразу)."""
+        self._event_bus = event_bus
+
+    @property
+    def is_busy(self):
+        """Идет ли воспроизведение или есть ожидающие задания."""
+        with self._condition:
+            return self._current is not None or bool(self._pending)
+
+    def is_item_active(self, item: PlaybackItem):
+        """Не было ли задание прервано командой play/stop."""
+        return item.epoch == self._current_epoch
+
+    # --- Команды ---
+    def play(self, text: str, on_complete=None, pause_after=0.0, repeats=1, repeat_pause=0.0):
+        """Прерывает текущее воспроизведение, очищает очередь и играет text."""
+        with self._condition:
+            dropped = self._interrupt_locked()
+            item = self._append_locked(text, on_complete, pause_after, repeats, repeat_pause)
+        self._deliver_dropped(dropped)
+        return item
+
+    def enqueue(self, text: str, on_complete=None, pause_after=0.0, repeats=1, repeat_pause=0.0):
+        """Добавляет text в конец очереди (без пауз и без потери заданий)."""
+        with self._condition:
+            return self._append_locked(text, on_complete, pause_after, repeats, repeat_pause)
+
+    def replace(self, text: str, on_complete=None, pause_after=0.0):
+        """Заменяет ожидающие задания на text; текущее задание доигрывается."""
+        with self._condition:
+            dropped = self._take_pending_locked()
+            item = self._append_locked(text, on_complete, pause_after)
+        self._deliver_dropped(dropped)
+        return item
+
+    def flush(self):
+        """Удаляет еще не начатые задания."""
+        with self._condition:
+            dropped = self._take_pending_locked()
+        self._deliver_dropped(dropped)
+
+    def stop(self):
+        """Прерывает текущее воспроизведение и очищает очередь."""
+        with self._condition:
+            dropped = self._interrupt_locked()
+            self._condition.notify_all()
+        self._deliver_dropped(dropped)
+
+    def wait_idle(self, timeout=None):
+        """Ждет, пока очередь опустеет и текущее задание завершится."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._current is None and not self._pending, timeout)
+
+    def _take_pending_locked(self):
+        dropped = list(self._pending)
+        self._pending.clear()
+        return dropped
+
+    def _interrupt_locked(self):
+        self._current_epoch = next(self._epoch)
+        return self._take_pending_locked()
+
+    def _deliver_dropped(self, dropped):
+        # Колбэк получает каждое задание - доиграно оно, прервано или снято с очереди
+        for item in dropped:
+            self._finish(item, completed=False)
+
+    def _append_locked(self, text, on_complete, pause_after, repeats=1, repeat_pause=0.0):
+        self._ensure_thread()
+        item = PlaybackItem(text, on_complete, pause_after, self._current_epoch, repeats, repeat_pause)
+        self._pending.append(item)
+        self._condition.notify_all()
+        return item
+
+    # --- Поток воспроизведения ---
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                item = self._pending.popleft()
+                self._current = item
+            completed = False
+            try:
+                completed = self._play_item(item)
+            except Exception as e:
+                print(f"Ошибка воспроизведения: {e}")
+                self._publish(PlaybackError(item.text, str(e)))
+            finally:
+                self._finish(item, completed)
+                with self._condition:
+                    self._current = None
+                    self._condition.notify_all()
+
+    def _play_item(self, item: PlaybackItem):
+        """Проигрывает задание. Возвращает True, если оно доиграно до конца."""
+        logic = self.logic
+        print(f"Воспроизведение: {item.text}")
+        player = logic.audio_player
+        samples, char_offsets = logic.render_text(item.text)
+        # Длина одного повтора с паузой после него: смещения знаков даны для первого
+        period = max(len(samples), 1)
+        if item.repeats > 1:
+            # Повторы - одна дорожка: между ними нет стыков очереди и задержек потока
+            gap = np.zeros(int(item.repeat_pause * player.sample_rate), dtype=np.float32)
+            period += len(gap)
+            samples = np.concatenate([samples, gap] * (item.repeats - 1) + [samples])
+        tone_length = len(samples)
+        if item.pause_after > 0:
+            pause = np.zeros(int(item.pause_after * player.sample_rate), dtype=np.float32)
+            samples = np.concatenate((samples, pause))
+        logic.current_char_offsets = char_offsets
+        logic.playback_position = 0
+        sounding = [None]
+
+        def on_progress(played: int):
+            # played - сколько сэмплов уже прозвучало (не записано), см. AudioPlayer.play_samples
+            if sounding[0] is None:
+                if played <= 0:
+                    return
+                sounding[0] = -1
+                self._publish(PlaybackStarted(item.text))
+            # Позиция внутри текущего повтора (последний повтор - до конца звука)
+            position = min(played, tone_length)
+            logic._on_playback_progress(position - min(position // period, item.repeats - 1) * period)
+            # О смене звучащего знака сообщаем один раз; частые события схлопнет шина
+            index = logic.get_sounding_char_index()
+            if index != sounding[0] and index < len(item.text):
+                sounding[0] = index
+                self._publish(CharSounding(item.text, index))
+
+        written = player.play_samples(
+            samples,
+            should_continue=lambda: self.is_item_active(item),
+            on_progress=on_progress
+        )
+        if written < len(samples):
+            print("Воспроизведение прервано.")
+            return False
+        item.tone_end_ns = player.get_track_time_ns(tone_length)
+        print("Воспроизведение завершено.")
+        return True
+
+    def _publish(self, event):
+        if self._event_bus is not None:
+            self._event_bus.publish(event)
+
+    def _finish(self, item: PlaybackItem, completed: bool):
+        """Сообщает о завершении задания: в шину событий или прямым вызовом колбэка."""
+        if self._event_bus is not None:
+            self._event_bus.publish(PlaybackFinished(item.text, completed, item.on_complete))
+        elif item.on_complete:
+            item.on_complete(item.text)
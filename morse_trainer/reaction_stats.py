@@ -0,0 +1,91 @@
+from array import array
+import numpy as np
+
+# Границы корзин гистограммы по умолчанию (мс): логарифмическая шкала от 50 мс до 10 с
+DEFAULT_BIN_EDGES_MS = np.concatenate(([0.0], np.geomspace(50, 10_000, 16)))
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class ReactionStats:
+    """
+    Времена реакции на знаки в раундах распознавания.
+
+    Запись - это добавление целого числа наносекунд в array('q') знака,
+    поэтому она почти ничего не стоит в обработчике событий Tk. Перцентили
+    и гистограммы считаются NumPy только по запросу.
+    """
+    def __init__(self):
+        self._samples = {} # знак -> array('q') времен реакции в нс
+
+    def record(self, char: str, latency_ns: int):
+        """Добавляет время реакции (нс) для знака."""
+        samples = self._samples.get(char)
+        if samples is None:
+            samples = self._samples[char] = array('q')
+        samples.append(latency_ns)
+
+    def clear(self):
+        self._samples.clear()
+
+    def chars(self):
+        """Знаки, для которых есть замеры."""
+        return list(self._samples)
+
+    def get_samples_ms(self, char=None):
+        """Все замеры знака (или всех знаков, если char=None) в миллисекундах."""
+        if char is None:
+            arrays = [np.frombuffer(s, dtype=np.int64) for s in self._samples.values() if len(s)]
+            samples = np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+        else:
+            samples = np.frombuffer(self._samples.get(char, array('q')), dtype=np.int64)
+        return samples / 1_000_000
+
+    def percentiles(self, char=None, percents=DEFAULT_PERCENTILES):
+        """
+        Возвращает перцентили времени реакции в мс.
+
+        Returns:
+            dict: {перцентиль: мс} или пустой словарь, если замеров нет.
+        """
+        samples = self.get_samples_ms(char)
+        if not len(samples):
+            return {}
+        return dict(zip(percents, np.percentile(samples, percents).tolist()))
+
+    def histogram(self, char=None, bin_edges_ms=DEFAULT_BIN_EDGES_MS):
+        """
+        Возвращает гистограмму времени реакции.
+
+        Returns:
+            tuple: (границы корзин в мс, количество замеров в каждой корзине).
+                Замеры больше последней границы попадают в последнюю корзину.
+        """
+        samples = self.get_samples_ms(char)
+        clipped = np.minimum(samples, bin_edges_ms[-1])
+        counts, _ = np.histogram(clipped, bins=bin_edges_ms)
+        return bin_edges_ms, counts
+
+    def summary(self):
+        """Сводка по знакам: {знак: {"count", "p50", "p90", "p99"}} (мс)."""
+        result = {}
+        for char in sorted(self._samples):
+            entry = {"count": len(self._samples[char])}
+            entry.update({f"p{p}": value for p, value in self.percentiles(char).items()})
+            result[char] = entry
+        return result
+
+    def report(self, width=30):
+        """Возвращает текстовый отчет: перцентили по знакам и общую гистограмму."""
+        lines = ["--- Время реакции ---",
+                 f"{'Знак':<6}{'Ответов':>9}{'p50, мс':>10}{'p90, мс':>10}{'p99, мс':>10}"]
+        for char, entry in self.summary().items():
+            lines.append(f"{char:<6}{entry['count']:>9}{entry.get('p50', 0):10.0f}"
+                         f"{entry.get('p90', 0):10.0f}{entry.get('p99', 0):10.0f}")
+
+        edges, counts = self.histogram()
+        peak = counts.max() if len(counts) and counts.max() else 1
+        for low, high, count in zip(edges[:-1], edges[1:], counts):
+            if count:
+                bar = "#" * max(1, int(count * width / peak))
+                lines.append(f"{low:7.0f}-{high:<7.0f} мс {count:>5} {bar}")
+        return "\n".join(lines)
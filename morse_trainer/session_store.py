@@ -0,0 +1,253 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from .utils import user_data_dir
+
+STORE_FILE_NAME = "sessions.sqlite3"
+SECONDS_PER_DAY = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id            INTEGER PRIMARY KEY,
+    started_at    REAL NOT NULL,
+    mode          TEXT,
+    exercise_type TEXT,
+    lesson_id     INTEGER,
+    wpm           INTEGER
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL NOT NULL,
+    session_id  INTEGER,
+    lesson_id   INTEGER,
+    wpm         INTEGER,
+    char        TEXT NOT NULL,
+    answer      TEXT,
+    correct     INTEGER NOT NULL,
+    reaction_ms REAL
+);
+CREATE TABLE IF NOT EXISTS group_results (
+    id         INTEGER PRIMARY KEY,
+    ts         REAL NOT NULL,
+    session_id INTEGER,
+    lesson_id  INTEGER,
+    wpm        INTEGER,
+    text       TEXT NOT NULL,
+    copied     TEXT,
+    accuracy   REAL
+);
+-- Индексы покрывают запросы вида "точность/время реакции по знакам за N дней" без чтения таблицы
+DROP INDEX IF EXISTS answers_ts;
+DROP INDEX IF EXISTS answers_char;
+CREATE INDEX IF NOT EXISTS answers_ts_reaction ON answers (ts, char, correct, reaction_ms);
+CREATE INDEX IF NOT EXISTS answers_char_reaction ON answers (char, ts, correct, reaction_ms);
+CREATE INDEX IF NOT EXISTS answers_lesson ON answers (lesson_id, wpm, ts, char, correct);
+CREATE INDEX IF NOT EXISTS answers_wpm ON answers (wpm, ts, char, correct);
+CREATE INDEX IF NOT EXISTS group_results_ts ON group_results (ts);
+"""
+
+
+def get_store_path():
+    return os.path.join(user_data_dir(), STORE_FILE_NAME)
+
+
+def score_copy(text: str, copied: str):
+    """Доля знаков text, которые совпали с принятым текстом на тех же позициях."""
+    sent = text.replace(" ", "")
+    received = (copied or "").replace(" ", "").upper()
+    if not sent:
+        return None
+    matches = sum(1 for a, b in zip(sent, received) if a == b)
+    return matches / len(sent)
+
+
+class SessionStore:
+    """
+    Журнал результатов тренировок в SQLite (режим WAL).
+
+    Запись не блокирует интерфейс: строки складываются в очередь, а фоновый
+    поток пишет их пачками в одной транзакции (по batch_size строк или раз
+    в flush_interval секунд). Запросы из любого потока идут через одно
+    соединение для чтения под блокировкой; благодаря WAL чтение не ждет записи.
+    """
+    def __init__(self, path: str = None, batch_size=256, flush_interval=1.0):
+        self.path = path or get_store_path()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = self._connect()
+        connection.executescript(_SCHEMA)
+        connection.close()
+
+        self._queue = queue.SimpleQueue()
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="SessionStore", daemon=True)
+        self._writer.start()
+
+    def _connect(self, check_same_thread=True):
+        connection = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # В WAL режиме NORMAL безопасен для целостности и намного быстрее FULL
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # --- Запись (из любого потока, без ожидания) ---
+    def start_session(self, mode: str, exercise_type: str, lesson_id=None, wpm=None):
+        """Регистрирует новую сессию. Возвращает ее ID."""
+        session_id = time.time_ns() // 1000
+        self._queue.put(("sessions", (session_id, time.time(), mode, exercise_type, lesson_id, wpm)))
+        return session_id
+
+    def record_answer(self, char: str, answer: str, correct: bool, reaction_ms=None,
+                      session_id=None, lesson_id=None, wpm=None):
+        """Добавляет ответ раунда распознавания."""
+        self._queue.put(("answers", (time.time(), session_id, lesson_id, wpm, char, answer,
+                                     int(bool(correct)), reaction_ms)))
+
+    def record_group(self, text: str, copied: str = None, session_id=None, lesson_id=None, wpm=None):
+        """Добавляет результат приема групп (copied - принятый текст, если он введен)."""
+        accuracy = score_copy(text, copied) if copied is not None else None
+        self._queue.put(("group_results", (time.time(), session_id, lesson_id, wpm, text, copied, accuracy)))
+
+    # --- Фоновый поток записи ---
+    _INSERTS = {
+        "sessions": "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+        "answers": "INSERT INTO answers (ts, session_id, lesson_id, wpm, char, answer, correct, reaction_ms) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        "group_results": "INSERT INTO group_results (ts, session_id, lesson_id, wpm, text, copied, accuracy) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+    }
+
+    def _write_loop(self):
+        connection = self._connect()
+        batch = []
+        waiters = []
+        stop = False
+        while not stop:
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                if isinstance(entry, threading.Event):
+                    waiters.append(entry)
+                    break
+                batch.append(entry)
+
+            if batch:
+                self._write_batch(connection, batch)
+                batch = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+        # Обновляет статистику индексов для планировщика запросов (дешево, если не нужно)
+        connection.execute("PRAGMA optimize")
+        connection.close()
+
+    def _write_batch(self, connection, batch: list):
+        """
+        Пишет пачку одной транзакцией. Если она не прошла, строки пишутся
+        по одной, чтобы из-за одной плохой строки не потерять всю пачку.
+        """
+        try:
+            with connection:
+                for table, row in batch:
+                    connection.execute(self._INSERTS[table], row)
+            return
+        except sqlite3.Error as e:
+            print(f"Ошибка записи статистики: {e}. Запись по одной строке.")
+        for table, row in batch:
+            try:
+                with connection:
+                    connection.execute(self._INSERTS[table], row)
+            except sqlite3.Error as e:
+                print(f"Строка статистики не записана ({table}: {row}): {e}")
+
+    def flush(self, timeout=5.0):
+        """Ждет, пока все уже поставленные в очередь записи попадут в базу."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Дописывает очередь и закрывает базу."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=5.0)
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    # --- Запросы ---
+    def _query(self, sql: str, params=()):
+        self.flush()
+        # Соединение общее для всех потоков (его можно закрыть из любого), поэтому запросы идут по очереди
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = self._connect(check_same_thread=False)
+            return self._reader.execute(sql, params).fetchall()
+
+    def accuracy_by_char(self, days=30, lesson_id=None, wpm=None):
+        """
+        Точность по знакам за последние days дней.
+
+        Returns:
+            dict: {знак: (ответов, правильных, доля правильных)}.
+        """
+        conditions = ["ts >= ?"]
+        params = [time.time() - days * SECONDS_PER_DAY]
+        if lesson_id is not None:
+            conditions.append("lesson_id = ?")
+            params.append(lesson_id)
+        if wpm is not None:
+            conditions.append("wpm = ?")
+            params.append(wpm)
+        rows = self._query(
+            f"SELECT char, COUNT(*), SUM(correct) FROM answers WHERE {' AND '.join(conditions)} GROUP BY char",
+            params)
+        return {char: (total, correct, correct / total) for char, total, correct in rows}
+
+    def daily_accuracy(self, char: str = None, days=30):
+        """
+        Точность по дням (локальное время) за последние days дней.
+
+        Returns:
+            list: [(дата 'ГГГГ-ММ-ДД', ответов, доля правильных), ...] по возрастанию даты.
+        """
+        conditions = ["ts >= ?"]
+        params = [time.time() - days * SECONDS_PER_DAY]
+        if char is not None:
+            conditions.append("char = ?")
+            params.append(char)
+        rows = self._query(
+            "SELECT date(ts, 'unixepoch', 'localtime') AS day, COUNT(*), AVG(correct) FROM answers "
+            f"WHERE {' AND '.join(conditions)} GROUP BY day ORDER BY day",
+            params)
+        return [tuple(row) for row in rows]
+
+    def reaction_by_char(self, days=30):
+        """Среднее время правильного ответа (мс) по знакам за последние days дней."""
+        rows = self._query(
+            "SELECT char, AVG(reaction_ms) FROM answers WHERE ts >= ? AND correct = 1 "
+            "AND reaction_ms IS NOT NULL GROUP BY char",
+            (time.time() - days * SECONDS_PER_DAY,))
+        return dict(rows)
@@ -0,0 +1,52 @@
+import time
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """
+    Замеряет время фаз запуска приложения (импорты, инициализация, первая отрисовка).
+
+    По умолчанию выключен и почти ничего не стоит; включается флагом
+    --profile-startup в main.py.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.start_time = time.perf_counter()
+        self.records = [] # (название фазы, начало от старта, длительность) в секундах
+
+    def enable(self):
+        self.enabled = True
+
+    @contextmanager
+    def phase(self, name: str):
+        """Контекстный менеджер: замеряет длительность блока кода."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            self.records.append((name, started - self.start_time, finished - started))
+
+    def mark(self, name: str):
+        """Отмечает момент времени (фаза нулевой длительности)."""
+        if self.enabled:
+            self.records.append((name, time.perf_counter() - self.start_time, 0.0))
+
+    def report(self):
+        """Возвращает текстовый отчет по всем замерам."""
+        lines = ["--- Профиль запуска ---",
+                 f"{'Фаза':<40}{'Старт, мс':>12}{'Длит., мс':>12}"]
+        for name, offset, duration in self.records:
+            duration_text = f"{duration * 1000:12.1f}" if duration else f"{'':>12}"
+            lines.append(f"{name:<40}{offset * 1000:12.1f}{duration_text}")
+        return "\n".join(lines)
+
+    def print_report(self):
+        if self.enabled:
+            print(self.report())
+
+
+# Общий профилировщик процесса
+profiler = StartupProfiler()
@@ -0,0 +1,248 @@
+import numpy as np
+
+# Размер волновой таблицы (одного периода)
+TABLE_SIZE = 4096
+# Размер блока, на который заранее выделены рабочие буферы генератора
+BLOCK_FRAMES = 4096
+
+
+class Oscillator:
+    """
+    Табличный генератор тона с непрерывной фазой.
+
+    Фаза сохраняется между вызовами render(), поэтому соседние элементы
+    и целые упражнения продолжают одну и ту же волну без скачков фазы.
+    Меандр ('discrete') строится из нечетных гармоник только ниже частоты
+    Найквиста, что убирает алиасинг. Рабочие буферы выделяются один раз,
+    и render() не создает новых массивов.
+    """
+    def __init__(self, sample_rate=44100, block_frames=BLOCK_FRAMES):
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+        self.phase = 0.0 # Текущая фаза в отсчетах таблицы [0, TABLE_SIZE)
+        self._tables = {}
+
+        # --- Рабочие буферы на один блок ---
+        self._ramp = np.arange(block_frames, dtype=np.float64)
+        self._pos = np.empty(block_frames, dtype=np.float64)
+        self._floor = np.empty(block_frames, dtype=np.float64)
+        self._index = np.empty(block_frames, dtype=np.intp)
+        self._left = np.empty(block_frames, dtype=np.float64)
+        self._right = np.empty(block_frames, dtype=np.float64)
+        self._carrier = np.empty(block_frames, dtype=np.float32)
+
+    def _build_table(self, sound_type: str, tone: float):
+        """Строит один период волны (+2 отсчета запаса для интерполяции)."""
+        k = np.arange(TABLE_SIZE + 2, dtype=np.float64) * (2 * np.pi / TABLE_SIZE)
+        if sound_type != "discrete":
+            return np.sin(k)
+
+        # Ограниченный по спектру меандр: (4/pi) * sum(sin(h*x)/h) по нечетным h
+        nyquist = self.sample_rate / 2
+        max_harmonic = int(min(nyquist / max(tone, 1.0), TABLE_SIZE / 2))
+        table = np.zeros_like(k)
+        for h in range(1, max_harmonic + 1, 2):
+            table += np.sin(h * k) / h
+        table *= 4 / np.pi
+        # Нормируем, чтобы эффект Гиббса не выходил за [-1, 1]
+        table /= max(1.0, np.abs(table).max())
+        return table
+
+    def get_table(self, sound_type: str, tone: float):
+        """Возвращает (и кэширует) волновую таблицу для типа звука и тона."""
+        # Таблица синуса не зависит от тона, меандра - зависит через число гармоник
+        key = (sound_type, None if sound_type != "discrete" else int(tone))
+        table = self._tables.get(key)
+        if table is None:
+            table = self._build_table(sound_type, tone)
+            self._tables[key] = table
+        return table
+
+    def _render_block(self, out, table, increment):
+        n = len(out)
+        pos = self._pos[:n]
+        floor = self._floor[:n]
+        index = self._index[:n]
+        left = self._left[:n]
+        right = self._right[:n]
+
+        np.multiply(self._ramp[:n], increment, out=pos)
+        pos += self.phase
+        np.mod(pos, TABLE_SIZE, out=pos)
+        np.floor(pos, out=floor)
+        index[...] = floor
+        np.subtract(pos, floor, out=pos) # Дробная часть для интерполяции
+
+        np.take(table, index, out=left)
+        index += 1
+        np.take(table, index, out=right)
+        np.subtract(right, left, out=right)
+        right *= pos
+        np.add(left, right, out=out)
+
+        self.phase = (self.phase + n * increment) % TABLE_SIZE
+
+    def render(self, out, tone: float, sound_type="analog"):
+        """
+        Заполняет массив out следующими сэмплами тона, продолжая фазу.
+
+        Args:
+            out (np.ndarray): Массив float32, который будет перезаписан.
+            tone (float): Частота в Гц.
+            sound_type (str): 'analog' (синус) или 'discrete' (меандр).
+        """
+        table = self.get_table(sound_type, tone)
+        increment = tone * TABLE_SIZE / self.sample_rate
+        for start in range(0, len(out), self.block_frames):
+            self._render_block(out[start:start + self.block_frames], table, increment)
+
+    def modulate(self, samples, tone: float, sound_type="analog"):
+        """
+        Умножает огибающую samples на тон на месте (несущая * огибающая).
+
+        Используется для дорожек, где samples уже содержит "манипуляцию":
+        громкость, фронты и нулевые паузы.
+        """
+        table = self.get_table(sound_type, tone)
+        increment = tone * TABLE_SIZE / self.sample_rate
+        for start in range(0, len(samples), self.block_frames):
+            block = samples[start:start + self.block_frames]
+            carrier = self._carrier[:len(block)]
+            self._render_block(carrier, table, increment)
+            block *= carrier
+        return samples
+
+    def reset_phase(self):
+        self.phase = 0.0
+
+
+class EnvelopeShaper:
+    """
+    Строит огибающие элементов с плавными фронтами.
+
+    Фронты (атака/затухание) вычисляются один раз для каждого
+    значения attack_decay_ms и затем переиспользуются.
+    """
+    def __init__(self, sample_rate=44100):
+        self.sample_rate = sample_rate
+        self._ramps = {}
+
+    def get_ramps(self, attack_decay_ms: float):
+        """Возвращает пару (атака, затухание) для заданной длительности фронта."""
+        ramps = self._ramps.get(attack_decay_ms)
+        if ramps is None:
+            samples = int(self.sample_rate * (attack_decay_ms / 1000.0))
+            attack = np.linspace(0, 1, samples).astype(np.float32)
+            ramps = (attack, attack[::-1].copy())
+            self._ramps[attack_decay_ms] = ramps
+        return ramps
+
+    def build(self, num_samples: int, volume: float, attack_decay_ms: float, smooth=True):
+        """
+        Возвращает огибающую элемента длиной num_samples.
+
+        Args:
+            num_samples (int): Длина элемента в сэмплах.
+            volume (float): Громкость от 0.0 до 1.0.
+            attack_decay_ms (float): Длительность фронтов в мс.
+            smooth (bool): Применять ли фронты (для 'discrete' - нет).
+        """
+        envelope = np.full(num_samples, volume, dtype=np.float32)
+        if smooth:
+            attack, decay = self.get_ramps(attack_decay_ms)
+            ramp_len = len(attack)
+            if num_samples > 2 * ramp_len:
+                envelope[:ramp_len] *= attack
+                envelope[-ramp_len:] *= decay
+        return envelope
+
+
+class Sidetone:
+    """
+    Тон самоконтроля для ключа, который синтезируется прямо в колбэке вывода.
+
+    Колбэк вызывает mix() для каждого блока: блок сопоставляется интервалу
+    времени perf_counter_ns, сдвинутому назад на delay_ns (чуть больше
+    одного блока), и звучит там, где ключ был нажат в этом интервале.
+    Поэтому нажатие слышно через один блок плюс задержку устройства, а не
+    через весь кольцевой буфер, и длительность звука точна до сэмпла
+    относительно отметок времени событий. Пока ключ свободен, привязка
+    к часам обновляется, чтобы часы устройства и процессора не расходились.
+    """
+    def __init__(self, keyer, sample_rate=44100, tone=700, volume=0.3, sound_type="analog",
+                 attack_decay_ms=5, delay_ns=0):
+        """
+        Args:
+            keyer: Источник звучащих отрезков (keyer.Keyer.marks_between).
+            delay_ns (int): Сдвиг звука относительно событий (задает приемник).
+        """
+        self.keyer = keyer
+        self.sample_rate = sample_rate
+        self.tone = tone
+        self.volume = volume
+        self.sound_type = sound_type
+        self.delay_ns = delay_ns
+        self.oscillator = Oscillator(sample_rate)
+        ramp_frames = int(sample_rate * attack_decay_ms / 1000) if sound_type == "analog" else 1
+        self._ramp_step = 1.0 / max(1, ramp_frames)
+        self._ns_per_frame = 1_000_000_000 / sample_rate
+        self._gain = 0.0        # Громкость огибающей в конце прошлого блока (0..1)
+        self._clock_ns = None   # Момент (нс), которому соответствует начало следующего блока
+        self._target = np.zeros(0, dtype=np.float32)
+        self._envelope = np.zeros(0, dtype=np.float32)
+        self._steps = np.zeros(0, dtype=np.float32)
+
+    def _ensure_buffers(self, frames: int):
+        if len(self._target) < frames:
+            self._target = np.zeros(frames, dtype=np.float32)
+            self._envelope = np.zeros(frames, dtype=np.float32)
+            self._steps = np.arange(1, frames + 1, dtype=np.float32) * self._ramp_step
+
+    def mix(self, block, now_ns: int):
+        """
+        Подмешивает тон самоконтроля в блок вывода (на месте).
+
+        Args:
+            block (np.ndarray): Блок float32, который колбэк отдаст устройству.
+            now_ns (int): time.perf_counter_ns() в момент вызова колбэка.
+        """
+        frames = len(block)
+        if self._clock_ns is None:
+            self._clock_ns = now_ns - self.delay_ns
+        start_ns = self._clock_ns
+        end_ns = start_ns + frames * self._ns_per_frame
+        self._clock_ns = end_ns
+
+        marks = self.keyer.marks_between(int(start_ns), int(end_ns))
+        if not marks and self._gain == 0.0:
+            # Ключ свободен - следующий блок заново привязывается к часам
+            self._clock_ns = None
+            return
+
+        self._ensure_buffers(frames)
+        target = self._target[:frames]
+        target[:] = 0.0
+        for mark_start, mark_end in marks:
+            first = max(0, int(np.ceil((mark_start - start_ns) / self._ns_per_frame)))
+            last = frames if mark_end is None else min(frames, int(np.ceil((mark_end - start_ns) / self._ns_per_frame)))
+            target[first:last] = 1.0
+
+        # Огибающая с линейными фронтами: цикл по участкам постоянного состояния, а не по сэмплам
+        envelope = self._envelope[:frames]
+        changes = np.flatnonzero(target[1:] != target[:-1]) + 1
+        bounds = [0] + changes.tolist() + [frames]
+        gain = self._gain
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            steps = self._steps[:last - first]
+            segment = envelope[first:last]
+            if target[first]:
+                np.add(steps, gain, out=segment)
+            else:
+                np.subtract(gain, steps, out=segment)
+            np.clip(segment, 0.0, 1.0, out=segment)
+            gain = float(segment[-1])
+        self._gain = gain
+
+        envelope *= self.volume
+        self.oscillator.modulate(envelope, self.tone, self.sound_type)
+        block += envelope
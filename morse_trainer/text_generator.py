@@ -0,0 +1,94 @@
+import numpy as np
+
+class ExerciseTextGenerator:
+    """
+    Генератор случайных групп на numpy.random.Generator.
+
+    Группы строятся пачками: номера знаков выбираются одним вызовом
+    генератора, а текст собирается из массива без конкатенации строк.
+    Генератор создается с явным зерном (seed), поэтому любую сессию
+    можно воспроизвести в точности, передав то же зерно.
+    """
+    # Сколько групп генерировать за один шаг в потоковом режиме
+    STREAM_BATCH = 1024
+
+    def __init__(self, chars: list, weights=None, seed=None):
+        """
+        Args:
+            chars (list): Пул знаков (или слов) для групп.
+            weights (list): Веса знаков (необязательно); по умолчанию - равные.
+            seed (int): Зерно генератора. Если не задано, берется случайное
+                и сохраняется в self.seed для повторения сессии.
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.chars = list(chars)
+        self._tokens = np.array(self.chars, dtype=str) if self.chars else np.zeros(0, dtype='<U1')
+        # Для одиночных символов текст собирается прямо из буфера UTF-32
+        self._single_chars = all(len(char) == 1 for char in self.chars)
+
+        self._cumulative = None
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+            if len(weights) != len(self.chars):
+                raise ValueError("Число весов должно совпадать с числом знаков")
+            total = weights.sum()
+            if total <= 0:
+                raise ValueError("Сумма весов должна быть положительной")
+            self._cumulative = np.cumsum(weights / total)
+
+    def _sample_indices(self, count: int):
+        """Выбирает count номеров знаков (с учетом весов, если они заданы)."""
+        if self._cumulative is None:
+            return self.rng.integers(0, len(self.chars), size=count)
+        indices = np.searchsorted(self._cumulative, self.rng.random(count), side='right')
+        # Защита от погрешности округления в последнем элементе суммы
+        return np.minimum(indices, len(self.chars) - 1)
+
+    def _format_groups(self, indices):
+        """Собирает текст из матрицы номеров (группа на строку) с пробелами между группами."""
+        num_groups, group_size = indices.shape
+        if self._single_chars:
+            table = np.full((num_groups, group_size + 1), ' ', dtype='<U1')
+            table[:, :group_size] = self._tokens[indices]
+            return table.tobytes().decode('utf-32-le')[:-1]
+        return " ".join("".join(group) for group in self._tokens[indices].tolist())
+
+    def generate(self, num_groups: int, group_size=5):
+        """
+        Генерирует весь текст упражнения сразу.
+
+        Returns:
+            str: Группы через пробел (пустая строка, если пул пуст).
+        """
+        if not self.chars or num_groups <= 0 or group_size <= 0:
+            return ""
+        indices = self._sample_indices(num_groups * group_size).reshape(num_groups, group_size)
+        return self._format_groups(indices)
+
+    def iter_groups(self, group_size=5, num_groups=None):
+        """
+        Потоково отдает группы, не строя весь текст в памяти.
+
+        Args:
+            group_size (int): Размер группы.
+            num_groups (int): Сколько групп выдать; None - бесконечно
+                (для открытых сессий).
+
+        Yields:
+            str: Очередная группа.
+        """
+        if not self.chars or group_size <= 0:
+            return
+        remaining = num_groups
+        while remaining is None or remaining > 0:
+            batch = self.STREAM_BATCH if remaining is None else min(self.STREAM_BATCH, remaining)
+            indices = self._sample_indices(batch * group_size).reshape(batch, group_size)
+            if self._single_chars:
+                yield from self._format_groups(indices).split(" ")
+            else:
+                yield from ("".join(group) for group in self._tokens[indices].tolist())
+            if remaining is not None:
+                remaining -= batch
@@ -0,0 +1,88 @@
+# Роли оформляемых виджетов: свойство виджета -> ключ цвета в теме
+ROLE_STYLES = {
+    "card": {"fg_color": "card_bg"},
+    "text": {"text_color": "text_color"},
+    "button": {"text_color": "text_color", "fg_color": "button_bg", "hover_color": "button_hover"},
+    "accent_button": {"text_color": "text_color", "fg_color": "accent_color"},
+    "option_menu": {"text_color": "text_color", "fg_color": "button_bg", "button_color": "button_bg",
+                    "button_hover_color": "button_hover"},
+    "slider": {"button_color": "button_bg", "progress_color": "accent_color", "button_hover_color": "button_hover"},
+    "switch": {"text_color": "text_color", "progress_color": "accent_color"},
+}
+# Свойства, в которые ставится шрифт виджета (у выпадающих меню - еще и в сам список)
+FONT_PROPERTIES = {"option_menu": ("font", "dropdown_font")}
+
+
+class ThemeEngine:
+    """
+    Применение тем к зарегистрированным виджетам.
+
+    Каждый виджет регистрируется один раз с ролью (см. ROLE_STYLES) и именем
+    шрифта. При смене темы для каждой роли вычисляются только свойства,
+    которые отличаются от уже примененных, и каждый виджет получает их
+    одним вызовом configure. Виджеты не пересоздаются, а шрифты - общие
+    объекты из словаря fonts, которые создаются один раз за все время работы.
+    """
+    def __init__(self, fonts: dict):
+        """
+        Args:
+            fonts (dict): Общий словарь шрифтов приложения (имя -> CTkFont).
+        """
+        self.fonts = fonts
+        self._widgets = {role: [] for role in ROLE_STYLES}  # роль -> [(виджет, имя шрифта)]
+        self._styles = {}   # роль -> уже примененные свойства
+        self._fonts_applied = False
+
+    def resolve(self, theme_data: dict):
+        """Свойства всех ролей для темы: роль -> {свойство: значение}."""
+        return {role: {prop: theme_data.get(key) for prop, key in props.items()}
+                for role, props in ROLE_STYLES.items()}
+
+    def _font_options(self, role: str, font_name: str):
+        font = self.fonts.get(font_name) if font_name else None
+        if font is None:
+            return {}
+        return {prop: font for prop in FONT_PROPERTIES.get(role, ("font",))}
+
+    def register(self, widget, role: str, font: str = None):
+        """
+        Добавляет виджет в реестр. Если тема уже применялась, виджет сразу
+        получает ее свойства и свой шрифт.
+        """
+        self._widgets[role].append((widget, font))
+        options = dict(self._styles.get(role, {}))
+        if self._fonts_applied:
+            options.update(self._font_options(role, font))
+        if options:
+            widget.configure(**options)
+
+    def prune(self):
+        """Убирает из реестра уничтоженные виджеты."""
+        for role, entries in self._widgets.items():
+            self._widgets[role] = [(widget, font) for widget, font in entries if widget.winfo_exists()]
+
+    def apply(self, theme_data: dict):
+        """
+        Применяет тему за один проход по реестру.
+
+        Returns:
+            int: Сколько виджетов было перенастроено.
+        """
+        self.prune()
+        apply_fonts = not self._fonts_applied and bool(self.fonts)
+        new_styles = self.resolve(theme_data)
+        configured = 0
+        for role, style in new_styles.items():
+            old_style = self._styles.get(role, {})
+            changed = {prop: value for prop, value in style.items()
+                       if value is not None and (prop not in old_style or old_style[prop] != value)}
+            if not changed and not apply_fonts:
+                continue
+            for widget, font in self._widgets[role]:
+                options = {**changed, **self._font_options(role, font)} if apply_fonts else changed
+                if options:
+                    widget.configure(**options)
+                    configured += 1
+            self._styles[role] = {**old_style, **changed}
+        self._fonts_applied = self._fonts_applied or apply_fonts
+        return configured
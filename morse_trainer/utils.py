@@ -36,4 +36,12 @@ def save_json(data, file_path: str):
         print(f"Ошибка при сохранении файла {file_path}: {e}")
         return False
 
-    
\ No newline at end of file
+def user_data_dir(app_name: str = "MorseTrainerNG"):
+    """Возвращает папку для пользовательских данных приложения (кэши, статистика)."""
+    if sys.platform == "win32":
+        base_path = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base_path = os.path.expanduser("~/Library/Application Support")
+    else:
+        base_path = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base_path, app_name)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# Тесты запускаются из корня репозитория без установки пакета
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from morse_trainer.utils import load_json, resource_path  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def characters_data():
+    return load_json(resource_path("config/characters.json"))
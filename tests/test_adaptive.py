@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from morse_trainer.adaptive import AdaptiveSelector, FenwickTree
+
+
+def linear_find(weights, value):
+    """Эталон: первый элемент, чья накопленная сумма больше value."""
+    return int(np.searchsorted(np.cumsum(weights), value, side="right"))
+
+
+def probe_values(weights):
+    """Границы отрезков, их середины и значения вплотную к ним."""
+    bounds = np.concatenate(([0.0], np.cumsum(weights)))
+    total = bounds[-1]
+    values = set(bounds[:-1]) | set((bounds[:-1] + bounds[1:]) / 2)
+    values |= {np.nextafter(b, 0) for b in bounds[1:]}
+    return sorted(v for v in values if 0 <= v < total)
+
+
+@pytest.mark.parametrize("weights", [
+    [1.0],
+    [0.0, 2.0],
+    [2.0, 0.0],
+    [1.0, 0.0, 0.0, 3.0, 0.5],
+    [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 2.0, 0.0],
+    [0.5, 1.5, 0.25, 4.0, 0.0, 1.0, 1.0, 0.0, 2.0],
+])
+def test_find_matches_linear_scan(weights):
+    tree = FenwickTree(weights)
+    for value in probe_values(weights):
+        assert tree.find(value) == linear_find(weights, value), value
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_find_after_updates(seed):
+    rng = np.random.default_rng(seed)
+    size = int(rng.integers(1, 40))
+    # Веса кратны 1/4: суммы точные, и границы отрезков можно сравнивать на равенство
+    weights = rng.integers(0, 12, size) / 4 * (rng.random(size) > 0.3)
+    tree = FenwickTree(weights)
+    for _ in range(20):
+        index = int(rng.integers(size))
+        weights[index] = 0.0 if rng.random() < 0.3 else int(rng.integers(1, 20)) / 4
+        tree.set(index, weights[index])
+        if weights.sum() == 0:
+            continue
+        assert tree.total == pytest.approx(weights.sum())
+        for value in probe_values(weights):
+            assert tree.find(value) == linear_find(weights, value), value
+
+
+def test_selector_tree_follows_answers():
+    selector = AdaptiveSelector(seed=0)
+    selector.set_pool(list("АБВГ"))
+    selector.record_answer("Б", False, 2.5)
+    selector.record_answer("В", True, 0.2)
+    selector.record_answer("Я", False)     # Знак вне пула: только статистика
+    assert selector._tree.total == pytest.approx(sum(selector.get_weights(selector.pool)))
+    draws = [selector.choice() for _ in range(2000)]
+    assert set(draws) == set("АБВГ")
+    # Ошибка и медленный ответ делают "Б" самым частым
+    assert max(set(draws), key=draws.count) == "Б"
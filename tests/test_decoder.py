@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from morse_trainer.config_cache import flatten_char_map
+from morse_trainer.decoder import create_decoder, estimate_dot_seconds
+from morse_trainer.morse_table import MorseTable
+
+SAMPLE_RATE = 8000
+TONE = 700
+
+
+@pytest.fixture(scope="module")
+def table(characters_data):
+    return MorseTable(flatten_char_map(characters_data))
+
+
+def render(table, text, wpm):
+    """Чистый тон по длительностям MorseTable.encode с тишиной по краям."""
+    dot = int(round(1.2 / wpm * SAMPLE_RATE))
+    runs = table.encode(text).runs
+    states = np.repeat(np.arange(len(runs)) % 2 == 0, runs * dot)
+    t = np.arange(len(states)) / SAMPLE_RATE
+    tone = (0.5 * np.sin(2 * np.pi * TONE * t) * states).astype(np.float32)
+    silence = np.zeros(10 * dot, dtype=np.float32)
+    return np.concatenate((silence, tone, silence))
+
+
+def unit_runs(table, text, dot_seconds):
+    """Отрезки (звук?, сек) без звука - как их видит калибровка."""
+    runs = table.encode(text).runs
+    return [(i % 2 == 0, units * dot_seconds) for i, units in enumerate(runs)]
+
+
+@pytest.mark.parametrize("text", [
+    "ТТТТТ ТТТТТ МОМОМ",    # Одни тире в начале
+    "ЕЕЕЕЕ ИИИИИ СССС",     # Одни точки
+    "ПАРИС 12345 ПАРИС",
+])
+@pytest.mark.parametrize("wpm", [8, 40])
+def test_estimate_dot_seconds(table, text, wpm):
+    dot = 1.2 / wpm
+    # Заданная скорость (20 WPM) далека от настоящей - оценка не должна на нее опираться
+    assert estimate_dot_seconds(unit_runs(table, text, dot), 1.2 / 20) == pytest.approx(dot, rel=0.01)
+
+
+@pytest.mark.parametrize("text", [
+    "ТТТТТ ТТТТТ МОМОМ",
+    "ЕЕЕЕЕ ИИИИИ СССС",
+    "ПАРИС ВАША ОЧЕРЕДЬ 73",
+])
+@pytest.mark.parametrize("wpm", [10, 25, 45])
+def test_decodes_synthetic_audio(table, text, wpm):
+    decoder = create_decoder(TONE, SAMPLE_RATE, wpm=20)
+    samples = render(table, text, wpm)
+    decoded = "".join(decoder.feed(samples[i:i + 4096]) for i in range(0, len(samples), 4096))
+    decoded += decoder.finish()
+    assert " ".join(decoded.split()) == text
+    assert decoder.wpm == pytest.approx(wpm, rel=0.1)
@@ -0,0 +1,57 @@
+import pytest
+
+from morse_trainer.keyer import NS_PER_SECOND, IambicKeyer
+
+WPM = 20
+DOT_NS = int(1.2 / WPM * NS_PER_SECOND)
+MS = 1_000_000
+
+
+def elements(keyer):
+    """Звучавшие элементы строкой из '•' и '–'."""
+    runs, _ = keyer.take_runs(10 * NS_PER_SECOND)
+    return "".join("–" if duration == 3 * DOT_NS else "•" for is_mark, duration in runs if is_mark)
+
+
+def squeeze(mode, first_is_dah, release_ns):
+    """Нажать first, через 10 мс второй лепесток, отпустить оба в release_ns."""
+    keyer = IambicKeyer(WPM, mode)
+    keyer.contact(first_is_dah, True, 0)
+    keyer.contact(not first_is_dah, True, 10 * MS)
+    keyer.contact(first_is_dah, False, release_ns)
+    keyer.contact(not first_is_dah, False, release_ns)
+    return keyer
+
+
+@pytest.mark.parametrize("mode, first_is_dah, release_ms, expected", [
+    # Отпускание во время тире (120-300 мс): в режиме B добавляется точка
+    ("A", False, 150, "•–"),
+    ("B", False, 150, "•–•"),
+    # Отпускание в паузе после третьего элемента (660-720 мс)
+    ("A", True, 700, "–•–•"),
+    ("B", True, 700, "–•–•–"),
+])
+def test_squeeze_element_order(mode, first_is_dah, release_ms, expected):
+    assert elements(squeeze(mode, first_is_dah, release_ms * MS)) == expected
+
+
+def test_squeeze_timing_is_exact():
+    keyer = squeeze("B", False, 150 * MS)
+    runs, _ = keyer.take_runs(10 * NS_PER_SECOND)
+    assert runs == [(True, DOT_NS), (False, DOT_NS), (True, 3 * DOT_NS), (False, DOT_NS), (True, DOT_NS)]
+
+
+def test_held_paddle_repeats_element():
+    keyer = IambicKeyer(WPM)
+    keyer.contact(False, True, 0)
+    keyer.contact(False, False, 9 * DOT_NS // 2)    # Во время третьей точки (4-5 точек)
+    assert elements(keyer) == "•••"
+
+
+def test_memory_from_tap_during_element():
+    keyer = IambicKeyer(WPM, "A")
+    keyer.contact(True, True, 0)
+    keyer.contact(True, False, 10 * MS)
+    keyer.contact(False, True, 50 * MS)         # Короткое нажатие точки во время тире
+    keyer.contact(False, False, 60 * MS)
+    assert elements(keyer) == "–•"
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from morse_trainer.config_cache import flatten_char_map
+from morse_trainer.morse_table import CHAR_GAP, ELEMENT_GAP, WORD_GAP, MorseTable
+
+
+@pytest.fixture(scope="module")
+def table(characters_data):
+    return MorseTable(flatten_char_map(characters_data))
+
+
+def expected_runs(table, text):
+    """Эталон: посимвольно через get_units, как играл старый код."""
+    runs = []
+    pending_gap = None
+    for char in text:
+        if char == " ":
+            if pending_gap is not None:
+                pending_gap = WORD_GAP
+            continue
+        units = table.get_units(char)
+        if not units:
+            continue
+        if pending_gap is not None:
+            runs.append(pending_gap)
+        for i, unit in enumerate(units):
+            if i:
+                runs.append(ELEMENT_GAP)
+            runs.append(unit)
+        pending_gap = CHAR_GAP
+    return runs
+
+
+def test_encode_matches_get_units_for_every_char(table):
+    for char in table.chars:
+        assert table.encode(char).runs.tolist() == expected_runs(table, char)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_encode_matches_get_units_for_text(table, seed):
+    rng = np.random.default_rng(seed)
+    alphabet = table.chars + [" ", " ", "Q", "#"]
+    text = "".join(rng.choice(alphabet, size=200))
+    encoded = table.encode(text)
+    runs = expected_runs(table, text)
+    assert encoded.runs.tolist() == runs
+    assert encoded.total_units == sum(runs)
+
+
+def test_char_offsets_point_at_char_start(table):
+    text = "ПАРИС ПАРИС"
+    encoded = table.encode(text)
+    for i, char in enumerate(text):
+        if char == " ":
+            continue
+        units = table.get_units(char)
+        char_length = sum(units) + (len(units) - 1) * ELEMENT_GAP
+        assert encoded.char_offsets[i] == sum(expected_runs(table, text[:i + 1])) - char_length
+
+
+def test_prosign_is_sent_without_char_gaps(table):
+    runs = table.encode("<СК>").runs.tolist()
+    units = table.get_units("С") + table.get_units("К")
+    assert runs[0::2] == units
+    assert all(space == ELEMENT_GAP for space in runs[1::2])
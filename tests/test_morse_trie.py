@@ -0,0 +1,40 @@
+import pytest
+
+from morse_trainer.morse_table import DOT_SYMBOLS
+from morse_trainer.morse_trie import DEFAULT_CHARSET, START_KEY, MorseIndex, build_indexes
+
+
+def section_codes(characters_data):
+    return [(char, details["code"]) for section in ("alphabet", "digits", "signs")
+            for char, details in characters_data[section].items()]
+
+
+def test_every_code_round_trips(characters_data):
+    index = build_indexes(characters_data)[DEFAULT_CHARSET]
+    for char, code in section_codes(characters_data):
+        assert index.lookup(MorseIndex.key_from_code(code)) == char
+
+
+def test_advance_and_decode_units_agree_with_lookup(characters_data):
+    index = build_indexes(characters_data)[DEFAULT_CHARSET]
+    for char, code in section_codes(characters_data):
+        key = START_KEY
+        for symbol in code:
+            key = index.advance(key, symbol not in DOT_SYMBOLS)
+        assert index.lookup(key) == char
+        assert index.decode_units([1 if symbol in DOT_SYMBOLS else 3 for symbol in code]) == char
+
+
+def test_has_continuation_only_for_prefixes(characters_data):
+    index = build_indexes(characters_data)[DEFAULT_CHARSET]
+    codes = {MorseIndex.key_from_code(code) for _, code in section_codes(characters_data)}
+    for key in codes:
+        has_longer = any(other.bit_length() > key.bit_length() and other >> (other.bit_length() - key.bit_length()) == key
+                         for other in codes)
+        assert index.has_continuation(key) == has_longer
+
+
+@pytest.mark.parametrize("code", ["••••••••", "––––––––"])
+def test_codes_longer_than_table_are_invalid(characters_data, code):
+    index = build_indexes(characters_data)[DEFAULT_CHARSET]
+    assert index.lookup(MorseIndex.key_from_code(code)) is None